@@ -0,0 +1,26 @@
+# api/admin_auth.py
+import hmac
+from flask import current_app, request
+
+# ==============================================================================
+# TOKEN ADMIN CHO CÁC ENDPOINT GIÁM SÁT
+# ==============================================================================
+# Header X-Admin-Token (hoặc "Authorization: Bearer <token>" cho Prometheus scrape)
+# phải khớp ADMIN_TOKEN (app.config, đọc từ .env).
+# Server chưa đặt ADMIN_TOKEN -> từ chối tất cả (không mở endpoint khi quên cấu hình).
+
+
+def _supplied_token():
+    token = request.headers.get("X-Admin-Token")
+    if token: return token
+    scheme, _, value = (request.headers.get("Authorization") or "").partition(" ")
+    return value.strip() if scheme.lower() == "bearer" else ""
+
+
+def is_admin_request():
+    token = current_app.config.get('ADMIN_TOKEN') or ""
+    supplied = _supplied_token()
+    if not token:
+        return False
+    # So sánh thời gian hằng -> không đoán dần token qua độ trễ
+    return hmac.compare_digest(supplied.encode("utf-8"), token.encode("utf-8"))
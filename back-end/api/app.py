@@ -24,6 +24,9 @@ from flask import Flask, jsonify, request
 from flask_cors import CORS
 from flasgger import Swagger
 from models import db, bcrypt, Restaurant
+from async_runtime import init_async_runtime
+from metrics import init_metrics
+from query_profiler import init_query_profiler
 
 # IMPORT BLUEPRINTS
 from restaurant_routes import restaurant_bp
@@ -56,6 +59,10 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 # [CẤU HÌNH API KEYS]
 app.config['GOONG_API_KEY'] = os.environ.get('GOONG_API_KEY', "")
 app.config['OPEN_WEATHER_API_KEY'] = os.environ.get('OPEN_WEATHER_API_KEY', "") # <--- [MỚI] Thêm vào config
+# Token cho endpoint giám sát (/api/admin/...). Để trống = đóng các endpoint đó
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN', "")
+# Base URL dịch vụ ngoài (Goong đọc GOONG_BASE_URL trong goong_client) - trỏ vào mock server khi test offline
+app.config['OPEN_WEATHER_BASE_URL'] = os.environ.get('OPEN_WEATHER_BASE_URL', "http://api.openweathermap.org")
 
 # CORS
 allowed_origins = [
@@ -69,9 +76,12 @@ CORS(app, resources={r"/api/*": {"origins": allowed_origins}}, supports_credenti
 # --- INIT ---
 db.init_app(app)
 bcrypt.init_app(app)
+init_async_runtime(app)  # View async (map/weather) chạy trên event loop dùng chung
+init_metrics(app, db)    # Đo latency/SQL/API ngoài, xem tại /api/metrics
+init_query_profiler(app, db)  # SQL chậm + EXPLAIN, xem tại /api/admin/slow-queries
 
-with app.app_context():
-    db.create_all()
+# Schema do Alembic quản lý (README - Step 5: `alembic upgrade head`), KHÔNG dùng db.create_all()
+# -> create_all tạo sẵn index nhưng không ghi alembic_version, lần upgrade sau sẽ lỗi "index already exists"
 
 # --- REGISTER BLUEPRINTS ---
 app.register_blueprint(auth_bp)        # Login, Register
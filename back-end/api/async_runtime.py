@@ -0,0 +1,113 @@
+# api/async_runtime.py
+import asyncio
+import functools
+import os
+import threading
+import time
+import httpx
+from flask import current_app, g, has_request_context
+from metrics import HTTPX_EVENT_HOOKS
+from query_profiler import current_route
+
+# ==============================================================================
+# EVENT LOOP DÙNG CHUNG CHO CÁC VIEW ASYNC
+# ==============================================================================
+# Mặc định Flask (qua asgiref) tạo một event loop mới cho MỖI request async,
+# nên không thể giữ connection pool giữa các request.
+# Ở đây ta chạy MỘT event loop nền cho cả process: mọi view `async def` được
+# đẩy vào loop này, dùng chung một httpx.AsyncClient (keep-alive), nhờ vậy
+# nhiều request đang chờ Goong/OpenWeather được multiplex trên cùng một loop.
+# Việc chặn (query DB) trong view async phải đi qua run_blocking, không chạy thẳng trên loop.
+
+DEFAULT_TIMEOUT = 10
+POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+class AsyncRuntime:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._pid = None
+
+    def _ensure_loop(self):
+        # Gunicorn fork worker sau khi import app -> mỗi process cần loop riêng
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._client = None
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="async-runtime", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    def run(self, coro):
+        """Chạy coroutine trên loop nền và chờ kết quả (gọi từ code sync)."""
+        loop = self._ensure_loop()
+        # run_coroutine_threadsafe copy contextvars của thread gọi,
+        # nên current_app / request của Flask vẫn dùng được trong coroutine
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def async_to_sync(self, func):
+        """Thay thế Flask.async_to_sync để view async chạy trên loop dùng chung."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.run(func(*args, **kwargs))
+        return wrapper
+
+    def get_client(self):
+        """httpx.AsyncClient dùng chung. Chỉ gọi bên trong coroutine của runtime."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=DEFAULT_TIMEOUT, limits=POOL_LIMITS, event_hooks=HTTPX_EVENT_HOOKS
+            )
+        return self._client
+
+
+runtime = AsyncRuntime()
+
+
+def init_async_runtime(app):
+    """Gắn runtime vào app Flask (gọi 1 lần trong app.py)."""
+    app.async_to_sync = runtime.async_to_sync
+
+
+def get_async_client():
+    return runtime.get_client()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Chạy code sync (query db.session, ...) trong thread pool thay vì trên loop dùng chung
+    -> 1 query chậm không chặn mọi request async khác đang chờ trên loop.
+    func chạy trong app context RIÊNG (db.session riêng, đóng ngay trong thread đó),
+    nên chỉ trả về dữ liệu thuần (dict/list), không trả object ORM.
+    Nhãn route (slow query log) được truyền sang thread, số query/thời gian SQL
+    được cộng lại vào metrics của request đã gọi.
+    """
+    app = current_app._get_current_object()
+    route = current_route()
+    track_sql = has_request_context() and "metrics_start" in g
+    sql = {}
+
+    def call():
+        with app.app_context():
+            g.query_route = route
+            if track_sql:
+                g.metrics_start = time.perf_counter()
+                g.metrics_sql_count = 0
+                g.metrics_sql_seconds = 0.0
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if track_sql:
+                    sql.update(count=g.metrics_sql_count, seconds=g.metrics_sql_seconds)
+    try:
+        return await asyncio.to_thread(call)
+    finally:
+        if sql:
+            g.metrics_sql_count += sql["count"]
+            g.metrics_sql_seconds += sql["seconds"]
@@ -0,0 +1,259 @@
+# api/goong_client.py
+import asyncio
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from async_runtime import get_async_client
+from metrics import registry, requests_response_hook
+
+# ==============================================================================
+# CLIENT GOONG DÙNG CHUNG (API + ETL)
+# ==============================================================================
+# - Connection pool keep-alive (requests.Session cho code sync, httpx cho async)
+# - Timeout riêng cho từng endpoint
+# - Retry có jitter khi gặp 5xx / 429 / lỗi mạng
+# - Circuit breaker: Goong sập thì trả lỗi ngay, không giữ worker chờ timeout
+# - Thống kê độ trễ theo endpoint
+
+# Đổi được qua env (VD trỏ vào scripts/mock_upstream.py khi test offline)
+GOONG_BASE_URL = os.getenv("GOONG_BASE_URL", "https://rsapi.goong.io")
+
+ENDPOINT_TIMEOUTS = {
+    "Geocode": 5,
+    "Direction": 10,
+    "Place/AutoComplete": 10,
+    "Place/Detail": 10,
+}
+DEFAULT_TIMEOUT = 10
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GoongError(Exception):
+    """Lỗi chung khi gọi Goong (HTTP lỗi, lỗi mạng, JSON hỏng...)"""
+    pass
+
+
+class GoongRateLimitError(GoongError):
+    """Vẫn bị 429 sau khi đã retry hết số lần cho phép"""
+    pass
+
+
+class GoongUnavailableError(GoongError):
+    """Circuit breaker đang mở -> không gọi Goong"""
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        # half-open: thời điểm cho request thử đi (None = chưa có request thử nào đang chạy)
+        self._probe_at = None
+        self._lock = threading.Lock()
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def allow(self):
+        # half-open: chỉ cho ĐÚNG 1 request đi thử tới khi có record_success/record_failure/release_probe.
+        # Request thử bị huỷ giữa chừng -> sau reset_timeout cho request khác thử.
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            if state == "closed":
+                return True
+            if state == "open":
+                return False
+            if self._probe_at is not None and now - self._probe_at < self.reset_timeout:
+                return False
+            self._probe_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_at = None
+
+    def release_probe(self):
+        # Kết quả không nói được Goong sống hay chết (4xx, 429, JSON hỏng) -> chỉ trả lượt thử
+        with self._lock:
+            self._probe_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_at = None
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class EndpointStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, elapsed, ok):
+        self.calls += 1
+        if not ok: self.errors += 1
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+
+    def to_dict(self):
+        avg = self.total_seconds / self.calls if self.calls else 0.0
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(avg * 1000, 2),
+            "max_ms": round(self.max_seconds * 1000, 2),
+        }
+
+
+class GoongClient:
+    def __init__(self, base_url=GOONG_BASE_URL, api_key=None, max_retries=3,
+                 backoff_base=0.3, backoff_max=5.0, pool_size=20, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.hooks["response"].append(requests_response_hook)
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    # --- Helpers ---
+    def _prepare(self, endpoint, params, api_key, timeout):
+        if not self.breaker.allow():
+            raise GoongUnavailableError(f"Goong circuit open, skip {endpoint}")
+        query = dict(params)
+        query["api_key"] = api_key or self.api_key
+        url = f"{self.base_url}/{endpoint}"
+        return url, query, timeout or ENDPOINT_TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+
+    def _record(self, endpoint, elapsed, ok):
+        with self._stats_lock:
+            self._stats.setdefault(endpoint, EndpointStats()).record(elapsed, ok)
+
+    def _backoff(self, attempt, retry_after=None):
+        # Full jitter: random(0, min(max, base * 2^attempt))
+        if retry_after:
+            try: return min(float(retry_after), self.backoff_max)
+            except ValueError: pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _handle_response(self, endpoint, status, data_fn, attempt, max_retries):
+        """Trả về (done, data). Ném lỗi nếu không thể retry thêm."""
+        if status in RETRY_STATUSES:
+            if attempt < max_retries:
+                return False, None
+            if status == 429:
+                self.breaker.release_probe()
+                raise GoongRateLimitError(f"Goong {endpoint}: 429 Too Many Requests")
+            self.breaker.record_failure()
+            raise GoongError(f"Goong {endpoint}: HTTP {status}")
+        if status >= 400:
+            self.breaker.release_probe()
+            raise GoongError(f"Goong {endpoint}: HTTP {status}")
+        try:
+            data = data_fn()
+        except ValueError as e:
+            self.breaker.release_probe()
+            raise GoongError(f"Goong {endpoint}: invalid JSON ({e})")
+        self.breaker.record_success()
+        return True, data
+
+    # --- Sync (ETL, route sync) ---
+    def get(self, endpoint, params, api_key=None, timeout=None, retries=None):
+        url, query, timeout = self._prepare(endpoint, params, api_key, timeout)
+        max_retries = self.max_retries if retries is None else retries
+        for attempt in range(max_retries + 1):
+            start = time.perf_counter()
+            try:
+                r = self.session.get(url, params=query, timeout=timeout)
+            except requests.RequestException as e:
+                self._record(endpoint, time.perf_counter() - start, False)
+                if attempt >= max_retries:
+                    self.breaker.record_failure()
+                    raise GoongError(f"Goong {endpoint}: {e}")
+                time.sleep(self._backoff(attempt))
+                continue
+            self._record(endpoint, time.perf_counter() - start, r.status_code < 400)
+            done, data = self._handle_response(endpoint, r.status_code, r.json, attempt, max_retries)
+            if done: return data
+            time.sleep(self._backoff(attempt, r.headers.get("Retry-After")))
+
+    # --- Async (view async trên async_runtime) ---
+    async def aget(self, endpoint, params, api_key=None, timeout=None, retries=None):
+        url, query, timeout = self._prepare(endpoint, params, api_key, timeout)
+        max_retries = self.max_retries if retries is None else retries
+        client = get_async_client()
+        for attempt in range(max_retries + 1):
+            start = time.perf_counter()
+            try:
+                r = await client.get(url, params=query, timeout=timeout)
+            except Exception as e:
+                self._record(endpoint, time.perf_counter() - start, False)
+                if attempt >= max_retries:
+                    self.breaker.record_failure()
+                    raise GoongError(f"Goong {endpoint}: {e}")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            self._record(endpoint, time.perf_counter() - start, r.status_code < 400)
+            done, data = self._handle_response(endpoint, r.status_code, r.json, attempt, max_retries)
+            if done: return data
+            await asyncio.sleep(self._backoff(attempt, r.headers.get("Retry-After")))
+
+    def stats(self):
+        with self._stats_lock:
+            endpoints = {name: s.to_dict() for name, s in self._stats.items()}
+        return {"circuit": self.breaker.state, "endpoints": endpoints}
+
+
+# Instance dùng chung cho các route Flask (api_key truyền theo từng lần gọi)
+goong = GoongClient()
+
+# ------------------------------------------------------------------------------
+# EXPORT stats() CỦA CLIENT DÙNG CHUNG QUA /api/metrics
+# ------------------------------------------------------------------------------
+def _endpoint_samples(field, scale=1):
+    return [({"endpoint": name}, values[field] * scale) for name, values in goong.stats()["endpoints"].items()]
+
+
+registry.collector(
+    "goong_client_calls_total", "Số lần gọi Goong theo endpoint (tính cả lần retry)", "counter",
+    lambda: _endpoint_samples("calls"))
+registry.collector(
+    "goong_client_errors_total", "Số lần gọi Goong lỗi (HTTP >= 400 hoặc lỗi mạng) theo endpoint", "counter",
+    lambda: _endpoint_samples("errors"))
+registry.collector(
+    "goong_client_latency_avg_seconds", "Độ trễ trung bình gọi Goong theo endpoint", "gauge",
+    lambda: _endpoint_samples("avg_ms", 0.001))
+registry.collector(
+    "goong_client_latency_max_seconds", "Độ trễ lớn nhất gọi Goong theo endpoint", "gauge",
+    lambda: _endpoint_samples("max_ms", 0.001))
+registry.collector(
+    "goong_circuit_state", "Trạng thái circuit breaker của Goong (1 = trạng thái hiện tại)", "gauge",
+    lambda: [({"state": state}, int(goong.breaker.state == state)) for state in ("closed", "half-open", "open")])
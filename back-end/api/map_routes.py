@@ -1,24 +1,32 @@
 # api/map_routes.py
 from flask import Blueprint, request, jsonify, current_app
-import requests
+import asyncio
 import polyline
 import json
 import math
-from models import db, RouteHistory, User
+from sqlalchemy import func
+from models import db, RouteHistory, User, Restaurant
+from goong_client import goong
+from async_runtime import run_blocking
 
 map_bp = Blueprint('map_bp', __name__)
 
-def goong_geocode_helper(query):
-    if not query: return None
+# Số request Goong tối đa chạy song song trong 1 lần gọi /api/places/coords hoặc /api/route/optimize
+PLACES_COORDS_CONCURRENCY = 8
+
+async def goong_geocode(query):
+    """Geocode 1 địa chỉ. Trả về None nếu không có kết quả, ném lỗi nếu Goong lỗi."""
     api_key = current_app.config.get('GOONG_API_KEY')
-    base_url = "https://rsapi.goong.io"
+    data = await goong.aget("Geocode", {"address": query}, api_key=api_key)
+    if data.get("results"):
+        loc = data["results"][0]["geometry"]["location"]
+        return {"lat": loc["lat"], "lon": loc["lng"]}
+    return None
+
+async def goong_geocode_helper(query):
+    if not query: return None
     try:
-        params = {"address": query, "api_key": api_key}
-        r = requests.get(f"{base_url}/Geocode", params=params, timeout=10)
-        data = r.json()
-        if data.get("results"):
-            loc = data["results"][0]["geometry"]["location"]
-            return {"lat": loc["lat"], "lon": loc["lng"]}
+        return await goong_geocode(query)
     except Exception as e:
         print(f"Goong Geocode Error: {e}")
     return None
@@ -28,7 +36,7 @@ def goong_geocode_helper(query):
 # ==============================================================================
 
 @map_bp.route("/api/geocode", methods=["POST"])
-def geocode():
+async def geocode():
     """
     Tìm tọa độ từ tên địa điểm (Forward Geocoding)
     ---
@@ -58,12 +66,12 @@ def geocode():
         description: Không tìm thấy địa điểm
     """
     query = request.json.get("query")
-    coords = goong_geocode_helper(query)
+    coords = await goong_geocode_helper(query)
     if coords: return jsonify(coords)
     return jsonify({"error": "Không tìm thấy địa điểm"}), 404
 
 @map_bp.route("/api/reverse", methods=["GET"])
-def reverse_geocode():
+async def reverse_geocode():
     """
     Tìm địa chỉ từ tọa độ (Reverse Geocoding)
     ---
@@ -92,9 +100,7 @@ def reverse_geocode():
     api_key = current_app.config.get('GOONG_API_KEY')
     if not lat or not lon: return jsonify({"error": "Missing params"}), 400
     try:
-        params = {"latlng": f"{lat},{lon}", "api_key": api_key}
-        r = requests.get("https://rsapi.goong.io/Geocode", params=params, timeout=10)
-        data = r.json()
+        data = await goong.aget("Geocode", {"latlng": f"{lat},{lon}"}, api_key=api_key)
         if data.get("results"):
             return jsonify({"display_name": data["results"][0]["formatted_address"]})
         return jsonify({"error": "No address found"}), 404
@@ -102,7 +108,7 @@ def reverse_geocode():
         return jsonify({"error": str(e)}), 500
 
 @map_bp.route("/api/route", methods=["POST"])
-def get_route():
+async def get_route():
     """
     Tìm đường đi giữa các điểm (Routing)
     ---
@@ -146,13 +152,12 @@ def get_route():
     
     params = {
         "origin": origin, "destination": destination,
-        "vehicle": vehicle, "api_key": api_key
+        "vehicle": vehicle
     }
     if waypoints_str: params["waypoints"] = waypoints_str
 
     try:
-        r = requests.get("https://rsapi.goong.io/Direction", params=params, timeout=10)
-        data = r.json()
+        data = await goong.aget("Direction", params, api_key=api_key)
         if not data.get("routes"): return jsonify({"error": "No route"}), 404
         
         route_obj = data["routes"][0]
@@ -170,14 +175,69 @@ def get_route():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def lookup_catalog_coords(place_ids):
+    """{place_id: {"status": "catalog", "lat", "lon"}} cho các quán có tọa độ trong catalog (code sync)"""
+    rows = db.session.query(Restaurant.place_id, Restaurant.latitude, Restaurant.longitude) \
+        .filter(Restaurant.place_id.in_(place_ids)).all()
+    return {
+        pid: {"status": "catalog", "lat": lat, "lon": lng}
+        for pid, lat, lng in rows if lat is not None and lng is not None
+    }
+
 @map_bp.route("/api/places/coords", methods=["POST"])
-def places_coords():
-    place_ids = request.json.get("places", [])
-    coords = []
-    for pid in place_ids:
-        res = goong_geocode_helper(pid)
-        if res: coords.append({"id": pid, "lat": res["lat"], "lon": res["lon"]})
-    return jsonify({"coords": coords})
+async def places_coords():
+    """
+    Lấy tọa độ cho danh sách place_id
+    ---
+    tags:
+      - Map & Routing
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            places:
+              type: array
+              items:
+                type: string
+    responses:
+      200:
+        description: |
+          coords: các điểm lấy được tọa độ (giữ nguyên format cũ).
+          results: trạng thái từng place_id (catalog | geocoded | not_found | error).
+    """
+    place_ids = (request.get_json() or {}).get("places", [])
+    # Loại trùng nhưng giữ thứ tự gửi lên
+    unique_ids = list(dict.fromkeys(pid for pid in place_ids if pid))
+
+    # 1. Tra catalog bằng 1 câu query duy nhất (trong thread pool, không chặn event loop)
+    resolved = await run_blocking(lookup_catalog_coords, unique_ids) if unique_ids else {}
+
+    # 2. Geocode phần còn lại song song (giới hạn bởi semaphore)
+    semaphore = asyncio.Semaphore(PLACES_COORDS_CONCURRENCY)
+
+    async def geocode_one(pid):
+        async with semaphore:
+            try:
+                res = await goong_geocode(pid)
+            except Exception as e:
+                print(f"Goong Geocode Error ({pid}): {e}")
+                return pid, {"status": "error"}
+        if res: return pid, {"status": "geocoded", "lat": res["lat"], "lon": res["lon"]}
+        return pid, {"status": "not_found"}
+
+    leftovers = [pid for pid in unique_ids if pid not in resolved]
+    resolved.update(await asyncio.gather(*[geocode_one(pid) for pid in leftovers]))
+
+    # 3. Trả kết quả từng phần
+    results = [{"id": pid, **resolved[pid]} for pid in unique_ids]
+    coords = [
+        {"id": item["id"], "lat": item["lat"], "lon": item["lon"]}
+        for item in results if "lat" in item
+    ]
+    return jsonify({"coords": coords, "results": results})
 
 # ==============================================================================
 # 2. TỐI ƯU & LƯU LỘ TRÌNH (OPTIMIZE & SAVE)
@@ -193,8 +253,49 @@ def get_normalized_names(places_list):
     """Trả về list các tên địa điểm đã lower và strip để so sánh"""
     return [p.get('name', '').strip().lower() for p in places_list]
 
+def find_cached_route(start_query, places_data, use_manual_order):
+    """
+    Tìm lộ trình đã lưu cùng điểm xuất phát + cùng danh sách địa điểm (code sync, chạy qua run_blocking).
+    Trả về dict các cột cần dùng (không trả object ORM -> không lazy load trên event loop) hoặc None.
+    """
+    # lower() = lower() thay cho ILIKE để dùng được index ix_route_history_start_point_lower
+    potential_routes = RouteHistory.query.filter(
+        func.lower(RouteHistory.start_point) == func.lower(start_query)
+    ).all()
+
+    input_names = get_normalized_names(places_data)
+
+    for r in potential_routes:
+        try:
+            stored_places = json.loads(r.places_json)
+            stored_names = get_normalized_names(stored_places)
+            is_match = False
+
+            if use_manual_order:
+                if input_names == stored_names:
+                    is_match = True
+                    print(f">>> CACHE HIT (Manual): Route ID {r.id}")
+            else:
+                if set(input_names) == set(stored_names) and len(input_names) == len(stored_names):
+                    is_match = True
+                    print(f">>> CACHE HIT (Auto): Route ID {r.id}")
+
+            if is_match:
+                return {
+                    "places": stored_places,
+                    "waypoints": [{"id": p["name"], "address": p["address"], "lat": p.get("lat"), "lon": p.get("lng")} for p in stored_places],
+                    "total_distance": r.total_distance,
+                    "total_duration": r.total_duration,
+                    "polyline_outbound": r.polyline_outbound,
+                    "polyline_return": r.polyline_return,
+                }
+        except Exception as e:
+            print(f"Cache error: {e}")
+            continue
+    return None
+
 @map_bp.route("/api/optimize", methods=["POST"])
-def optimize():
+async def optimize():
     """
     Tối ưu lộ trình đi qua nhiều điểm (TSP Algorithm)
     ---
@@ -249,53 +350,32 @@ def optimize():
     if vehicle == "car":
         print(f">>> CHECKING CACHE (Mode: {'MANUAL' if use_manual_order else 'AUTO'})...")
         
-        potential_routes = RouteHistory.query.filter(
-            RouteHistory.start_point.ilike(start_query)
-        ).all()
+        # Query DB chạy trong thread pool (run_blocking), không chặn event loop dùng chung
+        cached = await run_blocking(find_cached_route, start_query, places_data, use_manual_order)
+        if cached:
+            stored_places = cached["places"]
+            real_start_coords = None
+            if cached["polyline_outbound"]:
+                try:
+                    decoded = polyline.decode(cached["polyline_outbound"])
+                    if decoded: 
+                        real_start_coords = {"lat": decoded[0][0], "lon": decoded[0][1]}
+                except: pass
 
-        input_names = get_normalized_names(places_data)
+            if not real_start_coords:
+                real_start_coords = await goong_geocode_helper(start_query) or {"lat": 0, "lon": 0}
 
-        for r in potential_routes:
-            try:
-                stored_places = json.loads(r.places_json)
-                stored_names = get_normalized_names(stored_places)
-                is_match = False
-
-                if use_manual_order:
-                    if input_names == stored_names:
-                        is_match = True
-                        print(f">>> CACHE HIT (Manual): Route ID {r.id}")
-                else:
-                    if set(input_names) == set(stored_names) and len(input_names) == len(stored_names):
-                        is_match = True
-                        print(f">>> CACHE HIT (Auto): Route ID {r.id}")
-
-                if is_match:
-                    real_start_coords = None
-                    if r.polyline_outbound:
-                        try:
-                            decoded = polyline.decode(r.polyline_outbound)
-                            if decoded: 
-                                real_start_coords = {"lat": decoded[0][0], "lon": decoded[0][1]}
-                        except: pass
-                    
-                    if not real_start_coords:
-                        real_start_coords = goong_geocode_helper(start_query) or {"lat": 0, "lon": 0}
-
-                    return jsonify({
-                        "optimized_order": [p["name"] for p in stored_places],
-                        "distance_km": r.total_distance,
-                        "duration_min": r.total_duration,
-                        "polyline_outbound": r.polyline_outbound,
-                        "polyline_return": r.polyline_return,
-                        "start_point_coords": real_start_coords,
-                        "waypoints": [{"id": p["name"], "address": p["address"], "lat": p.get("lat"), "lon": p.get("lng")} for p in stored_places],
-                        "from_cache": True,
-                        "vehicle": "car" # Return metadata
-                    })
-            except Exception as e:
-                print(f"Cache error: {e}")
-                continue
+            return jsonify({
+                "optimized_order": [p["name"] for p in stored_places],
+                "distance_km": cached["total_distance"],
+                "duration_min": cached["total_duration"],
+                "polyline_outbound": cached["polyline_outbound"],
+                "polyline_return": cached["polyline_return"],
+                "start_point_coords": real_start_coords,
+                "waypoints": cached["waypoints"],
+                "from_cache": True,
+                "vehicle": "car" # Return metadata
+            })
     else:
         print(f">>> VEHICLE IS '{vehicle}'. SKIPPING CACHE TO ENSURE ACCURACY.")
 
@@ -304,20 +384,32 @@ def optimize():
     # ---------------------------------------------------------
     print(">>> CALLING GOONG API...")
     
-    start_coords = goong_geocode_helper(start_query)
+    # Geocode/Direction song song nhưng giới hạn bởi semaphore (như /api/places/coords)
+    semaphore = asyncio.Semaphore(PLACES_COORDS_CONCURRENCY)
+
+    async def geocode_limited(address):
+        async with semaphore:
+            return await goong_geocode_helper(address)
+
+    # Geocode điểm xuất phát và các địa điểm thiếu tọa độ CÙNG LÚC
+    async def resolve_place(place):
+        if place.get("lat") and place.get("lng"):
+            return float(place["lat"]), float(place["lng"])
+        if place.get("address"):
+            res = await geocode_limited(place["address"])
+            if res: return res["lat"], res["lon"]
+        return None, None
+
+    start_coords, *resolved = await asyncio.gather(
+        geocode_limited(start_query),
+        *[resolve_place(place) for place in places_data]
+    )
     if not start_coords: return jsonify({"error": "Start point not found"}), 400
     
     start_tuple = (start_coords["lat"], start_coords["lon"])
     points_to_visit = []
     
-    for place in places_data:
-        p_lat, p_lon = None, None
-        if place.get("lat") and place.get("lng"):
-            p_lat, p_lon = float(place["lat"]), float(place["lng"])
-        elif place.get("address"):
-            res = goong_geocode_helper(place["address"])
-            if res: p_lat, p_lon = res["lat"], res["lon"]
-        
+    for place, (p_lat, p_lon) in zip(places_data, resolved):
         if p_lat:
             points_to_visit.append({
                 "id": place.get("name", "Unknown"),
@@ -350,22 +442,29 @@ def optimize():
     total_duration = 0
     last_stop_index = len(route_sequence) - 2
 
-    for i in range(len(route_sequence) - 1):
-        origin = route_sequence[i]
-        destination = route_sequence[i+1]
-        
+    async def fetch_leg(origin, destination):
         # NEW: Pass the vehicle parameter to Goong
         params = {
             "origin": f"{origin[0]},{origin[1]}", 
             "destination": f"{destination[0]},{destination[1]}", 
-            "vehicle": vehicle,  # <--- DYNAMIC VEHICLE
-            "api_key": api_key
+            "vehicle": vehicle  # <--- DYNAMIC VEHICLE
         }
-        
         try:
-            r = requests.get("https://rsapi.goong.io/Direction", params=params, timeout=10)
-            r_data = r.json()
-            if r_data.get("routes"):
+            async with semaphore:
+                return await goong.aget("Direction", params, api_key=api_key)
+        except Exception as e:
+            print(f"Goong API Error: {e}")
+            return None
+
+    # Gọi Direction cho các chặng song song (tối đa PLACES_COORDS_CONCURRENCY), ghép kết quả theo đúng thứ tự
+    legs_data = await asyncio.gather(*[
+        fetch_leg(route_sequence[i], route_sequence[i+1])
+        for i in range(len(route_sequence) - 1)
+    ])
+
+    for i, r_data in enumerate(legs_data):
+        try:
+            if r_data and r_data.get("routes"):
                 leg = r_data["routes"][0]
                 total_distance += leg["legs"][0]["distance"]["value"]
                 total_duration += leg["legs"][0]["duration"]["value"]
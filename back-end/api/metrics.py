@@ -0,0 +1,268 @@
+# api/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from flask import Blueprint, Response, g, jsonify, request, has_app_context
+from sqlalchemy import event
+from admin_auth import is_admin_request
+
+# ==============================================================================
+# METRICS (FORMAT PROMETHEUS TEXT)
+# ==============================================================================
+# Registry đơn giản trong process (mỗi worker gunicorn có bộ đếm riêng).
+# Thu thập:
+#   - Độ trễ & status code theo blueprint/route
+#   - Số câu SQL và thời gian SQL cho mỗi request (SQLAlchemy events)
+#   - Số lần gọi & thời gian gọi API bên ngoài theo host
+#   - Thời gian từng pha của /api/search
+#   - Thống kê GoongClient theo endpoint + trạng thái circuit breaker (collector, tính lúc render)
+# /api/metrics cần ADMIN_TOKEN (X-Admin-Token hoặc Authorization: Bearer), giống /api/admin/*
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items: return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"): return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {_format_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["counts"]):
+                    le = [("le", _format_number(bound))]
+                    lines.append(f"{self.name}_bucket{_format_labels(key, le)} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series['sum']!r}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+
+class Collector:
+    """Metric tính lúc render: collect() trả về [(labels dict, value), ...]"""
+    def __init__(self, name, help_text, metric_type, collect):
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        self.collect = collect
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in sorted(self.collect(), key=lambda sample: sorted(sample[0].items())):
+            lines.append(f"{self.name}{_format_labels(sorted(labels.items()))} {_format_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help_text):
+        metric = Counter(name, help_text)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, name, help_text, metric_type, collect):
+        metric = Collector(name, help_text, metric_type, collect)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Thời gian xử lý request theo route")
+REQUEST_COUNT = registry.counter(
+    "http_requests_total", "Số request theo route và status code")
+REQUEST_SQL_QUERIES = registry.histogram(
+    "http_request_sql_queries", "Số câu SQL trong mỗi request", buckets=COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = registry.histogram(
+    "http_request_sql_duration_seconds", "Tổng thời gian SQL trong mỗi request")
+UPSTREAM_COUNT = registry.counter(
+    "upstream_requests_total", "Số lần gọi API bên ngoài theo host và status")
+UPSTREAM_LATENCY = registry.histogram(
+    "upstream_request_duration_seconds", "Độ trễ gọi API bên ngoài theo host")
+SEARCH_PHASE_LATENCY = registry.histogram(
+    "search_phase_duration_seconds", "Thời gian từng pha của /api/search")
+
+
+# ------------------------------------------------------------------------------
+# OUTBOUND HTTP
+# ------------------------------------------------------------------------------
+def record_upstream(url, elapsed, status):
+    host = urlsplit(str(url)).hostname or "unknown"
+    UPSTREAM_COUNT.inc(host=host, status=status)
+    UPSTREAM_LATENCY.observe(elapsed, host=host)
+
+
+def requests_response_hook(response, *args, **kwargs):
+    """Hook cho requests.Session: response.elapsed = thời gian tới khi nhận header"""
+    record_upstream(response.url, response.elapsed.total_seconds(), response.status_code)
+
+
+async def _httpx_on_request(req):
+    req.extensions["metrics_start"] = time.perf_counter()
+
+
+async def _httpx_on_response(resp):
+    start = resp.request.extensions.get("metrics_start")
+    if start is not None:
+        record_upstream(resp.request.url, time.perf_counter() - start, resp.status_code)
+
+
+HTTPX_EVENT_HOOKS = {"request": [_httpx_on_request], "response": [_httpx_on_response]}
+
+
+# ------------------------------------------------------------------------------
+# SEARCH PHASES
+# ------------------------------------------------------------------------------
+@contextmanager
+def search_phase(phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SEARCH_PHASE_LATENCY.observe(time.perf_counter() - start, phase=phase)
+
+
+# ------------------------------------------------------------------------------
+# FLASK + SQLALCHEMY HOOKS
+# ------------------------------------------------------------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts: return
+    elapsed = time.perf_counter() - starts.pop()
+    # Chỉ cộng dồn khi đang trong request (ETL/script thì bỏ qua)
+    if has_app_context() and "metrics_start" in g:
+        g.metrics_sql_count += 1
+        g.metrics_sql_seconds += elapsed
+
+
+def _handle_error(context):
+    # Câu lệnh lỗi không gọi after_cursor_execute -> bỏ mốc thời gian đã push
+    conn = context.connection
+    starts = conn.info.get("metrics_query_start") if conn is not None else None
+    if starts: starts.pop()
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_sql_count = 0
+    g.metrics_sql_seconds = 0.0
+
+
+def _after_request(response):
+    if "metrics_start" not in g: return response
+    elapsed = time.perf_counter() - g.metrics_start
+    rule = request.url_rule.rule if request.url_rule else "unmatched"
+    labels = {"blueprint": request.blueprint or "app", "route": rule, "method": request.method}
+    REQUEST_LATENCY.observe(elapsed, **labels)
+    REQUEST_COUNT.inc(status=response.status_code, **labels)
+    REQUEST_SQL_QUERIES.observe(g.metrics_sql_count, **labels)
+    REQUEST_SQL_SECONDS.observe(g.metrics_sql_seconds, **labels)
+    return response
+
+
+def init_metrics(app, db):
+    """Đăng ký middleware đo đạc + endpoint /api/metrics (gọi 1 lần trong app.py)."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    with app.app_context():
+        for engine in set(db.engines.values()):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+            event.listen(engine, "handle_error", _handle_error)
+    app.register_blueprint(metrics_bp)
+
+
+@metrics_bp.route("/api/metrics", methods=["GET"])
+def prometheus_metrics():
+    """
+    Metrics theo định dạng Prometheus text
+    ---
+    tags:
+      - Monitoring
+    parameters:
+      - in: header
+        name: X-Admin-Token
+        type: string
+        required: true
+        description: Phải khớp ADMIN_TOKEN của server (hoặc gửi Authorization Bearer)
+    responses:
+      200:
+        description: text/plain; version=0.0.4
+      403:
+        description: Sai/thiếu token hoặc server chưa đặt ADMIN_TOKEN
+    """
+    if not is_admin_request():
+        return jsonify({"message": "Forbidden"}), 403
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
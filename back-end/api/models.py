@@ -74,6 +74,16 @@ class Restaurant(db.Model):
 
     # Đã xóa cột ai_vibe và cuisine_origin để tránh conflict
 
+    # Index cho các bộ lọc của /api/search (bounding box, quận, rating, ngân sách)
+    # Thay đổi index/cột -> thêm revision mới trong migrations/versions
+    __table_args__ = (
+        db.Index("ix_restaurants_lat_lon", "latitude", "longitude"),
+        db.Index("ix_restaurants_district", "district"),
+        db.Index("ix_restaurants_rating", "rating"),
+        db.Index("ix_restaurants_minprice", "minprice"),
+        db.Index("ix_restaurants_maxprice", "maxprice"),
+    )
+
     def to_dict(self, lang='vi'):
         final_description = self.description
         if lang == 'en' and self.description_en:
@@ -114,6 +124,7 @@ class Favorite(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     place_id = db.Column(db.String(255), nullable=False)
 
+    # Unique (user_id, place_id) cũng là index cho truy vấn theo user_id
     __table_args__ = (
         db.UniqueConstraint("user_id", "place_id", name="_user_place_uc"),
     )
@@ -132,6 +143,12 @@ class RouteHistory(db.Model):
     total_duration = db.Column(db.Float, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index("ix_route_history_user_created", "user_id", "created_at"),
+        # Cache /api/optimize so khớp lower(start_point) = lower(:start)
+        db.Index("ix_route_history_start_point_lower", db.func.lower(db.text("start_point"))),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -156,6 +173,12 @@ class Review(db.Model):
 
     user = db.relationship("User", backref="reviews")
 
+    # Danh sách review theo quán / theo user, mới nhất trước
+    __table_args__ = (
+        db.Index("ix_review_place_created", "place_id", "created_at"),
+        db.Index("ix_review_user_created", "user_id", "created_at"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -0,0 +1,132 @@
+# api/query_expansion.py
+import re
+from functools import lru_cache
+from itertools import zip_longest
+import unidecode
+
+# ==============================================================================
+# MỞ RỘNG TỪ KHÓA TÌM KIẾM (QUERY EXPANSION)
+# ==============================================================================
+# Dựng 1 lần lúc import từ EXPANDED_SEARCH_MAP (restaurant_routes):
+#   - Trie theo TỪ (token) chứa cả 2 chiều:
+#       key tiếng Anh     "beef noodle" -> [beef noodle, bún bò, phở bò, ...]
+#       giá trị tiếng Việt "bún bò"      -> [bún bò, beef noodle]
+#   - Token được bỏ dấu + chuyển số ít -> "Bun Bo", "bún bò", "beef noodles" đều khớp
+#   - Giá trị tiếng Việt 1 âm tiết ("bún", "phở") chỉ mở rộng ngược khi nó là CẢ câu tìm:
+#     "bún chả" không được kéo theo noodle/soup (quá rộng), còn "phở" thì có
+# Khi tra: quét từ trái sang phải, tại mỗi vị trí lấy cụm DÀI NHẤT có trong trie
+# ("spicy beef noodle soup" -> "beef noodle" + "soup", không lấy thêm "noodle"/"beef").
+# Kết quả có thứ tự cố định, giới hạn max_terms (mỗi term = 3-4 điều kiện OR trong SQL)
+# và được cache LRU theo keyword.
+
+WORD_RE = re.compile(r"\w+")
+
+
+def singularize_english_word(word):
+    """
+    Chuyển danh từ số nhiều tiếng Anh về số ít dựa trên quy tắc ngữ pháp.
+    Input: "sandwiches", "fries", "noodles" -> Output: "sandwich", "fry", "noodle"
+    """
+    word = word.lower().strip()
+
+    # Case 0: Từ quá ngắn hoặc rỗng, không xử lý
+    if len(word) < 3:
+        return word
+
+    # Case 1: Kết thúc bằng 'ies' (VD: fries -> fry, cherries -> cherry)
+    # Quy tắc: Đổi 'ies' thành 'y'
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+
+    # Case 2: Kết thúc bằng 'es'
+    if word.endswith('es'):
+        # 2a. Các từ kết thúc bằng s, x, z, ch, sh + es (VD: sandwiches, boxes, dishes)
+        # Kiểm tra ký tự đứng trước 'es'
+        if word.endswith(('ses', 'xes', 'zes', 'ches', 'shes')):
+            return word[:-2] # Bỏ 'es'
+
+        # 2b. Các từ kết thúc bằng o + es (VD: potatoes -> potato, tomatoes -> tomato)
+        if word.endswith('oes'):
+            return word[:-2] # Bỏ 'es'
+
+        # Mặc định còn lại: cứ bỏ 's' (VD: miles -> mile, dù miles ko phải es nhưng logic chung)
+        # Nhưng an toàn nhất cho nhóm 'es' là cứ bỏ 's' nếu không khớp 2a, 2b (VD: cakes -> cake)
+
+    # Case 3: Kết thúc bằng 's' (nhưng không phải 'ss' như 'glass', 'bass')
+    if word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+
+    return word
+
+
+def tokenize(text):
+    """"Bánh Mì Sandwiches" -> ["banh", "mi", "sandwich"] (bỏ dấu, chữ thường, số ít)"""
+    plain = unidecode.unidecode(str(text)).lower()
+    return [singularize_english_word(token) for token in WORD_RE.findall(plain)]
+
+
+def _add_unique(items, values):
+    for value in values:
+        if value not in items:
+            items.append(value)
+
+
+class _Node:
+    __slots__ = ("children", "terms", "whole_terms")
+
+    def __init__(self):
+        self.children = {}
+        self.terms = []
+        self.whole_terms = []  # Chỉ dùng khi cụm khớp toàn bộ câu tìm
+
+
+class QueryExpander:
+    def __init__(self, phrase_map, max_terms=12, cache_size=1024):
+        self.max_terms = max_terms
+        self._root = _Node()
+        for key, values in phrase_map.items():
+            self._add(key, [key] + list(values))
+            for value in values:
+                self._add(value, [value, key], whole_only=len(tokenize(value)) == 1)
+        # Cache theo từng instance (không dùng @lru_cache trên method -> giữ self mãi)
+        self.expand = lru_cache(maxsize=cache_size)(self._expand)
+
+    def _add(self, phrase, terms, whole_only=False):
+        tokens = tokenize(phrase)
+        if not tokens: return
+        node = self._root
+        for token in tokens:
+            node = node.children.setdefault(token, _Node())
+        _add_unique(node.whole_terms if whole_only else node.terms, terms)
+
+    def match(self, text):
+        """Danh sách các cụm khớp (dài nhất tại mỗi vị trí, không chồng nhau), mỗi cụm = list term"""
+        tokens = tokenize(text)
+        matches = []
+        i = 0
+        while i < len(tokens):
+            node = self._root.children.get(tokens[i])
+            best, best_end = None, i + 1
+            j = i
+            while node is not None:
+                j += 1
+                terms = node.terms
+                if node.whole_terms and i == 0 and j == len(tokens):
+                    terms = list(terms)
+                    _add_unique(terms, node.whole_terms)
+                if terms:
+                    best, best_end = terms, j
+                node = node.children.get(tokens[j]) if j < len(tokens) else None
+            if best is not None:
+                matches.append(best)
+            i = best_end
+        return matches
+
+    def _expand(self, keyword):
+        """Tuple term: keyword gốc trước, sau đó xen kẽ term của từng cụm khớp"""
+        terms = [keyword]
+        matches = self.match(keyword)
+        # Xen kẽ: mỗi cụm đều góp term trước khi bị cắt bởi max_terms
+        for group in zip_longest(*matches):
+            _add_unique(terms, [t for t in group if t is not None])
+        return tuple(terms[:self.max_terms])
@@ -0,0 +1,234 @@
+# api/query_profiler.py
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import Blueprint, g, jsonify, request, has_app_context, has_request_context
+from sqlalchemy import event
+from admin_auth import is_admin_request
+
+# ==============================================================================
+# SLOW QUERY LOG + TỰ ĐỘNG EXPLAIN
+# ==============================================================================
+# Đo từng câu SQL (SQLAlchemy events). Câu nào chậm hơn ngưỡng SLOW_QUERY_MS:
+#   - Ghi vào ring buffer (deque có maxlen, mỗi worker gunicorn có buffer riêng)
+#   - Gom theo fingerprint (bỏ literal/tham số) để biết câu nào chậm nhiều lần
+#   - Lấy plan 1 lần cho mỗi fingerprint:
+#       Postgres: EXPLAIN (chỉ lập plan, KHÔNG ANALYZE -> không chạy lại câu chậm trong request)
+#       SQLite:   EXPLAIN QUERY PLAN
+# Xem tại GET /api/admin/slow-queries (header X-Admin-Token, bắt buộc đặt ADMIN_TOKEN)
+# Tham số của câu SQL KHÔNG được lưu (có thể chứa password hash, email...).
+
+profiler_bp = Blueprint('profiler_bp', __name__)
+
+MAX_STATEMENT_CHARS = 2000
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_statement(statement):
+    """Bỏ literal/tham số để các câu cùng dạng có chung fingerprint"""
+    text = _STRING_RE.sub("?", statement)
+    text = _PLACEHOLDER_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("(?...)", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def fingerprint(statement):
+    return hashlib.sha1(normalize_statement(statement).encode("utf-8")).hexdigest()[:12]
+
+
+def _is_explainable(statement):
+    head = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    # Chỉ SELECT: plan của câu ghi/DDL ít giá trị, và không muốn đụng tới câu ghi
+    return head in ("SELECT", "WITH") and not re.search(r"\b(INSERT|UPDATE|DELETE)\b", statement, re.I)
+
+
+def _format_sqlite_plan(rows):
+    """Rows (id, parent, notused, detail) -> cây thụt lề giống sqlite3 CLI"""
+    depth = {0: -1}
+    lines = []
+    for row in rows:
+        node_id, parent, detail = row[0], row[1], row[-1]
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + str(detail))
+    return "\n".join(lines)
+
+
+def explain(cursor, dialect, statement, parameters):
+    """Chạy EXPLAIN trên chính connection DBAPI (cursor mới -> không kích hoạt lại events)"""
+    explain_cursor = cursor.connection.cursor()
+    try:
+        if dialect == "postgresql":
+            # Lỗi trong EXPLAIN không được làm hỏng transaction của request
+            explain_cursor.execute("SAVEPOINT query_profiler_explain")
+            try:
+                explain_cursor.execute("EXPLAIN " + statement, parameters)
+                plan = "\n".join(row[0] for row in explain_cursor.fetchall())
+            except Exception:
+                explain_cursor.execute("ROLLBACK TO SAVEPOINT query_profiler_explain")
+                raise
+            explain_cursor.execute("RELEASE SAVEPOINT query_profiler_explain")
+            return plan
+        if dialect == "sqlite":
+            explain_cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            return _format_sqlite_plan(explain_cursor.fetchall())
+        return None
+    finally:
+        explain_cursor.close()
+
+
+def current_route():
+    """Nhãn "METHOD /rule" của request hiện tại; trong run_blocking lấy nhãn request truyền sang qua g"""
+    if has_request_context():
+        return f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+    if has_app_context():
+        return g.get("query_route")
+    return None
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms=200, capacity=200, explain=True, max_fingerprints=500):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.max_fingerprints = max_fingerprints
+        self._entries = deque(maxlen=capacity)
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def record(self, statement, elapsed_ms, route=None):
+        """Ghi 1 câu chậm. Trả về fingerprint nếu còn cần lấy plan, ngược lại None"""
+        fp = fingerprint(statement)
+        with self._lock:
+            self._entries.append({
+                "at": datetime.now().isoformat(timespec="seconds"),
+                "fingerprint": fp,
+                "duration_ms": round(elapsed_ms, 2),
+                "route": route,
+            })
+            stats = self._fingerprints.get(fp)
+            if stats is None:
+                if len(self._fingerprints) >= self.max_fingerprints:
+                    return None
+                stats = self._fingerprints[fp] = {
+                    "fingerprint": fp,
+                    "statement": normalize_statement(statement)[:MAX_STATEMENT_CHARS],
+                    "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "routes": [], "plan": None, "plan_error": None, "explained": False,
+                }
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            if route and route not in stats["routes"]:
+                stats["routes"].append(route)
+            if not self.explain or stats["explained"]:
+                return None
+            stats["explained"] = True  # Đánh dấu trước khi EXPLAIN: thread khác không chạy trùng
+            return fp
+
+    def set_plan(self, fp, plan=None, error=None):
+        with self._lock:
+            stats = self._fingerprints.get(fp)
+            if stats is not None:
+                stats["plan"] = plan
+                stats["plan_error"] = error
+
+    def snapshot(self):
+        with self._lock:
+            fingerprints = sorted(
+                ({**s, "total_ms": round(s["total_ms"], 2), "max_ms": round(s["max_ms"], 2),
+                  "routes": list(s["routes"])} for s in self._fingerprints.values()),
+                key=lambda s: s["total_ms"], reverse=True,
+            )
+            return {
+                "threshold_ms": self.threshold_ms,
+                "capacity": self._entries.maxlen,
+                "recent": list(reversed(self._entries)),
+                "fingerprints": fingerprints,
+            }
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+
+    # --------------------------------------------------------------------------
+    # SQLALCHEMY HOOKS
+    # --------------------------------------------------------------------------
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profiler_query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("profiler_query_start")
+        if not starts: return
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if self.threshold_ms < 0 or elapsed_ms < self.threshold_ms: return
+
+        fp = self.record(statement, elapsed_ms, current_route())
+        if fp is None or executemany or not _is_explainable(statement): return
+        try:
+            self.set_plan(fp, plan=explain(cursor, conn.dialect.name, statement, parameters))
+        except Exception as e:
+            self.set_plan(fp, error=str(e)[:500])
+
+    def handle_error(self, context):
+        # Câu lệnh lỗi không gọi after_cursor_execute -> bỏ mốc thời gian đã push
+        conn = context.connection
+        starts = conn.info.get("profiler_query_start") if conn is not None else None
+        if starts: starts.pop()
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+        event.listen(engine, "handle_error", self.handle_error)
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.getenv("SLOW_QUERY_MS", 200)),
+    capacity=int(os.getenv("SLOW_QUERY_BUFFER", 200)),
+    explain=os.getenv("SLOW_QUERY_EXPLAIN", "1") == "1",
+)
+
+
+def init_query_profiler(app, db):
+    """Gắn slow query log vào mọi engine + đăng ký /api/admin/slow-queries (gọi 1 lần trong app.py)."""
+    app.config.setdefault('ADMIN_TOKEN', os.environ.get('ADMIN_TOKEN', ""))
+    with app.app_context():
+        for engine in set(db.engines.values()):
+            slow_query_log.attach(engine)
+    app.register_blueprint(profiler_bp)
+
+
+@profiler_bp.route("/api/admin/slow-queries", methods=["GET", "DELETE"])
+def slow_queries():
+    """
+    Danh sách câu SQL chậm (ring buffer) + plan theo fingerprint
+    ---
+    tags:
+      - Monitoring
+    parameters:
+      - in: header
+        name: X-Admin-Token
+        type: string
+        required: true
+        description: Phải khớp ADMIN_TOKEN của server (chưa đặt ADMIN_TOKEN -> luôn 403)
+    responses:
+      200:
+        description: GET trả về threshold_ms, recent[], fingerprints[] (sắp theo total_ms); DELETE xoá buffer
+      403:
+        description: Sai/thiếu X-Admin-Token hoặc server chưa đặt ADMIN_TOKEN
+    """
+    if not is_admin_request():
+        return jsonify({"message": "Forbidden"}), 403
+    if request.method == "DELETE":
+        slow_query_log.reset()
+        return jsonify({"message": "Đã xoá slow query log"}), 200
+    return jsonify(slow_query_log.snapshot()), 200
@@ -1,5 +1,4 @@
 import math
-import requests
 import unidecode 
 from flask import Blueprint, request, jsonify, current_app
 from models import Restaurant, db
@@ -7,12 +6,16 @@ from sqlalchemy import or_, func, text
 from recommendation_service import RecommendationService
 from datetime import datetime
 from weather_service import get_weather_helper
+from goong_client import goong
+from metrics import search_phase
+from query_expansion import QueryExpander, singularize_english_word  # noqa: F401 (giữ import cũ)
 
 restaurant_bp = Blueprint("restaurant_bp", __name__)
 rec_service = RecommendationService()
 
 LIMIT_RESULTS = 50        
 CANDIDATE_POOL_SIZE = 500 
+MAX_SEARCH_TERMS = 12     # Mỗi term = 3-4 điều kiện ILIKE trong câu SQL
 
 # ==============================================================================
 # TỪ ĐIỂN ÁNH XẠ MỞ RỘNG (SMART MAPPING)
@@ -75,82 +78,19 @@ EXPANDED_SEARCH_MAP = {
     "dinner": ["ăn tối"]
 }
 
-# ==============================================================================
-# 2. HELPER: XỬ LÝ NGỮ PHÁP TIẾNG ANH (Robust Singularization)
-# ==============================================================================
-def singularize_english_word(word):
-    """
-    Chuyển danh từ số nhiều tiếng Anh về số ít dựa trên quy tắc ngữ pháp.
-    Input: "sandwiches", "fries", "noodles" -> Output: "sandwich", "fry", "noodle"
-    """
-    word = word.lower().strip()
-    
-    # Case 0: Từ quá ngắn hoặc rỗng, không xử lý
-    if len(word) < 3:
-        return word
-
-    # Case 1: Kết thúc bằng 'ies' (VD: fries -> fry, cherries -> cherry)
-    # Quy tắc: Đổi 'ies' thành 'y'
-    if word.endswith('ies'):
-        return word[:-3] + 'y'
-
-    # Case 2: Kết thúc bằng 'es'
-    if word.endswith('es'):
-        # 2a. Các từ kết thúc bằng s, x, z, ch, sh + es (VD: sandwiches, boxes, dishes)
-        # Kiểm tra ký tự đứng trước 'es'
-        if word.endswith(('ses', 'xes', 'zes', 'ches', 'shes')):
-            return word[:-2] # Bỏ 'es'
-        
-        # 2b. Các từ kết thúc bằng o + es (VD: potatoes -> potato, tomatoes -> tomato)
-        if word.endswith('oes'):
-            return word[:-2] # Bỏ 'es'
-
-        # Mặc định còn lại: cứ bỏ 's' (VD: miles -> mile, dù miles ko phải es nhưng logic chung)
-        # Nhưng an toàn nhất cho nhóm 'es' là cứ bỏ 's' nếu không khớp 2a, 2b (VD: cakes -> cake)
-
-    # Case 3: Kết thúc bằng 's' (nhưng không phải 'ss' như 'glass', 'bass')
-    if word.endswith('s') and not word.endswith('ss'):
-        return word[:-1]
-
-    return word
+# Trie cụm từ dựng 1 lần lúc import (xem query_expansion.py)
+QUERY_EXPANDER = QueryExpander(EXPANDED_SEARCH_MAP, max_terms=MAX_SEARCH_TERMS)
 
 # ==============================================================================
-# 3. MAIN LOGIC: TÌM KIẾM THÔNG MINH
+# 2. MAIN LOGIC: TÌM KIẾM THÔNG MINH
 # ==============================================================================
 def generate_search_terms(keyword):
     """
-    Tự động map từ khóa, hỗ trợ xử lý ngữ pháp tiếng Anh.
+    Tự động map từ khóa (Anh <-> Việt, có/không dấu, số nhiều/số ít).
+    Trả về tối đa MAX_SEARCH_TERMS term, keyword gốc luôn đứng đầu.
     """
     if not keyword: return []
-    
-    # Dùng Set để tự động loại bỏ trùng lặp
-    terms = {keyword} 
-    
-    # 1. Chuẩn hóa về số ít (Singularize)
-    # VD: "Sandwiches" -> "sandwich"
-    # VD: "Fries" -> "fry"
-    # VD: "Noodles" -> "noodle"
-    clean_key = singularize_english_word(keyword)
-
-    # 2. Tra cứu trực tiếp (Exact Match với từ đã chuẩn hóa)
-    if clean_key in EXPANDED_SEARCH_MAP:
-        terms.update(EXPANDED_SEARCH_MAP[clean_key])
-    
-    # 3. Fallback: Tra cứu từng phần (Partial Match)
-    # Chỉ chạy khi không tìm thấy match chính xác
-    else:
-        for key, values in EXPANDED_SEARCH_MAP.items():
-            # Logic: Nếu từ điển là "noodle" và user nhập "spicy noodles"
-            # -> clean_key của user vẫn chứa "noodle" (do logic tách từ phức tạp hơn, 
-            # nhưng ở đây ta check simple containment)
-            
-            # Kiểm tra 2 chiều an toàn:
-            # - Key nằm trong từ khóa user (VD: user="beef noodle soup" -> key="beef noodle")
-            # - Từ khóa user (đã chuẩn hóa) nằm trong key (ít gặp nhưng đề phòng)
-            if (key in clean_key or clean_key in key) and len(key) > 2:
-                terms.update(values)
-
-    return list(terms)
+    return list(QUERY_EXPANDER.expand(keyword))
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     try:
@@ -167,11 +107,10 @@ def get_coords_from_goong(address_query):
         api_key = current_app.config.get('GOONG_API_KEY')
         if not api_key: return None
         full_query = f"{address_query}, Hồ Chí Minh, Việt Nam"
-        base_url = "https://rsapi.goong.io/Geocode"
-        params = {"address": full_query, "api_key": api_key}
-        response = requests.get(base_url, params=params, timeout=3)
-        if response.status_code == 200 and response.json().get("results"):
-            location = response.json()["results"][0]["geometry"]["location"]
+        # Timeout ngắn vì nằm trên đường đi của /api/search
+        data = goong.get("Geocode", {"address": full_query}, api_key=api_key, timeout=3, retries=1)
+        if data.get("results"):
+            location = data["results"][0]["geometry"]["location"]
             return location["lat"], location["lng"]
     except: pass
     return None
@@ -268,12 +207,13 @@ def search_restaurants():
         # [MỚI] 2. LẤY THÔNG TIN THỜI TIẾT
         # ======================================================================
         # Mặc định lấy HCM, sau này có thể lấy theo GPS user nếu cần
-        weather_info = get_weather_helper("Ho Chi Minh City")
-        weather_desc = ""
-        weather_temp = 30
-        if weather_info:
-            weather_desc = weather_info.get('desc', '').lower()
-            weather_temp = weather_info.get('temp', 30)
+        with search_phase("weather"):
+            weather_info = get_weather_helper("Ho Chi Minh City")
+            weather_desc = ""
+            weather_temp = 30
+            if weather_info:
+                weather_desc = weather_info.get('desc', '').lower()
+                weather_temp = weather_info.get('temp', 30)
 
         # ======================================================================
         # 3. XÂY DỰNG QUERY (Code cũ - Giữ nguyên logic lọc phức tạp)
@@ -303,22 +243,23 @@ def search_restaurants():
         if rating_min: query = query.filter(Restaurant.rating >= rating_min)
 
         # --- Geo Filtering (Bounding Box) ---
-        center_coords = None # Init variable
-        if districts and radius_km:
-            target_district = districts[0]
-            center_coords = get_coords_from_goong(target_district)
-            if center_coords:
-                center_lat, center_lon = center_coords
-                lat_degree = radius_km / 111.0
-                lon_degree = radius_km / (111.0 * math.cos(math.radians(center_lat)))
-                query = query.filter(
-                    Restaurant.latitude.between(center_lat - lat_degree, center_lat + lat_degree),
-                    Restaurant.longitude.between(center_lon - lon_degree, center_lon + lon_degree)
-                )
-            else:
+        with search_phase("geocode"):
+            center_coords = None # Init variable
+            if districts and radius_km:
+                target_district = districts[0]
+                center_coords = get_coords_from_goong(target_district)
+                if center_coords:
+                    center_lat, center_lon = center_coords
+                    lat_degree = radius_km / 111.0
+                    lon_degree = radius_km / (111.0 * math.cos(math.radians(center_lat)))
+                    query = query.filter(
+                        Restaurant.latitude.between(center_lat - lat_degree, center_lat + lat_degree),
+                        Restaurant.longitude.between(center_lon - lon_degree, center_lon + lon_degree)
+                    )
+                else:
+                    query = query.filter(Restaurant.district.in_(districts))
+            elif districts:
                 query = query.filter(Restaurant.district.in_(districts))
-        elif districts:
-            query = query.filter(Restaurant.district.in_(districts))
 
         # --- Smart Search (Unaccent logic) ---
         if raw_keyword:
@@ -348,18 +289,20 @@ def search_restaurants():
         # ======================================================================
         # 4. THỰC THI QUERY & LỌC KHOẢNG CÁCH
         # ======================================================================
-        candidates = query.limit(CANDIDATE_POOL_SIZE).all()
+        with search_phase("query"):
+            candidates = query.limit(CANDIDATE_POOL_SIZE).all()
 
         # Lọc chính xác bằng Haversine (Geo Loop cũ)
-        if districts and radius_km and center_coords:
-            center_lat, center_lon = center_coords
-            filtered_candidates = []
-            for r in candidates:
-                if r.latitude and r.longitude:
-                    dist = haversine_distance(center_lat, center_lon, r.latitude, r.longitude)
-                    if dist <= radius_km:
-                        filtered_candidates.append(r)
-            candidates = filtered_candidates
+        with search_phase("geo_filter"):
+            if districts and radius_km and center_coords:
+                center_lat, center_lon = center_coords
+                filtered_candidates = []
+                for r in candidates:
+                    if r.latitude and r.longitude:
+                        dist = haversine_distance(center_lat, center_lon, r.latitude, r.longitude)
+                        if dist <= radius_km:
+                            filtered_candidates.append(r)
+                candidates = filtered_candidates
 
         # ======================================================================
         # [MODIFIED] 5. TÍNH ĐIỂM & MERGE LOGIC MỚI
@@ -375,53 +318,54 @@ def search_restaurants():
             'courseType': courseType
         }
 
-        scored_results = []
-        for r in candidates:
-            # 5.1 Tính khoảng cách cho từng quán
-            current_dist = None
-            if districts and radius_km and center_coords:
-                 if r.latitude and r.longitude:
-                      current_dist = haversine_distance(center_lat, center_lon, r.latitude, r.longitude)
+        with search_phase("scoring"):
+            scored_results = []
+            for r in candidates:
+                # 5.1 Tính khoảng cách cho từng quán
+                current_dist = None
+                if districts and radius_km and center_coords:
+                     if r.latitude and r.longitude:
+                          current_dist = haversine_distance(center_lat, center_lon, r.latitude, r.longitude)
             
-            # 5.2 Chuẩn bị prefs
-            current_prefs = user_prefs.copy()
-            current_prefs['distance_km'] = current_dist
-            current_prefs['max_radius'] = radius_km
+                # 5.2 Chuẩn bị prefs
+                current_prefs = user_prefs.copy()
+                current_prefs['distance_km'] = current_dist
+                current_prefs['max_radius'] = radius_km
 
-            # 5.3 Tính điểm cơ bản (Base Score)
-            base_score = rec_service.calculate_final_score(r, user_type, current_prefs)
+                # 5.3 Tính điểm cơ bản (Base Score)
+                base_score = rec_service.calculate_final_score(r, user_type, current_prefs)
             
-            # -----------------------------------------------------------
-            # [MỚI] TÍNH ĐIỂM CỘNG THỜI TIẾT (WEATHER BONUS)
-            # -----------------------------------------------------------
-            weather_bonus = 0
-            # Ghép chuỗi thông tin để tìm từ khóa món ăn
-            r_full_text = f"{r.name or ''} {r.category or ''} {r.description or ''} {r.subtypes or ''}".lower()
-
-            # Logic: Mưa/Lạnh -> Ăn đồ nóng/cay/lẩu/nướng
-            if "mưa" in weather_desc or "rain" in weather_desc or weather_temp < 25:
-                if any(x in r_full_text for x in ['lẩu', 'nướng', 'cay', 'nóng', 'phở', 'bún', 'ramen']):
-                    weather_bonus = 5 
+                # -----------------------------------------------------------
+                # [MỚI] TÍNH ĐIỂM CỘNG THỜI TIẾT (WEATHER BONUS)
+                # -----------------------------------------------------------
+                weather_bonus = 0
+                # Ghép chuỗi thông tin để tìm từ khóa món ăn
+                r_full_text = f"{r.name or ''} {r.category or ''} {r.description or ''} {r.subtypes or ''}".lower()
+
+                # Logic: Mưa/Lạnh -> Ăn đồ nóng/cay/lẩu/nướng
+                if "mưa" in weather_desc or "rain" in weather_desc or weather_temp < 25:
+                    if any(x in r_full_text for x in ['lẩu', 'nướng', 'cay', 'nóng', 'phở', 'bún', 'ramen']):
+                        weather_bonus = 5 
             
-            # Logic: Nắng nóng -> Ăn đồ mát/kem/trà sữa
-            elif weather_temp > 32:
-                if any(x in r_full_text for x in ['kem', 'trà sữa', 'bia', 'gỏi', 'cuốn', 'mát', 'sinh tố']):
-                    weather_bonus = 5
+                # Logic: Nắng nóng -> Ăn đồ mát/kem/trà sữa
+                elif weather_temp > 32:
+                    if any(x in r_full_text for x in ['kem', 'trà sữa', 'bia', 'gỏi', 'cuốn', 'mát', 'sinh tố']):
+                        weather_bonus = 5
 
-            final_score = base_score + weather_bonus
+                final_score = base_score + weather_bonus
 
-            if final_score > 0:
-                # 5.4 Chuyển sang Dict & Thêm thông tin
-                r_dict = r.to_dict(lang=current_lang)
+                if final_score > 0:
+                    # 5.4 Chuyển sang Dict & Thêm thông tin
+                    r_dict = r.to_dict(lang=current_lang)
                 
-                # [MỚI] Check giờ mở cửa
-                is_active = check_is_open(r.working_hour)
-                r_dict['is_open'] = is_active
+                    # [MỚI] Check giờ mở cửa
+                    is_active = check_is_open(r.working_hour)
+                    r_dict['is_open'] = is_active
                 
-                r_dict['match_score'] = final_score
-                r_dict['distance_km'] = round(current_dist, 2) if current_dist is not None else None
+                    r_dict['match_score'] = final_score
+                    r_dict['distance_km'] = round(current_dist, 2) if current_dist is not None else None
                 
-                scored_results.append(r_dict)
+                    scored_results.append(r_dict)
 
         # ======================================================================
         # [MODIFIED] 6. SẮP XẾP (SORTING)
@@ -429,7 +373,8 @@ def search_restaurants():
         # Sort 2 cấp độ:
         # 1. is_open (True trước, False sau)
         # 2. match_score (Cao trước, Thấp sau)
-        scored_results.sort(key=lambda x: (x['is_open'], x['match_score']), reverse=True)
+        with search_phase("sort"):
+            scored_results.sort(key=lambda x: (x['is_open'], x['match_score']), reverse=True)
 
         # ======================================================================
         # [MODIFIED] 7. TRẢ VỀ KẾT QUẢ
@@ -1,22 +1,24 @@
 # api/weather_service.py
 from flask import Blueprint, request, jsonify, current_app
-import requests
+from async_runtime import runtime, get_async_client
 
 # Tạo Blueprint
 weather_bp = Blueprint('weather_bp', __name__)
 
-def get_weather_helper(city_name):
-    """Hàm hỗ trợ gọi API OpenWeather"""
+async def get_weather_async(city_name):
+    """Hàm hỗ trợ gọi API OpenWeather (async, dùng client chung)"""
     api_key = current_app.config.get('OPEN_WEATHER_API_KEY')
     
     if not api_key:
         print("❌ LỖI: Chưa cấu hình OPEN_WEATHER_API_KEY")
         return None
 
-    url = f"http://api.openweathermap.org/data/2.5/weather?q={city_name}&appid={api_key}&units=metric&lang=vi"
+    base_url = current_app.config.get('OPEN_WEATHER_BASE_URL') or "http://api.openweathermap.org"
+    url = f"{base_url.rstrip('/')}/data/2.5/weather"
+    params = {"q": city_name, "appid": api_key, "units": "metric", "lang": "vi"}
     
     try:
-        response = requests.get(url, timeout=5)
+        response = await get_async_client().get(url, params=params, timeout=5)
         if response.status_code == 200:
             data = response.json()
             return {
@@ -32,8 +34,12 @@ def get_weather_helper(city_name):
         print(f"Weather Connection Error: {e}")
         return None
 
+def get_weather_helper(city_name):
+    """Bản sync cho các route sync (VD: /api/search)"""
+    return runtime.run(get_weather_async(city_name))
+
 @weather_bp.route("/api/weather/current", methods=["GET"])
-def get_current_weather():
+async def get_current_weather():
     """
     Lấy thông tin thời tiết hiện tại theo tên thành phố
     ---
@@ -68,7 +74,7 @@ def get_current_weather():
     city_param = request.args.get('city', 'Ho Chi Minh City')
     
     try:
-        data = get_weather_helper(city_param)
+        data = await get_weather_async(city_param)
         if data:
             return jsonify(data)
         return jsonify({"error": "Không thể lấy dữ liệu thời tiết"}), 404
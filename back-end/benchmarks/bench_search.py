@@ -0,0 +1,147 @@
+# benchmarks/bench_search.py
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# ==============================================================================
+# BENCHMARK END-TO-END CHO /api/search
+# ==============================================================================
+# VD:  python benchmarks/bench_search.py --rows 100000
+#      python benchmarks/bench_search.py --db benchmarks/catalog_1000000.db --iterations 50 --json out.json
+#
+# - Dùng catalog giả lập (generate_catalog.py), tự sinh nếu chưa có file
+# - Gọi /api/search qua Flask test client (không qua mạng, không cần server)
+# - Thời tiết & geocode được thay bằng hàm giả (không gọi OpenWeather/Goong)
+# - Mỗi kịch bản: chạy warmup, đo độ trễ p50/p95/p99, rồi chạy thêm vài lần
+#   dưới tracemalloc để đo bộ nhớ cấp phát (peak) mỗi request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from generate_catalog import DISTRICTS, generate_catalog  # noqa: E402
+from stats import percentile  # noqa: E402
+
+SCENARIOS = {
+    "no_filter": {},
+    "keyword_vi": {"keyword": "phở"},
+    "keyword_en": {"keyword": "beef noodle"},
+    "cuisines": {"cuisine": ["japan", "korea"]},
+    "vibes": {"vibe": ["chill", "romantic"]},
+    "radius": {"district": "Quận 1", "radius": 2},
+    "budget": {"minPrice": 50000, "maxPrice": 150000, "userType": "saver"},
+    "combined": {"keyword": "coffee", "district": "Quận 3", "radius": 3, "vibe": "chill", "maxPrice": 100000},
+}
+
+FAKE_WEATHER = {"city": "Ho Chi Minh City", "temp": 31, "desc": "mây rải rác", "humidity": 70}
+DISTRICT_CENTERS = {name: (lat, lon) for name, lat, lon, _ in DISTRICTS}
+
+
+def load_app(db_path):
+    """Import app SAU khi trỏ DATABASE_URL vào catalog giả lập, rồi gắn hàm giả"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(db_path)}"
+    from app import app
+    import restaurant_routes
+
+    restaurant_routes.get_weather_helper = lambda city: dict(FAKE_WEATHER)
+    restaurant_routes.get_coords_from_goong = lambda query: DISTRICT_CENTERS.get(query)
+    app.config["TESTING"] = True
+    return app
+
+
+def run_scenario(client, params, iterations, warmup, alloc_iterations):
+    for _ in range(warmup):
+        client.get("/api/search", query_string=params)
+
+    timings = []
+    results = None
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = client.get("/api/search", query_string=params)
+        timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/search trả về {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        results = len(response.get_json()["results"])
+    timings.sort()
+
+    # Đo riêng vì tracemalloc làm chậm request đáng kể
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            client.get("/api/search", query_string=params)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+
+    return {
+        "results": results,
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "mean_ms": round(sum(timings) / len(timings), 2),
+        "peak_alloc_kib": round(percentile(peaks, 50) / 1024, 1) if peaks else None,
+    }
+
+
+def print_report(rows, report):
+    print("\n" + "=" * 86)
+    print(f"/api/search trên {rows} nhà hàng")
+    print(f"{'Kịch bản':<14}{'KQ':>6}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}{'peak KiB':>12}")
+    print("-" * 86)
+    for name, m in report.items():
+        print(
+            f"{name:<14}{m['results']:>6}{m['p50_ms']:>12}{m['p95_ms']:>12}{m['p99_ms']:>12}"
+            f"{m['mean_ms']:>12}{m['peak_alloc_kib'] if m['peak_alloc_kib'] is not None else '-':>12}"
+        )
+    print("=" * 86)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark /api/search trên catalog giả lập")
+    parser.add_argument("--rows", type=int, default=10000, help="Số nhà hàng nếu phải sinh catalog")
+    parser.add_argument("--db", default=None, help="File catalog (mặc định benchmarks/catalog_<rows>.db)")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--alloc-iterations", type=int, default=3, help="Số lần chạy dưới tracemalloc (0 = bỏ qua)")
+    parser.add_argument("--scenarios", help="Danh sách kịch bản, phân cách bởi dấu phẩy")
+    parser.add_argument("--json", dest="json_path", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(BENCH_DIR, f"catalog_{args.rows}.db")
+    if not os.path.exists(db_path):
+        print(f"📦 Chưa có catalog, đang sinh {args.rows} nhà hàng -> {db_path}...")
+        generate_catalog(db_path, args.rows)
+
+    names = [n.strip() for n in args.scenarios.split(",")] if args.scenarios else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"❌ Kịch bản không tồn tại: {', '.join(unknown)} (có: {', '.join(SCENARIOS)})")
+
+    app = load_app(db_path)
+    with app.app_context():
+        from models import Restaurant
+        rows = Restaurant.query.count()
+
+    report = {}
+    with app.test_client() as client:
+        for name in names:
+            print(f"▶️  {name}...")
+            report[name] = run_scenario(client, SCENARIOS[name], args.iterations, args.warmup, args.alloc_iterations)
+
+    print_report(rows, report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "scenarios": report}, f, ensure_ascii=False, indent=2)
+        print(f"💾 Đã ghi {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
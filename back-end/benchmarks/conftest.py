@@ -0,0 +1,113 @@
+# benchmarks/conftest.py
+import gc
+import json
+import os
+import platform
+import statistics
+import time
+from datetime import datetime
+import pytest
+
+# ==============================================================================
+# FIXTURE `benchmark` CHO MICRO-BENCHMARK (KIỂU pytest-benchmark, KHÔNG CẦN CÀI THÊM)
+# ==============================================================================
+#   python -m pytest benchmarks/                       -> chỉ chạy mỗi hàm 1 lần (kiểm tra đúng/sai)
+#   BENCH_CHECK=1 python -m pytest benchmarks/ -s      -> đo & so với baselines.json,
+#                                                         chậm hơn BENCH_THRESHOLD (mặc định 25%) -> FAIL
+#   BENCH_SAVE=1 python -m pytest benchmarks/ -s       -> đo & ghi kết quả làm baseline mới
+#
+# Baseline phụ thuộc máy: tạo lại (BENCH_SAVE=1) khi đổi máy chạy CI.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+CHECK = os.getenv("BENCH_CHECK") == "1"
+SAVE = os.getenv("BENCH_SAVE") == "1"
+THRESHOLD = float(os.getenv("BENCH_THRESHOLD", 0.25))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", 15))
+MIN_ROUND_SECONDS = 0.02  # Mỗi round chạy lặp đủ lâu để perf_counter đo chính xác
+
+RESULTS = {}
+
+
+def load_baselines():
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        return json.load(f).get("benchmarks", {})
+
+
+def measure(func, args, kwargs):
+    """Trả về list thời gian 1 lần gọi (giây) của từng round"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops): func(*args, **kwargs)
+        if time.perf_counter() - started >= MIN_ROUND_SECONDS or loops >= 1_000_000:
+            break
+        loops *= 2
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()  # Giống timeit: GC không chen vào kết quả đo
+    try:
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            for _ in range(loops): func(*args, **kwargs)
+            samples.append((time.perf_counter() - started) / loops)
+    finally:
+        if gc_was_enabled: gc.enable()
+    return samples, loops
+
+
+@pytest.fixture
+def benchmark(request):
+    name = request.node.name
+
+    def run(func, *args, **kwargs):
+        result = func(*args, **kwargs)  # Chạy nóng + trả kết quả cho test kiểm tra
+        if not (CHECK or SAVE):
+            return result
+
+        samples, loops = measure(func, args, kwargs)
+        # So sánh theo min: ít bị nhiễu bởi tiến trình khác nhất (median chỉ để tham khảo)
+        min_us = min(samples) * 1e6
+        RESULTS[name] = {
+            "min_us": round(min_us, 3),
+            "median_us": round(statistics.median(samples) * 1e6, 3),
+            "loops": loops,
+            "rounds": ROUNDS,
+        }
+
+        baseline = load_baselines().get(name)
+        if baseline:
+            change = min_us / baseline["min_us"] - 1
+            if CHECK and change > THRESHOLD:
+                # Đo lại 1 lần trước khi báo lỗi (máy bị tiến trình khác chiếm CPU trong chốc lát)
+                retry_samples, _ = measure(func, args, kwargs)
+                min_us = min(min_us, min(retry_samples) * 1e6)
+                change = min_us / baseline["min_us"] - 1
+            print(f"\n⏱  {name}: {min_us:.2f}µs (baseline {baseline['min_us']:.2f}µs, {change:+.1%})")
+            if CHECK and change > THRESHOLD:
+                pytest.fail(
+                    f"{name} chậm hơn baseline {change:.1%} (> {THRESHOLD:.0%}): "
+                    f"{min_us:.2f}µs so với {baseline['min_us']:.2f}µs"
+                )
+        else:
+            print(f"\n⏱  {name}: {min_us:.2f}µs (chưa có baseline)")
+        return result
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not (SAVE and RESULTS):
+        return
+    # Giữ baseline của các benchmark không chạy lần này (VD chạy lọc bằng -k)
+    benchmarks = {**load_baselines(), **RESULTS}
+    payload = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine()},
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+        "benchmarks": dict(sorted(benchmarks.items())),
+    }
+    with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+        f.write("\n")
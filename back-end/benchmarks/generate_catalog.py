@@ -0,0 +1,147 @@
+# benchmarks/generate_catalog.py
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from sqlalchemy import create_engine
+
+# ==============================================================================
+# SINH CATALOG NHÀ HÀNG GIẢ LẬP (10K -> 1M DÒNG) ĐỂ ĐO HIỆU NĂNG
+# ==============================================================================
+# VD:  python benchmarks/generate_catalog.py --rows 100000 --out benchmarks/catalog_100k.db
+#
+# - Bảng tạo từ chính model Restaurant (đúng tên cột như DB thật)
+# - Tọa độ rải quanh tâm các quận TP.HCM (quận trung tâm dày hơn)
+# - Tên quán tiếng Việt ghép từ tiền tố + món + tên riêng, subtypes/giờ mở cửa/
+#   khoảng giá giống dữ liệu sau bước ETL
+# - Cùng --seed -> cùng dữ liệu (so sánh được giữa các lần đo)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "api"))
+
+from models import Restaurant  # noqa: E402
+
+# (tên quận, lat, lon, trọng số mật độ quán)
+DISTRICTS = [
+    ("Quận 1", 10.7769, 106.7009, 10), ("Quận 3", 10.7843, 106.6844, 8),
+    ("Quận 4", 10.7579, 106.7040, 3), ("Quận 5", 10.7540, 106.6634, 6),
+    ("Quận 7", 10.7340, 106.7216, 5), ("Quận 10", 10.7729, 106.6680, 5),
+    ("Bình Thạnh", 10.8106, 106.7091, 6), ("Phú Nhuận", 10.7991, 106.6803, 5),
+    ("Gò Vấp", 10.8387, 106.6653, 4), ("Tân Bình", 10.8015, 106.6527, 4),
+    ("Thủ Đức", 10.8494, 106.7537, 4), ("Bình Tân", 10.7653, 106.6039, 2),
+]
+
+# (món, cuisine, loại món, đồ ăn/uống, vị)
+# Từ vựng giống bước ETL (3_clean_transform):
+#   map_beverage_or_food -> "khô" (đồ ăn, kể cả món nước như phở), "nước" (đồ uống), "cả 2"
+#   map_course_type      -> đồ uống luôn là "đồ uống"; còn lại món chính / món khai vị / tráng miệng
+DISHES = [
+    ("Phở Bò", "Việt Nam", "món chính", "khô", ["mặn"]),
+    ("Bún Bò Huế", "Việt Nam", "món chính", "khô", ["cay", "mặn"]),
+    ("Bún Chả", "Việt Nam", "món chính", "khô", ["mặn", "ngọt"]),
+    ("Cơm Tấm", "Việt Nam", "món chính", "khô", ["mặn"]),
+    ("Bánh Mì", "Việt Nam", "món chính", "khô", ["mặn"]),
+    ("Hủ Tiếu Nam Vang", "Việt Nam", "món chính", "khô", ["mặn"]),
+    ("Bánh Xèo", "Việt Nam", "món chính", "khô", ["béo"]),
+    ("Ốc", "Việt Nam", "món khai vị", "khô", ["cay", "mặn"]),
+    ("Lẩu Thái", "Thái Lan", "món chính", "khô", ["cay", "chua"]),
+    ("Sushi", "Nhật Bản", "món chính", "khô", ["mặn"]),
+    ("Ramen", "Nhật Bản", "món chính", "khô", ["mặn", "béo"]),
+    ("Gà Rán", "Âu/Mỹ", "món chính", "khô", ["béo", "mặn"]),
+    ("Pizza", "Âu/Mỹ", "món chính", "khô", ["béo"]),
+    ("Nướng Hàn Quốc", "Hàn Quốc", "món chính", "khô", ["cay", "ngọt"]),
+    ("Dimsum", "Trung Quốc", "món khai vị", "khô", ["mặn"]),
+    ("Chè", "Việt Nam", "tráng miệng", "khô", ["ngọt"]),
+    ("Trà Sữa", "Khác", "đồ uống", "nước", ["ngọt"]),
+    ("Cà Phê", "Việt Nam", "đồ uống", "nước", ["đắng"]),
+    ("Cà Phê Bánh Mì", "Việt Nam", "món chính", "cả 2", ["đắng", "mặn"]),
+    ("Kem", "Âu/Mỹ", "tráng miệng", "khô", ["ngọt"]),
+    ("Cơm Chay", "Việt Nam", "món chính", "khô", ["thanh đạm"]),
+]
+BEV_FOOD_VALUES = {"khô", "nước", "cả 2"}
+COURSE_TYPE_VALUES = {"món chính", "món khai vị", "tráng miệng", "đồ uống"}
+
+PREFIXES = ["Quán", "Nhà hàng", "Tiệm", "", "", ""]
+OWNERS = ["Cô Ba", "Bà Tư", "Chú Năm", "Hòa", "Thìn", "Minh Ký", "Sài Gòn", "Út Hưng", "Ba Ghiền", "Hai Lúa", "Xóm Chiếu", "Bụi"]
+STREETS = ["Lê Lợi", "Nguyễn Trãi", "Hai Bà Trưng", "Pasteur", "Võ Văn Tần", "Cách Mạng Tháng 8", "Phan Xích Long", "Nguyễn Thị Minh Khai"]
+VIBE_TAGS = [
+    "thư giãn", "yên tĩnh", "sôi động", "nhạc sống", "hẹn hò", "lãng mạn", "gia đình", "ấm cúng",
+    "sang trọng", "cao cấp", "vỉa hè", "bình dân", "rooftop", "view đẹp", "truyền thống", "lâu đời",
+]
+HOURS = ["06:00 - 22:00", "07:00 - 21:30", "10:00 - 14:00", "16:00 - 23:00", "18:00 - 02:00", "00:00 - 23:59", ""]
+# (range, minPrice, maxPrice)
+PRICE_BANDS = [(1, 20000, 60000), (1, 25000, 80000), (2, 50000, 150000), (2, 80000, 200000), (3, 150000, 500000), (4, 500000, 2000000)]
+
+
+def make_row(rng, i):
+    district, lat, lon, _ = rng.choices(DISTRICTS, weights=[d[3] for d in DISTRICTS])[0]
+    dish, cuisine, course, bev_food, flavors = rng.choice(DISHES)
+    prefix = rng.choice(PREFIXES)
+    name = " ".join(p for p in (prefix, dish, rng.choice(OWNERS)) if p)
+    price_range, min_price, max_price = rng.choice(PRICE_BANDS)
+    vegetarian = "Chay" in dish or rng.random() < 0.05
+    subtypes = [dish.lower(), "nhà hàng" if prefix == "Nhà hàng" else "quán ăn"] + rng.sample(VIBE_TAGS, rng.randint(1, 3))
+    return {
+        "id": i,
+        "place_id": f"bench_{i:07d}",
+        "name": name,
+        "full_address": f"{rng.randint(1, 300)} {rng.choice(STREETS)}, {district}, Hồ Chí Minh",
+        # ~1 độ lệch chuẩn 1.5km quanh tâm quận
+        "latitude": round(rng.gauss(lat, 0.0135), 6),
+        "longitude": round(rng.gauss(lon, 0.0135), 6),
+        "rating": round(rng.uniform(3.0, 5.0), 1) if rng.random() > 0.05 else None,
+        "working_hour": rng.choice(HOURS),
+        "photo_url": f"https://example.com/photos/{i}.jpg",
+        "street_view": "",
+        "phone": f"09{rng.randint(10000000, 99999999)}",
+        "site": "",
+        "category": dish,
+        "review_tags": ", ".join(rng.sample(VIBE_TAGS, 2)),
+        "subtypes": ", ".join(subtypes),
+        "description": f"{name} phục vụ {dish.lower()} tại {district}, không gian {rng.choice(VIBE_TAGS)}.",
+        "description_en": f"{name} serves {dish} in {district}.",
+        "range": str(price_range),
+        "foodtype": "chay" if vegetarian else "mặn",
+        "bevfood": bev_food,
+        "cuisine": cuisine,
+        "flavor": json.dumps(flavors, ensure_ascii=False),
+        "coursetype": course,
+        "district": district,
+        "minprice": min_price,
+        "maxprice": max_price,
+    }
+
+
+def generate_catalog(db_path, rows, seed=42, chunk_size=10000):
+    """Tạo mới file SQLite chứa `rows` nhà hàng. Trả về số dòng đã ghi."""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    engine = create_engine(f"sqlite:///{db_path}")
+    Restaurant.__table__.create(engine)
+    rng = random.Random(seed)
+    insert = Restaurant.__table__.insert()
+    with engine.begin() as conn:
+        for start in range(1, rows + 1, chunk_size):
+            chunk = [make_row(rng, i) for i in range(start, min(start + chunk_size, rows + 1))]
+            conn.execute(insert, chunk)
+    engine.dispose()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sinh catalog nhà hàng giả lập cho benchmark")
+    parser.add_argument("--rows", type=int, default=10000, help="Số nhà hàng (10000 -> 1000000)")
+    parser.add_argument("--out", default=None, help="File SQLite đầu ra (mặc định benchmarks/catalog_<rows>.db)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    out = args.out or os.path.join(os.path.dirname(os.path.abspath(__file__)), f"catalog_{args.rows}.db")
+    started = time.perf_counter()
+    generate_catalog(out, args.rows, seed=args.seed)
+    print(f"✅ Đã sinh {args.rows} nhà hàng -> {out} ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
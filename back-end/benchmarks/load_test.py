@@ -0,0 +1,394 @@
+# benchmarks/load_test.py
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
+
+# ==============================================================================
+# LOAD TEST API THEO KỊCH BẢN NGƯỜI DÙNG
+# ==============================================================================
+# Chuẩn bị (3 terminal):
+#   1. python scripts/mock_upstream.py --latency-dist lognormal --latency-ms 80 --latency-spread 0.4
+#   2. DATABASE_URL=sqlite:///benchmarks/catalog_100000.db GOONG_BASE_URL=http://127.0.0.1:8099 \
+#      OPEN_WEATHER_BASE_URL=http://127.0.0.1:8099 GOONG_API_KEY=x OPEN_WEATHER_API_KEY=x \
+#      gunicorn -w 2 --chdir api app:app -b 127.0.0.1:5000
+#   3. python benchmarks/load_test.py run --concurrency 20 --duration 60 --label w2 --out w2.json
+#
+# - Mỗi "user ảo" chạy lặp các phiên (session) chọn theo trọng số --mix:
+#     browse       : tìm kiếm -> xem chi tiết -> tìm tiếp
+#     favorite     : tìm kiếm -> thêm yêu thích -> xem danh sách yêu thích
+#     review       : xem chi tiết -> xem đánh giá -> viết đánh giá
+#     plan_route   : tìm kiếm -> tối ưu lộ trình -> lưu lộ trình
+#     saved_routes : xem lộ trình đã lưu
+# - Closed loop (mặc định): --concurrency user chạy liên tục, nghỉ --think-time giữa các phiên
+#   Open loop: --arrival-rate N phiên/giây (Poisson), tối đa --concurrency phiên song song
+# - Báo cáo theo endpoint: throughput, p50/p90/p95/p99, tỉ lệ lỗi -> ghi JSON (--out)
+# - So sánh 2 lần chạy: python benchmarks/load_test.py compare w1.json w2.json
+#
+# Tìm số worker gunicorn phù hợp: chạy lại bước 2-3 với -w 1, 2, 4... cùng tham số
+# tải, rồi compare các file JSON (throughput tăng mà p95 không vọt lên).
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from stats import percentile  # noqa: E402
+
+KEYWORDS = ["phở", "bún bò", "cơm tấm", "coffee", "trà sữa", "lẩu", "pizza", "sushi", "bánh mì", "beef noodle"]
+DISTRICTS = ["Quận 1", "Quận 3", "Quận 5", "Bình Thạnh", "Phú Nhuận"]
+START_POINTS = ["Nhà thờ Đức Bà", "Chợ Bến Thành", "Bitexco", "Công viên Tao Đàn"]
+DEFAULT_MIX = "browse=45,favorite=15,review=10,plan_route=15,saved_routes=15"
+PASSWORD = "loadtest123"
+
+
+# ------------------------------------------------------------------------------
+# THU THẬP SỐ LIỆU
+# ------------------------------------------------------------------------------
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.sessions = {}
+
+    def record(self, endpoint, elapsed_ms, status):
+        with self._lock:
+            e = self.endpoints.setdefault(endpoint, {"latencies": [], "errors": 0, "statuses": {}})
+            e["latencies"].append(elapsed_ms)
+            e["statuses"][str(status)] = e["statuses"].get(str(status), 0) + 1
+            if status == "exception" or status >= 400:
+                e["errors"] += 1
+
+    def record_session(self, name):
+        with self._lock:
+            self.sessions[name] = self.sessions.get(name, 0) + 1
+
+    def summary(self, elapsed_s):
+        def summarize(latencies, errors, statuses=None):
+            latencies = sorted(latencies)
+            count = len(latencies)
+            out = {
+                "requests": count,
+                "rps": round(count / elapsed_s, 2),
+                "error_rate": round(errors / count, 4) if count else 0.0,
+                "mean_ms": round(sum(latencies) / count, 2) if count else None,
+            }
+            for pct in (50, 90, 95, 99):
+                value = percentile(latencies, pct)
+                out[f"p{pct}_ms"] = round(value, 2) if value is not None else None
+            if statuses is not None:
+                out["statuses"] = statuses
+            return out
+
+        with self._lock:
+            endpoints = {
+                name: summarize(e["latencies"], e["errors"], dict(e["statuses"]))
+                for name, e in sorted(self.endpoints.items())
+            }
+            all_latencies = [v for e in self.endpoints.values() for v in e["latencies"]]
+            total = summarize(all_latencies, sum(e["errors"] for e in self.endpoints.values()))
+            return {"total": total, "endpoints": endpoints, "sessions": dict(self.sessions)}
+
+
+# ------------------------------------------------------------------------------
+# USER ẢO & KỊCH BẢN
+# ------------------------------------------------------------------------------
+class VirtualUser:
+    def __init__(self, base_url, username, stats, seed, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.stats = stats
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.http = requests.Session()
+
+    def call(self, endpoint, method, path, **kwargs):
+        """endpoint: tên nhóm trong báo cáo (VD "GET /api/restaurant/<id>")"""
+        started = time.perf_counter()
+        try:
+            r = self.http.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.stats.record(endpoint, (time.perf_counter() - started) * 1000, "exception")
+            return None
+        self.stats.record(endpoint, (time.perf_counter() - started) * 1000, r.status_code)
+        return r
+
+    def search(self):
+        params = {"keyword": self.rng.choice(KEYWORDS)}
+        if self.rng.random() < 0.3:
+            params.update({"district": self.rng.choice(DISTRICTS), "radius": self.rng.choice([1, 2, 3])})
+        if self.rng.random() < 0.3:
+            params["maxPrice"] = self.rng.choice([50000, 100000, 200000])
+        r = self.call("GET /api/search", "GET", "/api/search", params=params)
+        if r is None or r.status_code != 200: return []
+        return r.json().get("results", [])
+
+    def pick(self, results):
+        return self.rng.choice(results) if results else None
+
+    def detail(self, place):
+        return self.call("GET /api/restaurant/<id>", "GET", f"/api/restaurant/{place['id']}")
+
+
+def session_browse(user):
+    place = user.pick(user.search())
+    if place:
+        user.detail(place)
+    user.search()
+
+
+def session_favorite(user):
+    place = user.pick(user.search())
+    if place:
+        user.call("POST /api/favorite", "POST", "/api/favorite",
+                  json={"username": user.username, "place_id": place["place_id"]})
+    user.call("GET /api/favorite/<username>", "GET", f"/api/favorite/{user.username}")
+
+
+def session_review(user):
+    place = user.pick(user.search())
+    if not place: return
+    user.detail(place)
+    user.call("GET /api/reviews/<place_id>", "GET", f"/api/reviews/{place['place_id']}")
+    user.call("POST /api/reviews", "POST", "/api/reviews", data={
+        "username": user.username, "place_id": place["place_id"],
+        "rating": user.rng.randint(1, 5), "comment": "Load test review",
+    })
+
+
+def session_plan_route(user):
+    results = user.search()
+    if len(results) < 2: return
+    places = [
+        {"name": p["name"], "address": p["address"], "lat": p["lat"], "lng": p["lng"]}
+        for p in user.rng.sample(results, min(len(results), user.rng.randint(2, 4)))
+    ]
+    start = user.rng.choice(START_POINTS)
+    r = user.call("POST /api/optimize", "POST", "/api/optimize", json={"starting_point": start, "places": places})
+    if r is None or r.status_code != 200: return
+    route = r.json()
+    user.call("POST /api/routes", "POST", "/api/routes", json={
+        "username": user.username, "start_point": start, "places": places,
+        "distance": route.get("distance_km", 0), "duration": route.get("duration_min", 0),
+        "polyline_outbound": route.get("polyline_outbound", ""), "polyline_return": route.get("polyline_return", ""),
+    })
+
+
+def session_saved_routes(user):
+    user.call("GET /api/routes/<username>", "GET", f"/api/routes/{user.username}")
+
+
+SESSIONS = {
+    "browse": session_browse,
+    "favorite": session_favorite,
+    "review": session_review,
+    "plan_route": session_plan_route,
+    "saved_routes": session_saved_routes,
+}
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SESSIONS:
+            raise SystemExit(f"❌ Kịch bản không tồn tại: {name} (có: {', '.join(SESSIONS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def run_session(user, weights, stats):
+    name = user.rng.choices(list(weights), weights=list(weights.values()))[0]
+    SESSIONS[name](user)
+    stats.record_session(name)
+
+
+# ------------------------------------------------------------------------------
+# CHẠY TẢI
+# ------------------------------------------------------------------------------
+def create_users(args, stats):
+    """Đăng ký (hoặc dùng lại) user load test. Request setup không tính vào báo cáo."""
+    setup_stats = Stats()
+    users = []
+    for i in range(args.users or args.concurrency):
+        username = f"{args.user_prefix}_{i}"
+        user = VirtualUser(args.base_url, username, setup_stats, args.seed + i, args.timeout)
+        creds = {"username": username, "password": PASSWORD}
+        user.call("register", "POST", "/api/register", json=creds)  # 400 nếu đã có -> bỏ qua
+        r = user.call("login", "POST", "/api/login", json=creds)
+        if r is None or r.status_code != 200:
+            raise SystemExit(f"❌ Không đăng nhập được user {username} tại {args.base_url}")
+        user.stats = stats
+        users.append(user)
+    return users
+
+
+def run_closed_loop(users, weights, stats, duration, think_time):
+    deadline = time.monotonic() + duration
+
+    def loop(user):
+        while time.monotonic() < deadline:
+            run_session(user, weights, stats)
+            if think_time:
+                time.sleep(user.rng.uniform(0, think_time))
+
+    threads = [threading.Thread(target=loop, args=(u,), daemon=True) for u in users]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+
+def run_open_loop(users, weights, stats, duration, rate, concurrency, seed):
+    """Phiên đến theo Poisson; đo thêm độ trễ bắt đầu (server quá tải -> hàng đợi dài)"""
+    rng = random.Random(seed)
+    lags = []
+    lock = threading.Lock()
+    free = list(users)  # Mỗi user chỉ chạy 1 phiên tại 1 thời điểm (requests.Session không thread-safe)
+
+    def start(scheduled):
+        with lock:
+            lags.append((time.monotonic() - scheduled) * 1000)
+            user = free.pop() if free else None
+        if user is None:
+            stats.record_session("dropped")
+            return
+        try:
+            run_session(user, weights, stats)
+        finally:
+            with lock: free.append(user)
+
+    started = time.monotonic()
+    next_at = started
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while next_at < started + duration:
+            delay = next_at - time.monotonic()
+            if delay > 0: time.sleep(delay)
+            executor.submit(start, next_at)
+            next_at += rng.expovariate(rate)
+    lags.sort()
+    return {"start_lag_p50_ms": round(percentile(lags, 50) or 0, 2), "start_lag_p99_ms": round(percentile(lags, 99) or 0, 2)}
+
+
+def print_report(report):
+    meta, total = report["meta"], report["total"]
+    print("\n" + "=" * 104)
+    print(
+        f"{meta['label'] or '-'} | {meta['mode']} | concurrency={meta['concurrency']} "
+        f"rate={meta['arrival_rate'] or '-'} | {meta['duration_s']}s"
+    )
+    print(f"{'Endpoint':<32}{'Req':>8}{'Req/s':>9}{'Lỗi':>8}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}")
+    print("-" * 104)
+    for name, m in list(report["endpoints"].items()) + [("TỔNG", total)]:
+        print(
+            f"{name:<32}{m['requests']:>8}{m['rps']:>9}{m['error_rate']:>8.1%}"
+            f"{m['p50_ms'] or '-':>10}{m['p90_ms'] or '-':>10}{m['p95_ms'] or '-':>10}{m['p99_ms'] or '-':>10}"
+        )
+    print("=" * 104)
+    print(f"Phiên: {report['sessions']}")
+    if report.get("open_loop"):
+        print(f"Độ trễ bắt đầu phiên: {report['open_loop']}")
+
+
+def command_run(args):
+    weights = parse_mix(args.mix)
+    stats = Stats()
+    users = create_users(args, stats)
+    mode = "open" if args.arrival_rate else "closed"
+    print(f"🚀 {mode} loop, {len(users)} user, {args.duration}s -> {args.base_url}")
+
+    started = time.monotonic()
+    open_loop = None
+    if args.arrival_rate:
+        open_loop = run_open_loop(users, weights, stats, args.duration, args.arrival_rate, args.concurrency, args.seed)
+    else:
+        run_closed_loop(users, weights, stats, args.duration, args.think_time)
+    elapsed = time.monotonic() - started
+
+    report = {
+        "meta": {
+            "label": args.label,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "base_url": args.base_url,
+            "mode": mode,
+            "concurrency": args.concurrency,
+            "arrival_rate": args.arrival_rate,
+            "duration_s": round(elapsed, 1),
+            "mix": weights,
+            "seed": args.seed,
+        },
+        **stats.summary(elapsed),
+    }
+    if open_loop: report["open_loop"] = open_loop
+    print_report(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Đã ghi {args.out}")
+    return 0
+
+
+def compare_reports(old, new, threshold):
+    """Trả về list dòng (endpoint, chỉ số, cũ, mới, % thay đổi, bị xấu đi?)"""
+    rows = []
+    names = sorted(set(old["endpoints"]) & set(new["endpoints"])) + ["TỔNG"]
+    for name in names:
+        a = old["total"] if name == "TỔNG" else old["endpoints"][name]
+        b = new["total"] if name == "TỔNG" else new["endpoints"][name]
+        for metric, higher_is_worse in (("rps", False), ("p95_ms", True), ("p99_ms", True), ("error_rate", True)):
+            x, y = a.get(metric), b.get(metric)
+            if x is None or y is None: continue
+            change = (y - x) / x if x else (0.0 if y == x else float("inf"))
+            worse = change > threshold if higher_is_worse else change < -threshold
+            if metric == "error_rate":
+                worse = y - x > 0.01  # So tuyệt đối: tăng hơn 1 điểm phần trăm
+            rows.append((name, metric, x, y, change, worse))
+    return rows
+
+
+def command_compare(args):
+    with open(args.old, encoding="utf-8") as f: old = json.load(f)
+    with open(args.new, encoding="utf-8") as f: new = json.load(f)
+    rows = compare_reports(old, new, args.threshold)
+    print(f"\n{old['meta'].get('label') or args.old}  ->  {new['meta'].get('label') or args.new}")
+    print(f"{'Endpoint':<32}{'Chỉ số':<12}{'Cũ':>12}{'Mới':>12}{'Thay đổi':>12}")
+    print("-" * 82)
+    for name, metric, x, y, change, worse in rows:
+        flag = "  ❌" if worse else ""
+        print(f"{name:<32}{metric:<12}{x:>12}{y:>12}{change:>+12.1%}{flag}")
+    regressions = [r for r in rows if r[5]]
+    print(f"\n{'❌ ' + str(len(regressions)) + ' chỉ số xấu đi' if regressions else '✅ Không có chỉ số nào xấu đi'} (ngưỡng {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test API theo kịch bản người dùng")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Chạy tải vào server đang chạy")
+    run.add_argument("--base-url", default="http://127.0.0.1:5000")
+    run.add_argument("--concurrency", type=int, default=10, help="Số user ảo (closed) / số phiên song song tối đa (open)")
+    run.add_argument("--arrival-rate", type=float, default=None, help="Số phiên/giây (bật open loop)")
+    run.add_argument("--duration", type=float, default=30, help="Thời gian chạy (giây)")
+    run.add_argument("--think-time", type=float, default=0.5, help="Nghỉ tối đa giữa 2 phiên, closed loop (giây)")
+    run.add_argument("--mix", default=DEFAULT_MIX, help=f"Trọng số kịch bản (mặc định {DEFAULT_MIX})")
+    run.add_argument("--users", type=int, default=None, help="Số tài khoản load test (mặc định = concurrency)")
+    run.add_argument("--user-prefix", default="loadtest")
+    run.add_argument("--timeout", type=float, default=30)
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--label", default=None, help="Nhãn lần chạy (VD w2 = 2 worker gunicorn)")
+    run.add_argument("--out", default=None, help="Ghi kết quả ra file JSON")
+
+    compare = sub.add_parser("compare", help="So sánh 2 file kết quả")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Ngưỡng xấu đi (mặc định 10%%)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(command_run(args) if args.command == "run" else command_compare(args))
@@ -0,0 +1,9 @@
+# benchmarks/stats.py
+# Hàm thống kê dùng chung cho các script benchmark
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile trên list đã sắp xếp"""
+    if not sorted_values: return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil
+    return sorted_values[int(rank) - 1]
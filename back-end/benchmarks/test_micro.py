@@ -0,0 +1,114 @@
+# benchmarks/test_micro.py
+import importlib
+from models import Restaurant
+from recommendation_service import RecommendationService
+from restaurant_routes import QUERY_EXPANDER, check_is_open, generate_search_terms, haversine_distance, singularize_english_word
+
+# Micro-benchmark các hàm chạy trên MỖI request /api/search (x500 ứng viên)
+# và các hàm gán nhãn của ETL (x mỗi dòng). Cách chạy: xem benchmarks/conftest.py
+
+transform = importlib.import_module("3_clean_transform")
+
+service = RecommendationService()
+
+RESTAURANT = Restaurant(
+    id=1, place_id="bench_1", name="Quán Phở Bò Cô Ba", full_address="12 Lê Lợi, Quận 1, Hồ Chí Minh",
+    latitude=10.7769, longitude=106.7009, rating=4.4, working_hour="06:00 - 22:00",
+    photo_url="https://example.com/1.jpg", phone="0901234567", category="Phở",
+    subtypes="phở bò, quán ăn, yên tĩnh, gia đình", description="Phở bò gia truyền, không gian ấm cúng",
+    description_en="Traditional beef pho", range="2", foodType="mặn", bevFood="nước", cuisine="Việt Nam",
+    flavor='["mặn"]', courseType="món chính", district="Quận 1", minPrice=50000, maxPrice=150000,
+)
+USER_PREFS = {
+    "cuisines": ["việt nam", "nhật bản"],
+    "flavors": ["mặn", "cay"],
+    "vibes": ["chill", "cozy"],
+    "keyword": "phở",
+    "maxPrice": 100000,
+    "foodType": "non-vegetarian",
+    "beverageOrFood": "food",
+    "courseType": "main",
+    "distance_km": 1.2,
+    "max_radius": 3,
+}
+SOURCE_ROW = {
+    "id": 1, "place_id": "bench_1", "name": "Lẩu Thái Tomyum", "full_address": "45 Nguyễn Trãi, Quận 5, Hồ Chí Minh",
+    "latitude": 10.754, "longitude": 106.663, "rating": 4.2, "working_hour": "10:00 - 22:00",
+    "photo_url": "", "street_view": "", "phone": "", "site": "", "category": "Nhà hàng lẩu",
+    "review_tags": '["cay", "chua"]', "subtypes": '["Nhà hàng Thái", "Lẩu"]',
+    "description": "Lẩu thái chua cay, hải sản tươi, có trà sữa và chè tráng miệng", "range": "₫₫",
+}
+WORKING_HOURS = ["06:00 - 22:00", "18:00 - 02:00", "", "Cả ngày", "10:00-14:00"]
+PLURALS = ["noodles", "sandwiches", "fries", "potatoes", "dishes", "glass", "pho"]
+
+
+def test_calculate_final_score(benchmark):
+    score = benchmark(service.calculate_final_score, RESTAURANT, "balanced", USER_PREFS)
+    assert score > 0
+
+
+def test_get_extended_tag_score(benchmark):
+    score = benchmark(service._get_extended_tag_score, RESTAURANT, USER_PREFS)
+    assert score > 0
+
+
+def test_generate_search_terms_exact(benchmark):
+    terms = benchmark(generate_search_terms, "beef noodles")
+    assert "phở bò" in terms
+
+
+def test_generate_search_terms_partial(benchmark):
+    terms = benchmark(generate_search_terms, "spicy beef noodle soup")
+    assert "spicy beef noodle soup" in terms
+
+
+def test_query_expander_uncached(benchmark):
+    # generate_search_terms trả từ LRU cache -> đo riêng đường dò trie
+    terms = benchmark(QUERY_EXPANDER._expand, "spicy beef noodle soup")
+    assert "bún bò" in terms
+
+
+def test_singularize_english_word(benchmark):
+    words = benchmark(lambda: [singularize_english_word(w) for w in PLURALS])
+    assert words[:4] == ["noodle", "sandwich", "fry", "potato"]
+
+
+def test_check_is_open(benchmark):
+    flags = benchmark(lambda: [check_is_open(h) for h in WORKING_HOURS])
+    assert len(flags) == len(WORKING_HOURS)
+
+
+def test_haversine_distance(benchmark):
+    dist = benchmark(haversine_distance, 10.7769, 106.7009, 10.7540, 106.6634)
+    assert 4 < dist < 5
+
+
+def test_restaurant_to_dict(benchmark):
+    data = benchmark(RESTAURANT.to_dict, lang="en")
+    assert data["description"] == "Traditional beef pho"
+
+
+def test_etl_tag_matcher_and_mapping(benchmark):
+    text = transform.get_full_text(SOURCE_ROW)
+
+    def map_all():
+        tags = transform.TAG_MATCHER.match(text)
+        cuisine = transform.map_cuisine(text, tags)
+        bev_food = transform.map_beverage_or_food(text, SOURCE_ROW["category"], tags)
+        return (
+            cuisine, transform.map_food_type(text, tags), bev_food,
+            transform.map_course_type(text, bev_food, tags),
+            transform.map_flavor(text, cuisine, SOURCE_ROW["category"], bev_food, tags),
+        )
+
+    cuisine, *_ = benchmark(map_all)
+    assert cuisine == "Thái Lan"
+
+
+def test_etl_map_district(benchmark):
+    assert benchmark(transform.map_district, SOURCE_ROW["full_address"]) == "Quận 5"
+
+
+def test_etl_transform_row(benchmark):
+    row = benchmark(transform.transform_row, SOURCE_ROW)
+    assert row is not None and row[0] == "bench_1"
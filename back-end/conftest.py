@@ -10,4 +10,15 @@ api_dir = os.path.join(current_dir, "api")
 # 3. Thêm 'api' vào danh sách đường dẫn tìm kiếm của Python (sys.path)
 # Việc này giúp Python hiểu câu lệnh "from models import..." bên trong routes.py
 sys.path.insert(0, api_dir)
-sys.path.insert(0, current_dir)
\ No newline at end of file
+sys.path.insert(0, current_dir)
+
+# 4. Thêm 'etl_pipeline' (xếp sau 'api') để test được các module ETL (config, translation...)
+sys.path.append(os.path.join(current_dir, "etl_pipeline"))
+
+# 5. Thư mục 'benchmarks' (bộ sinh catalog giả lập) và 'scripts' (mock server)
+sys.path.append(os.path.join(current_dir, "benchmarks"))
+sys.path.append(os.path.join(current_dir, "scripts"))
+
+# 6. Test dùng DB SQLite trong RAM: app.py đọc DATABASE_URL lúc import nên phải đặt
+# trước khi test import app (đặt app.config sau đó không có tác dụng) -> không ghi vào api/instance/*.db
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
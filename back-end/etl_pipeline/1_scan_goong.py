@@ -1,15 +1,22 @@
 # scanner.py
 
-import requests
-import time
+import math
+import os
+import threading
 import config
 import db_manager
 import sys
-from requests.exceptions import RequestException, HTTPError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rate_limiter import TokenBucket
+import grid
+
+# Dùng chung GoongClient với API (pool kết nối, retry, circuit breaker)
+sys.path.append(os.path.join(config.BASE_DIR, "api"))
+from goong_client import GoongClient, GoongError, GoongRateLimitError
 
 # === CẤU HÌNH HẰNG SỐ ===
-BASE_URL = "https://rsapi.goong.io"
 SLEEP_TIME = 0.2  # Tăng nhẹ để tránh bị chặn
+HCMC_PROVINCE = "Hồ Chí Minh"
 
 # === THAY ĐỔI 1: ĐỊNH NGHĨA LỖI TÙY CHỈNH ===
 class RateLimitError(Exception):
@@ -18,37 +25,10 @@ class RateLimitError(Exception):
 
 def get_hcmc_grid():
     """
-    Định nghĩa "grid" (lưới) của chúng ta cho TP. Hồ Chí Minh.
-    Đây là danh sách các tâm điểm của các quận/khu vực.
+    Các ô gốc của lưới quét TP. Hồ Chí Minh (thay cho danh sách tâm quận
+    viết tay trước đây). Ô bão hòa sẽ được chia nhỏ dần trong start_scan.
     """
-    grid = [
-        # --- Các quận trung tâm ---
-        # {'name': 'Quận 1', 'lat': 10.7769, 'lon': 106.7009},
-        # {'name': 'Quận 3', 'lat': 10.7828, 'lon': 106.6869},
-        # {'name': 'Quận 4', 'lat': 10.7593, 'lon': 106.7023},
-        # {'name': 'Quận 5', 'lat': 10.7547, 'lon': 106.6585},
-        # {'name': 'Quận 6', 'lat': 10.7480, 'lon': 106.6346},
-        # {'name': 'Quận 8', 'lat': 10.7225, 'lon': 106.6231},
-        # {'name': 'Quận 10', 'lat': 10.7702, 'lon': 106.6661},
-        # {'name': 'Quận 11', 'lat': 10.7623, 'lon': 106.6501},
-        # {'name': 'Quận Phú Nhuận', 'lat': 10.7937, 'lon': 106.6891},//
-        # {'name': 'Quận Bình Thạnh', 'lat': 10.8016, 'lon': 106.7081},
-        # {'name': 'Quận Tân Bình', 'lat': 10.7997, 'lon': 106.6589},//
-        # {'name': 'Quận Tân Phú', 'lat': 10.7782, 'lon': 106.6217},//
-        # {'name': 'Quận Gò Vấp', 'lat': 10.8288, 'lon': 106.6658},//
-        # # --- Các quận ven & TP. Thủ Đức ---
-        # {"name": "Quận 7", "lat": 10.7300, "lon": 106.7214},//
-        # {'name': 'Quận 12', 'lat': 10.8672, 'lon': 106.6413},
-        # {'name': 'Quận Bình Tân', 'lat': 10.7554, 'lon': 106.5879},
-        {'name': 'Thành phố Thủ Đức', 'lat': 10.8200, 'lon': 106.7692},
-        # # --- Các huyện ngoại thành ---
-        # {'name': 'Huyện Hóc Môn', 'lat': 10.8845, 'lon': 106.5936},
-        # {'name': 'Huyện Bình Chánh', 'lat': 10.7107, 'lon': 106.5714},
-        # {'name': 'Huyện Nhà Bè', 'lat': 10.6866, 'lon': 106.7216},
-        # {'name': 'Huyện Củ Chi', 'lat': 11.0560, 'lon': 106.4950},
-        # {'name': 'Huyện Cần Giờ', 'lat': 10.5516, 'lon': 106.8797}
-    ]
-    return grid
+    return grid.root_cells(grid.CITY_BBOXES[config.SCAN_CITY], config.SCAN_ROOT_DIVISIONS)
 
 
 def get_search_terms():
@@ -255,37 +235,32 @@ def get_search_terms():
     ]
 
 
-def call_api(session, url, params):
+def call_api(client, endpoint, params, limiter=None):
     """
     Hàm gọi API chung với cơ chế xử lý lỗi và tuân thủ rate limit.
-    === ĐÃ CẬP NHẬT ĐỂ NÉM LỖI 429 ===
+    Tốc độ gọi do token bucket (limiter) quyết định; retry/backoff cho
+    5xx và 429 do GoongClient đảm nhiệm; nếu vẫn 429 thì ném RateLimitError.
     """
     try:
-        time.sleep(config.REQUEST_SLEEP_TIME)
-        response = session.get(url, params=params)
-
-        # === THAY ĐỔI 2: NÉM LỖI 429 THAY VÌ THOÁT ===
-        if response.status_code == 429:
-            print(
-                "\n!!! LỖI NGHIÊM TRỌNG: "
-                "ĐÃ ĐẠT GIỚI HẠN YÊU CẦU (429)!!!"
-            )
-            print("Nguyên nhân: Rất có thể bạn đã hết 1000 yêu cầu/ngày.")
-            print(
-                "Nhờ có 'INSERT OR IGNORE', kịch bản sẽ tự động "
-                "tiếp tục phần còn lại vào lần chạy sau."
-            )
-            # Ném lỗi tùy chỉnh
-            raise RateLimitError("Đã đạt giới hạn yêu cầu 429")
-
-        response.raise_for_status()
-        return response.json()
-
-    except HTTPError as http_err:
-        print(f"Lỗi HTTP khi gọi API {url}: {http_err}")
-        return None
-    except RequestException as e:
-        print(f"Lỗi kết nối khi gọi API {url}: {e}")
+        if limiter: limiter.acquire()
+        return client.get(endpoint, params)
+
+    # === THAY ĐỔI 2: NÉM LỖI 429 THAY VÌ THOÁT ===
+    except GoongRateLimitError:
+        print(
+            "\n!!! LỖI NGHIÊM TRỌNG: "
+            "ĐÃ ĐẠT GIỚI HẠN YÊU CẦU (429)!!!"
+        )
+        print("Nguyên nhân: Rất có thể bạn đã hết 1000 yêu cầu/ngày.")
+        print(
+            "Tiến độ đã được lưu checkpoint, kịch bản sẽ tự động "
+            "tiếp tục phần còn lại vào lần chạy sau."
+        )
+        # Ném lỗi tùy chỉnh
+        raise RateLimitError("Đã đạt giới hạn yêu cầu 429")
+
+    except GoongError as e:
+        print(f"Lỗi khi gọi API {endpoint}: {e}")
         return None
     # (Bỏ except SystemExit)
     except Exception as e:
@@ -294,9 +269,53 @@ def call_api(session, url, params):
         return None
 
 
+_SKIPPED = object()  # Task chưa chạy vì đã gặp 429 trước đó
+
+
+def run_pool(tasks, worker, handle_result, max_workers):
+    """
+    Chạy worker(task) trên thread pool giới hạn, xử lý kết quả ở thread chính
+    (SQLite chỉ ghi từ 1 thread). Gặp RateLimitError thì hủy các task còn lại,
+    nhưng task nào đã chạy xong (đã tốn quota) vẫn được handle_result lưu lại.
+    Trả về True nếu bị dừng do 429.
+    """
+    stop = threading.Event()
+
+    def guarded(task):
+        if stop.is_set():
+            return task, _SKIPPED
+        return task, worker(task)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(guarded, task) for task in tasks]
+        for future in as_completed(futures):
+            try:
+                task, data = future.result()
+            except RateLimitError:
+                stop.set()
+                continue
+            if data is not _SKIPPED:
+                handle_result(task, data)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return stop.is_set()
+
+
+def extract_hcmc_place_ids(data):
+    if not (data and data.get("status") == "OK" and data.get("predictions")):
+        return []
+    return [
+        pred["place_id"] for pred in data["predictions"]
+        if pred.get("compound", {}).get("province") == HCMC_PROVINCE
+    ]
+
+
 def start_scan():
     """
     Bắt đầu quá trình quét toàn bộ TP.HCM để tìm quán ăn.
+    Chạy lại sau khi bị 429/crash sẽ tiếp tục đúng chỗ đã dừng nhờ checkpoint.
+    Trả về thống kê {"rows", "api_calls", "complete"} (None nếu không chạy được).
     """
     conn = db_manager.create_connection()
     if conn is None:
@@ -304,121 +323,146 @@ def start_scan():
         return
 
     db_manager.create_table(conn)
+    db_manager.create_checkpoint_tables(conn)
 
-    session = requests.Session()
-    grid = get_hcmc_grid()
+    client = GoongClient(api_key=config.GOONG_API_KEY)
+    limiter = TokenBucket(config.SCAN_RATE_PER_SEC)
+    max_workers = config.SCAN_MAX_WORKERS
     search_terms = get_search_terms()
+    limit = config.SCAN_RESULT_LIMIT
+
+    # === GIAI ĐOẠN 1: QUÉT PLACE IDs THEO LƯỚI THÍCH ỨNG ===
+    # Quét theo từng "đợt": đợt đầu là các ô gốc, ô nào bão hòa thì
+    # các ô con của nó vào đợt sau. Query đã có checkpoint thì không gọi lại,
+    # chỉ dùng result_count đã lưu để dựng lại cây.
+    # Query quá SCAN_REFRESH_DAYS ngày coi như chưa quét -> quét lại để tìm quán mới
+    completed = db_manager.get_completed_queries(conn, config.SCAN_REFRESH_DAYS)
+    frontier = [(cell, term) for cell in get_hcmc_grid() for term in search_terms]
+    print(
+        f"--- Bắt đầu Giai đoạn 1: Quét Place IDs "
+        f"({len(frontier)} query gốc, {len(completed)} query đã xong từ trước) ---"
+    )
 
-    unique_place_ids = set()
-    total_new_places = 0
-
-    print("--- Bắt đầu Giai đoạn 1: Quét Place IDs ---")
-
-    # === THAY ĐỔI 3: BẮT LỖI 429 TRONG GIAI ĐOẠN 1 ===
-    rate_limit_hit = False  # Cờ báo hiệu lỗi 429
-
-    for area in grid:
-        if rate_limit_hit:  # Nếu đã gặp lỗi 429, dừng quét Giai đoạn 1
-            break
-        for term in search_terms:
-            print(
-                f"Đang quét: Từ khóa='{term}', Khu vực='{area['name']}'..."
-            )
-
-            autocomplete_url = f"{BASE_URL}/Place/AutoComplete"
-            params = {
-                "input": f"{term} {area['name']}",
-                "location": f"{area['lat']},{area['lon']}",
-                "radius": 5,
-                "limit": 50,
-                "more_compound": "true",
-                "api_key": config.GOONG_API_KEY,
-            }
-
-            try:
-                data = call_api(session, autocomplete_url, params)
-            except RateLimitError:
-                print(
-                    "Lỗi 429 xảy ra trong Giai đoạn 1. Dừng quét Giai đoạn 1."
-                )
-                rate_limit_hit = True  # Đặt cờ
-                break  # Thoát vòng lặp 'term'
-
-            if (
-                data
-                and data.get("status") == "OK"
-                and data.get("predictions")
-            ):
-                count = 0
-                for pred in data["predictions"]:
-                    if (
-                        pred.get("compound", {}).get("province")
-                        == "Hồ Chí Minh"
-                    ):
-                        unique_place_ids.add(pred["place_id"])
-                        count += 1
-                print(f"    -> Tìm thấy {count} kết quả liên quan ở TP.HCM.")
-
+    def autocomplete(query):
+        cell, term = query
+        lat, lon = cell.center
+        params = {
+            "input": term,
+            "location": f"{lat},{lon}",
+            "radius": max(1, math.ceil(cell.radius_km)),
+            "limit": limit,
+            "more_compound": "true",
+        }
+        return call_api(client, "Place/AutoComplete", params, limiter)
+
+    failed = []  # Query/place lỗi mạng/HTTP trong lần chạy này
+
+    def save_query(query, data):
+        cell, term = query
+        if data is None:
+            # Lỗi mạng/HTTP: không đánh dấu xong để lần sau quét lại
+            failed.append(query)
+            return
+        place_ids = extract_hcmc_place_ids(data)
+        result_count = len(data.get("predictions") or [])
+        db_manager.mark_query_done(conn, cell.key, term, place_ids, result_count)
+        completed[(cell.key, term)] = result_count
+        print(
+            f"Đã quét: Từ khóa='{term}', Ô={cell.key} (r={cell.radius_km:.1f}km) "
+            f"-> {result_count} kết quả, {len(place_ids)} ở TP.HCM."
+        )
+
+    rate_limit_hit = False
+    while frontier and not rate_limit_hit:
+        todo = [q for q in frontier if (q[0].key, q[1]) not in completed]
+        if todo:
+            rate_limit_hit = run_pool(todo, autocomplete, save_query, max_workers)
+
+        # Ô bão hòa -> chia 4 cho đợt sau
+        next_frontier = []
+        for cell, term in frontier:
+            count = completed.get((cell.key, term))
+            for child in grid.next_cells(cell, count, limit, config.SCAN_MAX_DEPTH):
+                next_frontier.append((child, term))
+        frontier = next_frontier
+
+    if rate_limit_hit:
+        print("Lỗi 429 xảy ra trong Giai đoạn 1. Dừng quét Giai đoạn 1.")
+
+    pending_ids = db_manager.get_pending_place_ids(conn)
     print(
         f"\n--- Giai đoạn 1 Hoàn tất: "
-        f"Tìm thấy {len(unique_place_ids)} địa điểm duy nhất. ---"
+        f"{len(pending_ids)} địa điểm đang chờ lấy chi tiết. ---"
     )
+
+    # === GIAI ĐOẠN 2: LẤY CHI TIẾT VÀ LƯU VÀO DATABASE ===
+    # (vẫn chạy khi Giai đoạn 1 bị 429 để thử tận dụng phần quota còn lại)
     print("--- Bắt đầu Giai đoạn 2: Lấy chi tiết và lưu vào Database ---")
 
-    # === THAY ĐỔI 4: BẮT LỖI 429 TRONG GIAI ĐOẠN 2 ===
+    def detail(place_id):
+        return call_api(client, "Place/Detail", {"place_id": place_id}, limiter)
+
+    # Ghi theo lô: không commit/fsync cho từng quán
+    writer = db_manager.RestaurantWriter(
+        conn, batch_size=config.SCAN_WRITE_BATCH_SIZE, flush_interval=config.SCAN_FLUSH_INTERVAL
+    )
+    processed_ids = []
+
+    def save_detail(place_id, data):
+        if data is None:
+            failed.append(place_id)
+            return  # lỗi tạm thời -> giữ trong hàng chờ
+        if data.get("status") == "OK" and data.get("result"):
+            result = data["result"]
+            location = result.get("geometry", {}).get("location", {})
+
+            restaurant_data = {
+                "goong_place_id": result.get("place_id"),
+                "name": result.get("name"),
+                "address": result.get("formatted_address"),
+                "latitude": location.get("lat"),
+                "longitude": location.get("lng"),
+                "province": result.get("compound", {}).get("province"),
+                "district": result.get("compound", {}).get("district"),
+                "commune": result.get("compound", {}).get("commune"),
+            }
+
+            if restaurant_data["goong_place_id"] and restaurant_data["name"]:
+                writer.add_restaurant(restaurant_data)
+                print(f"    -> Đã nhận: {restaurant_data['name']}")
+        processed_ids.append(place_id)
+
     try:
-        # Bọc toàn bộ vòng lặp Giai đoạn 2 trong try...except
-        for i, place_id in enumerate(list(unique_place_ids)):
-            print(
-                f"Đang xử lý {i+1}/{len(unique_place_ids)}: "
-                f"{place_id[:20]}..."
-            )
-
-            detail_url = f"{BASE_URL}/Place/Detail"
-            params = {"place_id": place_id, "api_key": config.GOONG_API_KEY}
-
-            # call_api sẽ ném RateLimitError nếu gặp lỗi 429
-            data = call_api(session, detail_url, params)
-
-            if data and data.get("status") == "OK" and data.get("result"):
-                result = data["result"]
-                location = result.get("geometry", {}).get("location", {})
-
-                restaurant_data = {
-                    "goong_place_id": result.get("place_id"),
-                    "name": result.get("name"),
-                    "address": result.get("formatted_address"),
-                    "latitude": location.get("lat"),
-                    "longitude": location.get("lng"),
-                    "province": result.get("compound", {}).get("province"),
-                    "district": result.get("compound", {}).get("district"),
-                    "commune": result.get("compound", {}).get("commune"),
-                }
-
-                if (
-                    restaurant_data["goong_place_id"]
-                    and restaurant_data["name"]
-                ):
-                    row_id = db_manager.insert_restaurant(
-                        conn, restaurant_data
-                    )
-                    if row_id:
-                        total_new_places += 1
-                        print(f"    -> Đã lưu: {restaurant_data['name']}")
-
-    except RateLimitError:
-        # Nếu Giai đoạn 2 gặp lỗi 429, chúng ta sẽ dừng vòng lặp tại đây
-        print("\nLỗi 429 xảy ra trong Giai đoạn 2.")
-        print("Đang dừng Giai đoạn 2 và chuyển sang tổng kết.")
-
-    # === THAY ĐỔI 5: CẬP NHẬT THÔNG BÁO TỔNG KẾT ===
+        if run_pool(pending_ids, detail, save_detail, max_workers):
+            rate_limit_hit = True
+            print("\nLỗi 429 xảy ra trong Giai đoạn 2.")
+            print("Đang dừng Giai đoạn 2 và chuyển sang tổng kết.")
+    finally:
+        # Ghi nốt lô cuối rồi mới xóa hàng chờ (crash giữa chừng thì
+        # get_pending_place_ids vẫn bỏ qua các quán đã có trong restaurants)
+        writer.flush()
+        db_manager.clear_pending_places(conn, processed_ids)
+    total_new_places = writer.inserted
+
+    # === TỔNG KẾT ===
     print("\n--- Giai đoạn 2 Hoàn tất (hoặc bị dừng do lỗi 429) ---")
     print(
         f"Quá trình quét hoàn tất. "
-        f"Đã thêm {total_new_places} địa điểm mới vào database."
+        f"Đã thêm {total_new_places} địa điểm mới vào database "
+        f"(bỏ qua {writer.ignored} địa điểm trùng)."
     )
+    if failed:
+        print(f"⚠️ {len(failed)} request lỗi mạng/HTTP, sẽ được quét lại ở lần chạy sau.")
+    stats = client.stats()
+    print(f"Thống kê Goong: {stats}")
 
     conn.close()
+    return {
+        "rows": len(processed_ids),
+        "api_calls": sum(s["calls"] for s in stats["endpoints"].values()),
+        # Bị 429 hoặc có request lỗi -> chưa quét xong, lần chạy sau tiếp tục từ checkpoint
+        "complete": not rate_limit_hit and not failed,
+    }
 
 def main():
     """
@@ -432,8 +476,9 @@ def main():
         sys.exit(1)
 
     print("Bắt đầu quá trình quét và xây dựng database quán ăn TP.HCM...")
-    start_scan()
+    result = start_scan()
     print("Hoàn tất.")
+    return result
 
 
 if __name__ == "__main__":
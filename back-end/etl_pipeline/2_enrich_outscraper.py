@@ -1,14 +1,27 @@
 import sqlite3
 import json
-import time
 import re
 import os
+import argparse
+import requests
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from outscraper import ApiClient
 import config  # Import config
+from db_manager import BatchWriter, enable_wal
+from rate_limiter import TokenBucket
+from dedup import distance_m, geohash_encode, geohash_neighbors, name_similarity, normalize_name
 
-# --- CẤU HÌNH PHẠM VI ID ---
-START_ID = 4000      # Sửa lại số này khi chạy thật
-END_ID = 4001    # Quét hết
+# --- TRẠNG THÁI ENRICH ---
+STATUS_OK = "ok"                # Đã lấy được dữ liệu
+STATUS_NOT_FOUND = "not_found"  # Outscraper không trả kết quả
+STATUS_ERROR = "error"          # Lỗi API -> lần chạy sau thử lại ngay
+
+# Backfill trạng thái cho dữ liệu enrich từ trước khi có enrichment_state:
+# dòng raw (Goong) khớp 1 dòng enriched (Google) nếu đủ gần và tên đủ giống
+BACKFILL_GEOHASH_PRECISION = 7  # Ô ~150m, xét cả 8 ô lân cận
+BACKFILL_DISTANCE_M = 100
+BACKFILL_NAME_SIMILARITY = 0.6
 
 # --- PHẦN 1: KHỞI TẠO DATABASE ---
 
@@ -43,21 +56,108 @@ def init_target_db():
             description TEXT
         )
     """)
+
+    # Trạng thái enrich của từng dòng nguồn (DB raw)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'enrichment_state'")
+    state_is_new = cursor.fetchone() is None
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS enrichment_state (
+            source_id INTEGER PRIMARY KEY,
+            place_id TEXT,
+            fetched_at TEXT,
+            status TEXT
+        )
+    """)
     conn.commit()
+    # DB enriched có từ trước (chưa có bảng trạng thái) -> đánh dấu các dòng đã enrich,
+    # tránh lần chạy đầu tiên mua lại toàn bộ catalog từ Outscraper
+    if state_is_new:
+        backfill_enrichment_state(conn)
     conn.close()
 
-def get_source_data(start_id, end_id):
+def backfill_enrichment_state(conn):
+    """
+    Ghép dòng raw với dòng enriched sẵn có (cùng khu vực geohash, <= BACKFILL_DISTANCE_M mét,
+    tên giống >= BACKFILL_NAME_SIMILARITY), ghi trạng thái "ok" với fetched_at = thời điểm
+    sửa file DB enriched (chính sách làm mới theo ngày vẫn áp dụng). Trả về số dòng đã ghi.
+    """
+    enriched = conn.execute(
+        "SELECT place_id, name, latitude, longitude FROM restaurants "
+        "WHERE place_id IS NOT NULL AND latitude IS NOT NULL AND longitude IS NOT NULL"
+    ).fetchall()
+    if not enriched or not os.path.exists(config.DB_RAW_PATH):
+        return 0
+
+    by_cell = {}
+    for place_id, name, lat, lon in enriched:
+        code = geohash_encode(lat, lon, BACKFILL_GEOHASH_PRECISION)
+        by_cell.setdefault(code, []).append((place_id, normalize_name(name), lat, lon))
+
+    raw_conn = sqlite3.connect(config.DB_RAW_PATH)
+    try:
+        raw_rows = raw_conn.execute(
+            "SELECT id, name, latitude, longitude FROM restaurants "
+            "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+        ).fetchall()
+    finally:
+        raw_conn.close()
+
+    mtime = os.path.getmtime(config.DB_ENRICHED_PATH)
+    fetched_at = datetime.utcfromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
+    states = []
+    for src_id, name, lat, lon in raw_rows:
+        norm = normalize_name(name)
+        best = None
+        for cell in geohash_neighbors(geohash_encode(lat, lon, BACKFILL_GEOHASH_PRECISION)):
+            for place_id, kept_norm, e_lat, e_lon in by_cell.get(cell, ()):
+                dist = distance_m(lat, lon, e_lat, e_lon)
+                if dist > BACKFILL_DISTANCE_M:
+                    continue
+                sim = name_similarity(norm, kept_norm)
+                if sim >= BACKFILL_NAME_SIMILARITY and (best is None or (sim, -dist) > best[0]):
+                    best = ((sim, -dist), place_id)
+        if best:
+            states.append((src_id, best[1], fetched_at, STATUS_OK))
+
+    with conn:
+        conn.executemany(STATE_UPSERT_SQL, states)
+    print(f"🗂  Backfill enrichment_state: {len(states)}/{len(raw_rows)} dòng raw đã có dữ liệu enrich.")
+    return len(states)
+
+def get_source_data(start_id=None, end_id=None, refresh_days=None):
+    """
+    Chỉ lấy các dòng CẦN enrich:
+    - chưa có trong enrichment_state
+    - lần trước bị lỗi API
+    - đã enrich quá refresh_days ngày (dữ liệu cũ)
+    start_id / end_id (tùy chọn) giới hạn phạm vi ID nguồn.
+    """
     if not os.path.exists(config.DB_RAW_PATH):
         print(f"❌ Lỗi: Không tìm thấy DB nguồn {config.DB_RAW_PATH}")
         return []
 
+    if refresh_days is None:
+        refresh_days = config.ENRICH_REFRESH_DAYS
+
     conn = sqlite3.connect(config.DB_RAW_PATH)
     cursor = conn.cursor()
     try:
+        cursor.execute("ATTACH DATABASE ? AS enriched", (config.DB_ENRICHED_PATH,))
         cursor.execute(
-            "SELECT id, name, address, latitude, longitude "
-            "FROM restaurants WHERE id BETWEEN ? AND ?",
-            (start_id, end_id),
+            """
+            SELECT r.id, r.name, r.address, r.latitude, r.longitude
+            FROM restaurants r
+            LEFT JOIN enriched.enrichment_state s ON s.source_id = r.id
+            WHERE (? IS NULL OR r.id >= ?)
+              AND (? IS NULL OR r.id <= ?)
+              AND (
+                s.source_id IS NULL
+                OR s.status = ?
+                OR s.fetched_at < datetime('now', ?)
+              )
+            ORDER BY r.id
+            """,
+            (start_id, start_id, end_id, end_id, STATUS_ERROR, f"-{int(refresh_days)} days"),
         )
         return cursor.fetchall()
     except Exception as e:
@@ -161,15 +261,58 @@ def normalize_price_range(raw_range):
     else:
         return "₫₫₫₫"
 
-def save_to_target_db(place_data, source_ref_id):
+ENRICHED_COLUMNS = [
+    "place_id", "name", "full_address", "latitude", "longitude", "street",
+    "borough", "city", "country", "rating", "range", "working_hour",
+    "photo_url", "street_view", "phone", "site",
+    "category", "review_tags", "subtypes", "description",
+]
+
+# Upsert theo place_id: dòng mới thì thêm, dòng làm mới (refresh) thì cập nhật
+ENRICHED_UPSERT_SQL = f"""
+    INSERT INTO restaurants ({", ".join(ENRICHED_COLUMNS)})
+    VALUES ({", ".join("?" for _ in ENRICHED_COLUMNS)})
+    ON CONFLICT(place_id) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in ENRICHED_COLUMNS[1:])}
+"""
+
+STATE_UPSERT_SQL = """
+    INSERT OR REPLACE INTO enrichment_state (source_id, place_id, fetched_at, status)
+    VALUES (?, ?, ?, ?)
+"""
+
+
+class EnrichmentWriter(BatchWriter):
+    """
+    Ghi dữ liệu enriched và enrichment_state trong CÙNG 1 transaction,
+    để không bao giờ có trạng thái "ok" mà thiếu dữ liệu (hoặc ngược lại).
+    Mỗi dòng = (data_row | None, state_row).
+    """
+
+    def __init__(self, conn, batch_size=200, flush_interval=5.0):
+        super().__init__(conn, ENRICHED_UPSERT_SQL, batch_size, flush_interval)
+
+    def add_result(self, source_id, final_data, status):
+        place_id = final_data["place_id"] if final_data else None
+        fetched_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        data_row = tuple(final_data[c] for c in ENRICHED_COLUMNS) if final_data else None
+        self.add((data_row, (source_id, place_id, fetched_at, status)))
+
+    def _write(self, rows):
+        data_rows = [d for d, _ in rows if d]
+        if data_rows:
+            self.conn.executemany(self.sql, data_rows)
+        self.conn.executemany(STATE_UPSERT_SQL, [state for _, state in rows])
+        return len(data_rows), len(rows) - len(data_rows)
+
+
+def build_target_row(place_data):
+    """Chuẩn hóa 1 kết quả Outscraper thành dict theo cột của DB enriched"""
     place_id = place_data.get("place_id")
     name = place_data.get("name")
 
     if not place_id or not name:
-        return
-
-    conn = sqlite3.connect(config.DB_ENRICHED_PATH, timeout=30)
-    cursor = conn.cursor()
+        return None
 
     # --- 1. Trích xuất dữ liệu (Giữ nguyên logic cũ) ---
     full_address = place_data.get("full_address")
@@ -216,7 +359,7 @@ def save_to_target_db(place_data, source_ref_id):
         else subtypes_raw
     )
 
-    final_data = {
+    return {
         "place_id": place_id,
         "name": name,
         "full_address": full_address,
@@ -239,48 +382,79 @@ def save_to_target_db(place_data, source_ref_id):
         "description": description,
     }
 
-    print_debug_data(final_data, source_ref_id)
-
-    # --- 2. SỬ DỤNG INSERT OR IGNORE ---
-    # Cú pháp này tự động bỏ qua nếu trùng UNIQUE key (ở đây là place_id)
-    sql = """
-        INSERT OR IGNORE INTO restaurants (
-            place_id, name, full_address, latitude, longitude, street,
-            borough, city, country, rating, range, working_hour,
-            photo_url, street_view, phone, site,
-            category, review_tags, subtypes, description
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """
 
-    values = tuple(final_data.values())
+def open_target_writer():
+    """1 kết nối dùng suốt phiên enrich + ghi theo lô"""
+    conn = sqlite3.connect(config.DB_ENRICHED_PATH, timeout=30)
+    enable_wal(conn)
+    writer = EnrichmentWriter(
+        conn, batch_size=config.ENRICH_WRITE_BATCH_SIZE, flush_interval=config.ENRICH_FLUSH_INTERVAL,
+    )
+    return conn, writer
 
-    try:
-        cursor.execute(sql, values)
-        conn.commit()
 
-        # Kiểm tra xem có dòng nào thực sự được thêm vào không
-        if cursor.rowcount > 0:
-            print(f"✅ [Dòng {source_ref_id}] Đã lưu mới thành công.")
-        else:
-            # rowcount = 0 nghĩa là nó đã IGNORE (bỏ qua) do trùng lặp
-            print(
-                f"⏭ [Dòng {source_ref_id}] Bỏ qua: "
-                "Dữ liệu đã tồn tại (Trùng Place ID)."
-            )
+def build_query(row):
+    src_id, src_name, src_address, src_lat, src_lng = row
+    return f"{src_name} + {src_address} near {src_lat},{src_lng}"
 
-    except sqlite3.OperationalError as e:
-        if "locked" in str(e):
-            print("❌ Database Locked: Hãy đóng phần mềm xem DB.")
-        else:
-            print(f"❌ Lỗi SQLite: {e}")
-    except Exception as e:
-        print(f"❌ Lỗi chung: {e}")
-    finally:
-        conn.close()
+
+class OutscraperHttpClient:
+    """
+    Gọi thẳng POST {base_url}/google-maps-search (cùng payload với SDK).
+    Dùng khi đặt OUTSCRAPER_BASE_URL (VD mock server) vì SDK cố định URL thật.
+    """
+
+    def __init__(self, base_url, api_key, timeout=60):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["X-API-KEY"] = api_key or ""
+
+    def google_maps_search(self, query, limit=20, language="en", region=None):
+        queries = query if isinstance(query, list) else [query]
+        payload = {
+            "query": queries,
+            "language": language,
+            "region": region,
+            "organizationsPerQueryLimit": limit,
+            "async": False,
+        }
+        r = self.session.post(f"{self.base_url}/google-maps-search", json=payload, timeout=self.timeout)
+        if r.status_code >= 300:
+            raise Exception(f"Response status code: {r.status_code}")
+        body = r.json()
+        if body.get("error"):
+            raise Exception(f"error: {body.get('errorMessage')}")
+        return body.get("data", [])
+
+
+def create_client():
+    if config.OUTSCRAPER_BASE_URL:
+        return OutscraperHttpClient(config.OUTSCRAPER_BASE_URL, config.OUTSCRAPER_API_KEY)
+    return ApiClient(api_key=config.OUTSCRAPER_API_KEY)
+
+
+def fetch_batch(client, limiter, rows):
+    """
+    Gửi nhiều query trong 1 request Outscraper.
+    Trả về list (src_id, place_data | None) theo đúng thứ tự rows.
+    """
+    queries = [build_query(row) for row in rows]
+    limiter.acquire()
+    results = client.google_maps_search(
+        queries, limit=1, language="vi", region="VN"
+    ) or []
+
+    out = []
+    for i, row in enumerate(rows):
+        place_list = results[i] if i < len(results) else None
+        out.append((row[0], place_list[0] if place_list else None))
+    return out
 
 
 # --- PHẦN 3: CHẠY CHƯƠNG TRÌNH ---
-def main():
+def main(start_id=None, end_id=None, refresh_days=None):
+    """Trả về thống kê {"rows", "api_calls"} (None nếu không chạy được)"""
     init_target_db()
     
     # Lấy API Key từ config (Đã sửa lỗi hardcode rỗng)
@@ -288,41 +462,75 @@ def main():
         print("❌ Lỗi: Chưa có OUTSCRAPER_API_KEY trong .env")
         return
 
-    print(f"\n📡 Đang đọc dữ liệu từ dòng {START_ID} đến {END_ID}...")
-    source_rows = get_source_data(START_ID, END_ID)
+    print(
+        f"\n📡 Đang tìm các dòng cần enrich "
+        f"(ID {start_id or 'đầu'} -> {end_id or 'cuối'}, làm mới sau "
+        f"{refresh_days or config.ENRICH_REFRESH_DAYS} ngày)..."
+    )
+    source_rows = get_source_data(start_id, end_id, refresh_days)
 
     if not source_rows:
-        print("⚠ Không tìm thấy dữ liệu nguồn.")
-        return
+        print("✅ Không có dòng nào cần enrich (tất cả đã mới).")
+        return {"rows": 0, "api_calls": 0}
 
-    print(f"📋 Tìm thấy {len(source_rows)} địa điểm. Bắt đầu OutScraper...")
-    client = ApiClient(api_key=config.OUTSCRAPER_API_KEY)
-
-    for row in source_rows:
-        src_id, src_name, src_address, src_lat, src_lng = row
-        query = f"{src_name} + {src_address} near {src_lat},{src_lng}"
-        print(f"🔎 [Dòng {src_id}] Searching: {query}")
-
-        try:
-            results = client.google_maps_search(
-                query, limit=1, language="vi", region="VN"
-            )
-
-            if results and len(results) > 0:
-                place_list = results[0]
-                if place_list and len(place_list) > 0:
-                    save_to_target_db(place_list[0], src_id)
-                else:
-                    print(f"⚠ [Dòng {src_id}] API trả về danh sách rỗng.")
-            else:
-                print(f"⚠ [Dòng {src_id}] Không có dữ liệu trả về.")
-        except Exception as e:
-            print(f"❌ [Dòng {src_id}] Lỗi API: {e}")
+    batch_size = config.ENRICH_QUERY_BATCH_SIZE
+    batches = [source_rows[i:i + batch_size] for i in range(0, len(source_rows), batch_size)]
+    print(
+        f"📋 Tìm thấy {len(source_rows)} địa điểm. Bắt đầu OutScraper "
+        f"({len(batches)} lô x {batch_size} query, {config.ENRICH_MAX_WORKERS} luồng)..."
+    )
+    client = create_client()
+    limiter = TokenBucket(config.ENRICH_RATE_PER_SEC)
+    conn, writer = open_target_writer()
 
-        time.sleep(1)
+    try:
+        with ThreadPoolExecutor(max_workers=config.ENRICH_MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(fetch_batch, client, limiter, batch): batch
+                for batch in batches
+            }
+            # Ghi ở thread chính, qua 1 kết nối duy nhất
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    ids = [row[0] for row in batch]
+                    print(f"❌ [Dòng {ids[0]}-{ids[-1]}] Lỗi API: {e}")
+                    for src_id in ids:
+                        writer.add_result(src_id, None, STATUS_ERROR)
+                    continue
+
+                for src_id, place_data in results:
+                    final_data = build_target_row(place_data) if place_data else None
+                    if not final_data:
+                        print(f"⚠ [Dòng {src_id}] Không có dữ liệu trả về.")
+                        writer.add_result(src_id, None, STATUS_NOT_FOUND)
+                        continue
+                    print_debug_data(final_data, src_id)
+                    writer.add_result(src_id, final_data, STATUS_OK)
+        writer.flush()
+    except sqlite3.OperationalError as e:
+        if "locked" in str(e):
+            print("❌ Database Locked: Hãy đóng phần mềm xem DB.")
+        else:
+            print(f"❌ Lỗi SQLite: {e}")
+        return None
+    finally:
+        conn.close()
 
-    print("\n🎉 Hoàn tất!")
+    print(
+        f"\n🎉 Hoàn tất! Đã ghi (mới/cập nhật): {writer.inserted}, "
+        f"không có dữ liệu/lỗi: {writer.ignored}."
+    )
+    return {"rows": len(source_rows), "api_calls": len(batches)}
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Enrich dữ liệu Goong bằng Outscraper")
+    parser.add_argument("--start-id", type=int, default=None)
+    parser.add_argument("--end-id", type=int, default=None)
+    parser.add_argument("--refresh-days", type=int, default=None,
+                        help="Enrich lại các dòng cũ hơn số ngày này")
+    args = parser.parse_args()
+    main(args.start_id, args.end_id, args.refresh_days)
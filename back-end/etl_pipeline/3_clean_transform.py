@@ -3,15 +3,18 @@ import json
 import re
 import os
 import logging
-import time
-from deep_translator import GoogleTranslator
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import config
+from translation import Translator
+from tag_classifier import build_tag_matcher
 
 # --- CẤU HÌNH ĐƯỜNG DẪN ---
 SOURCE_DB = config.DB_AI_TAGGED  # Input
 TARGET_DB = config.DB_FINAL_PATH # Output
 
-BATCH_SIZE = 1000
+BATCH_SIZE = config.TRANSFORM_CHUNK_SIZE
 
 # Thiết lập Logging
 logging.basicConfig(
@@ -57,9 +60,14 @@ KEYWORDS_CONFIG = {
         "béo": r"\b(trà sữa|carbonara|pizza|gà rán|khoai tây chiên)\b",
         "cay": r"\b(bún bò huế|lẩu thái|mì cay|kimchi)\b",
         "ngọt": r"\b(chè|bánh flan|trà sữa|sinh tố)\b",
-    }
+    },
+    # Gợi ý vị ngọt (bánh, tráng miệng...)
+    "flavor_sweet_hint": r"\b(dessert|bakery|ice cream|trà sữa|chè|bánh)\b",
 }
 
+# Biên dịch toàn bộ từ điển 1 lần -> mỗi dòng chỉ quét text 1 lượt
+TAG_MATCHER = build_tag_matcher(KEYWORDS_CONFIG)
+
 # --- 2. HÀM XỬ LÝ TEXT ---
 def clean_text(text):
     if not text: return ""
@@ -79,50 +87,63 @@ def get_full_text(row):
             
     return clean_text(" ".join(parts))
 
+def _get_val(row, col_name, default=""):
+    """Lấy giá trị an toàn (tránh lỗi nếu cột không tồn tại hoặc NULL)"""
+    return row[col_name] if col_name in row.keys() and row[col_name] is not None else default
+
+_translator = None
+
 def translate_to_english(text):
-    if not text or len(str(text).strip()) < 5: return ""
-    try:
-        return GoogleTranslator(source='auto', target='en').translate(text)
-    except:
-        return text 
+    # Dịch lẻ 1 câu (vẫn đi qua cache). Xử lý hàng loạt thì dùng Translator.translate_many
+    global _translator
+    if _translator is None: _translator = Translator(target="en")
+    return _translator.translate(text)
 
 # --- 3. MAPPING LOGIC ---
-def map_cuisine(text):
-    for cuisine, pattern in KEYWORDS_CONFIG["cuisine"].items():
-        if cuisine != "Việt Nam" and re.search(pattern, text): return cuisine
-    if re.search(KEYWORDS_CONFIG["cuisine"]["Việt Nam"], text): return "Việt Nam"
+# tags: kết quả TAG_MATCHER.match(text), truyền vào để dùng chung cho mọi hàm
+# (không truyền thì tự quét lại text).
+def map_cuisine(text, tags=None):
+    if tags is None: tags = TAG_MATCHER.match(text)
+    for cuisine in KEYWORDS_CONFIG["cuisine"]:
+        if cuisine != "Việt Nam" and ("cuisine", cuisine) in tags: return cuisine
+    if ("cuisine", "Việt Nam") in tags: return "Việt Nam"
     return "Khác"
 
-def map_food_type(text):
-    if re.search(KEYWORDS_CONFIG["food_type"]["chay"], text): return "chay"
+def map_food_type(text, tags=None):
+    if tags is None: tags = TAG_MATCHER.match(text)
+    if ("food_type", "chay") in tags: return "chay"
     return "mặn"
 
-def map_beverage_or_food(text, category):
-    text_check = text + " " + clean_text(category)
-    is_drink = re.search(KEYWORDS_CONFIG["beverage"], text_check)
-    is_food = re.search(KEYWORDS_CONFIG["food_exclusion"], text_check)
+def map_beverage_or_food(text, category, tags=None):
+    category = clean_text(category)
+    # Không có category thì text_check trùng text -> dùng lại tags
+    if tags is None or category:
+        tags = TAG_MATCHER.match(text + " " + category)
+    is_drink = ("beverage", None) in tags
+    is_food = ("food_exclusion", None) in tags
     if is_drink and is_food: return "cả 2"
     if is_drink: return "nước"
     return "khô"
 
-def map_course_type(text, bev_or_food):
+def map_course_type(text, bev_or_food, tags=None):
     if bev_or_food == "nước": return "đồ uống"
-    if re.search(KEYWORDS_CONFIG["course_type"]["tráng miệng"], text): return "tráng miệng"
-    if re.search(KEYWORDS_CONFIG["course_type"]["món khai vị"], text): return "món khai vị"
+    if tags is None: tags = TAG_MATCHER.match(text)
+    if ("course_type", "tráng miệng") in tags: return "tráng miệng"
+    if ("course_type", "món khai vị") in tags: return "món khai vị"
     return "món chính"
 
-def map_flavor(text, cuisine, category, bev_or_food):
-    flavors = set()
-    category = clean_text(category)
-    for flavor, pattern in KEYWORDS_CONFIG["flavor_direct"].items():
-        if re.search(pattern, text): flavors.add(flavor)
-    for flavor, pattern in KEYWORDS_CONFIG["flavor_inference_dishes"].items():
-        if re.search(pattern, text): flavors.add(flavor)
+def map_flavor(text, cuisine, category, bev_or_food, tags=None):
+    if tags is None: tags = TAG_MATCHER.match(text)
+    # dict giữ thứ tự thêm vào -> JSON flavor ổn định giữa các lần chạy
+    flavors = {}
+    for group in ("flavor_direct", "flavor_inference_dishes"):
+        for flavor in KEYWORDS_CONFIG[group]:
+            if (group, flavor) in tags: flavors[flavor] = True
     
-    if re.search(r"\b(dessert|bakery|ice cream|trà sữa|chè|bánh)\b", text): flavors.add("ngọt")
-    if cuisine == "Thái Lan": flavors.update(["chua", "cay"])
-    elif cuisine == "Hàn Quốc": flavors.add("cay")
-    elif cuisine == "Việt Nam" and bev_or_food != "nước" and "ngọt" not in flavors: flavors.add("mặn")
+    if ("flavor_sweet_hint", None) in tags: flavors["ngọt"] = True
+    if cuisine == "Thái Lan": flavors.update(dict.fromkeys(["chua", "cay"], True))
+    elif cuisine == "Hàn Quốc": flavors["cay"] = True
+    elif cuisine == "Việt Nam" and bev_or_food != "nước" and "ngọt" not in flavors: flavors["mặn"] = True
     
     return list(flavors)
 
@@ -158,14 +179,187 @@ def map_price_range(range_str):
     if score == 4: return 2000000, 10000000
     return 0, 5000000
 
-# --- 4. MAIN PROCESSING ---
-def create_processed_db():
+# --- 4. TRANSFORM 1 DÒNG (HÀM THUẦN, CHẠY ĐƯỢC Ở PROCESS CON) ---
+TARGET_COLUMNS = [
+    "place_id", "name", "full_address", "latitude", "longitude",
+    "rating", "working_hour", "photo_url", "street_view", "phone", "site",
+    "category", "review_tags", "subtypes", "description", "description_en", "range",
+    "foodType", "bevFood", "cuisine", "flavor", "courseType", "district",
+    "minPrice", "maxPrice", "content_hash",
+]
+# Upsert theo place_id: dòng mới thì thêm, dòng nguồn thay đổi thì ghi đè
+UPSERT_SQL = f"""
+    INSERT INTO restaurants ({", ".join(TARGET_COLUMNS)})
+    VALUES ({", ".join("?" for _ in TARGET_COLUMNS)})
+    ON CONFLICT(place_id) DO UPDATE SET
+    {", ".join(f"{c} = excluded.{c}" for c in TARGET_COLUMNS[1:])}
+"""
+# Vị trí description / description_en trong tuple (description_en điền sau khi dịch)
+DESC_INDEX, DESC_EN_INDEX = 14, 15
+
+# Tăng số này khi đổi logic gán nhãn -> mọi dòng bị coi là "đã đổi" và xử lý lại
+TRANSFORM_VERSION = 1
+
+def row_content_hash(row):
+    """Hash toàn bộ cột đầu vào của 1 dòng nguồn (trừ id) + phiên bản logic"""
+    payload = {k: v for k, v in row.items() if k != "id"}
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(f"{TRANSFORM_VERSION}:{raw}".encode("utf-8")).hexdigest()
+
+def transform_row(row):
+    """
+    row: dict (sqlite3.Row không pickle được nên đổi sang dict trước khi gửi đi).
+    Trả về tuple theo TARGET_COLUMNS (trừ content_hash, description_en để trống),
+    hoặc None nếu lỗi.
+    """
+    try:
+        # Logic: Lấy địa chỉ từ full_address
+        full_addr = _get_val(row, "full_address")
+
+        full_text = get_full_text(row)
+        category_orig = _get_val(row, "category")
+
+        # Mapping logic (quét từ khóa 1 lượt, dùng chung cho mọi hàm map_*)
+        tags = TAG_MATCHER.match(full_text)
+        cuisine = map_cuisine(full_text, tags)
+        food_type = map_food_type(full_text, tags)
+        bev_food = map_beverage_or_food(full_text, category_orig, tags)
+        course_type = map_course_type(full_text, bev_food, tags)
+        flavor_json = json.dumps(map_flavor(full_text, cuisine, category_orig, bev_food, tags), ensure_ascii=False)
+        district = map_district(full_addr)
+
+        range_raw = _get_val(row, "range")
+        min_p, max_p = map_price_range(range_raw)
+        range_score = calculate_range_score(range_raw)
+
+        return (
+            _get_val(row, "place_id"),
+            _get_val(row, "name"),
+            full_addr,
+            _get_val(row, "latitude", 0.0),
+            _get_val(row, "longitude", 0.0),
+            _get_val(row, "rating", 0.0),
+            _get_val(row, "working_hour"),
+            _get_val(row, "photo_url"),
+            _get_val(row, "street_view"),
+            _get_val(row, "phone"),
+            _get_val(row, "site"),
+            category_orig,
+            _get_val(row, "review_tags"),
+            _get_val(row, "subtypes"),
+            _get_val(row, "description"),
+            "",
+            range_score,
+            food_type, bev_food, cuisine, flavor_json, course_type, district, min_p, max_p
+        )
+    except Exception as e:
+        # logger.warning(f"Error row {row.get('place_id')}: {e}") # Uncomment để debug
+        return None
+
+def iter_source_chunks(src_cur):
+    """Đọc nguồn theo từng lô fetchmany (không fetchall) -> list dict"""
+    while True:
+        chunk = src_cur.fetchmany(BATCH_SIZE)
+        if not chunk:
+            break
+        yield [dict(r) for r in chunk]
+
+def transform_rows(pool, rows, workers):
+    """Gán nhãn song song. pool.map giữ nguyên thứ tự -> kết quả khớp từng dòng của rows"""
+    if pool:
+        chunksize = max(1, len(rows) // (workers * 4))
+        return list(pool.map(transform_row, rows, chunksize=chunksize))
+    return [transform_row(row) for row in rows]
+
+# --- 5. MAIN PROCESSING ---
+TARGET_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS restaurants (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        place_id TEXT UNIQUE,
+        name TEXT,
+        full_address TEXT,
+        latitude REAL,
+        longitude REAL,
+        rating REAL,
+        working_hour TEXT,
+        photo_url TEXT,
+        street_view TEXT,
+        phone TEXT,
+        site TEXT,
+        category TEXT,
+        review_tags TEXT,
+        subtypes TEXT,
+        description TEXT,
+        description_en TEXT,
+        range INTEGER,
+        foodType TEXT,
+        bevFood TEXT,
+        cuisine TEXT,
+        flavor TEXT,
+        courseType TEXT,
+        district TEXT,
+        minPrice INTEGER,
+        maxPrice INTEGER,
+        content_hash TEXT
+    )
+"""
+
+def init_target_table(tgt_cur):
+    tgt_cur.execute(TARGET_SCHEMA)
+    # DB cũ (trước khi có chế độ incremental) chưa có cột content_hash
+    columns = {r[1] for r in tgt_cur.execute("PRAGMA table_info(restaurants)")}
+    if "content_hash" not in columns:
+        tgt_cur.execute("ALTER TABLE restaurants ADD COLUMN content_hash TEXT")
+    tgt_cur.execute("CREATE INDEX IF NOT EXISTS idx_min_price ON restaurants(minPrice)")
+    tgt_cur.execute("CREATE INDEX IF NOT EXISTS idx_range ON restaurants(range)")
+    # Bảng tạm ghi lại place_id còn tồn tại ở nguồn (để xóa dòng đã bị xóa)
+    tgt_cur.execute("CREATE TEMP TABLE seen_ids (place_id TEXT PRIMARY KEY)")
+
+def get_merged_place_ids(tgt_cur, src_conn):
+    """
+    place_id đã bị bước dedup gộp vào quán khác (bảng merge_decisions).
+    Chỉ áp dụng khi quán được giữ lại VẪN còn ở nguồn: quán giữ lại biến mất
+    thì quán trùng được đưa lại vào catalog (bước dedup sẽ xét lại từ đầu).
+    """
+    tgt_cur.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'merge_decisions'")
+    if not tgt_cur.fetchone(): return set()
+    decisions = dict(tgt_cur.execute("SELECT duplicate_place_id, kept_place_id FROM merge_decisions"))
+    kept_ids = list(set(decisions.values()))
+    present = set()
+    for i in range(0, len(kept_ids), 500):
+        part = kept_ids[i:i + 500]
+        placeholders = ",".join("?" for _ in part)
+        present.update(r[0] for r in src_conn.execute(
+            f"SELECT place_id FROM restaurants WHERE place_id IN ({placeholders})", part
+        ))
+    return {dup for dup, kept in decisions.items() if kept in present}
+
+def get_existing_hashes(tgt_cur, place_ids):
+    found = {}
+    # Giới hạn số tham số mỗi câu SQL (SQLite mặc định 999), giống translation.py
+    for i in range(0, len(place_ids), 500):
+        part = place_ids[i:i + 500]
+        placeholders = ",".join("?" for _ in part)
+        tgt_cur.execute(
+            f"SELECT place_id, content_hash FROM restaurants WHERE place_id IN ({placeholders})",
+            part,
+        )
+        found.update(tgt_cur.fetchall())
+    return found
+
+def create_processed_db(full=False):
+    """
+    Mặc định chạy INCREMENTAL: chỉ gán nhãn + dịch những dòng mới hoặc có
+    nội dung thay đổi (so content_hash), upsert vào DB đích, xóa dòng không
+    còn ở nguồn. full=True: xóa DB đích và dựng lại từ đầu.
+    Trả về thống kê {"rows", "api_calls"} (None nếu lỗi).
+    """
     if not os.path.exists(SOURCE_DB):
         logger.error(f"Không tìm thấy DB nguồn: {SOURCE_DB}")
         return
 
-    # Xóa DB cũ nếu có (Tránh lỗi table already exists)
-    if os.path.exists(TARGET_DB):
+    # Xóa DB cũ nếu chạy full (Tránh lỗi table already exists)
+    if full and os.path.exists(TARGET_DB):
         try: os.remove(TARGET_DB)
         except: pass
 
@@ -178,139 +372,86 @@ def create_processed_db():
         tgt_cur = tgt_conn.cursor()
         tgt_cur.execute("PRAGMA synchronous = OFF")
 
-        # Đảm bảo xóa bảng cũ nếu remove file thất bại
-        tgt_cur.execute("DROP TABLE IF EXISTS restaurants")
-
-        # 1. TẠO BẢNG ĐÍCH
-        tgt_cur.execute("""
-            CREATE TABLE restaurants (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                place_id TEXT UNIQUE,
-                name TEXT,
-                full_address TEXT,
-                latitude REAL,
-                longitude REAL,
-                rating REAL,
-                working_hour TEXT,
-                photo_url TEXT,
-                street_view TEXT,
-                phone TEXT,
-                site TEXT,
-                category TEXT,
-                review_tags TEXT,
-                subtypes TEXT,
-                description TEXT,
-                description_en TEXT,
-                range INTEGER,
-                foodType TEXT,
-                bevFood TEXT,
-                cuisine TEXT,
-                flavor TEXT,
-                courseType TEXT,
-                district TEXT,
-                minPrice INTEGER,
-                maxPrice INTEGER
-            )
-        """)
+        if full:
+            # Đảm bảo xóa bảng cũ nếu remove file thất bại
+            tgt_cur.execute("DROP TABLE IF EXISTS restaurants")
+
+        # 1. TẠO BẢNG ĐÍCH (nếu chưa có)
+        init_target_table(tgt_cur)
+        # Dòng không có place_id thì không so khớp được -> luôn xử lý lại
+        tgt_cur.execute("DELETE FROM restaurants WHERE place_id IS NULL")
+        merged_ids = get_merged_place_ids(tgt_cur, src_conn)
 
         logger.info("Đang đọc dữ liệu từ DB nguồn...")
-        
-        # --- QUAN TRỌNG: CHỈ SELECT CÁC CỘT CÓ TRONG MODELS.PY ---
-        # Không select street, borough, city, country
+        total_rows = src_cur.execute("SELECT COUNT(*) FROM restaurants").fetchone()[0]
+
+        # --- QUAN TRỌNG: CHỈ INSERT CÁC CỘT CÓ TRONG MODELS.PY ---
+        # Không lấy street, borough, city, country
         src_cur.execute("SELECT * FROM restaurants")
-        rows = src_cur.fetchall()
-        
-        batch_data = []
-        count = 0
-        total_rows = len(rows)
-
-        insert_sql = """
-            INSERT INTO restaurants (
-                place_id, name, full_address, latitude, longitude,
-                rating, working_hour, photo_url, street_view, phone, site,
-                category, review_tags, subtypes, description, description_en, range,
-                foodType, bevFood, cuisine, flavor, courseType, district,
-                minPrice, maxPrice
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-
-        print("🚀 Đang xử lý và dịch dữ liệu...")
-
-        for row in rows:
-            try:
-                # Helper function để lấy giá trị an toàn (tránh lỗi nếu cột không tồn tại)
-                def get_val(col_name, default=""):
-                    return row[col_name] if col_name in row.keys() and row[col_name] is not None else default
-
-                # Logic: Lấy địa chỉ từ full_address
-                full_addr = get_val("full_address")
-                
-                full_text = get_full_text(row)
-                category_orig = get_val("category")
-
-                # Mapping logic
-                cuisine = map_cuisine(full_text)
-                food_type = map_food_type(full_text)
-                bev_food = map_beverage_or_food(full_text, category_orig)
-                course_type = map_course_type(full_text, bev_food)
-                flavor_json = json.dumps(map_flavor(full_text, cuisine, category_orig, bev_food), ensure_ascii=False)
-                district = map_district(full_addr)
-                
-                range_raw = get_val("range")
-                min_p, max_p = map_price_range(range_raw)
-                range_score = calculate_range_score(range_raw)
-
-                # Dịch thuật
-                desc_vi = get_val("description")
-                desc_en = ""
-                if desc_vi:
-                    desc_en = translate_to_english(desc_vi)
-                    if count % 20 == 0 and count > 0: time.sleep(0.5)
-
-                data_tuple = (
-                    get_val("place_id"), 
-                    get_val("name"), 
-                    full_addr, 
-                    get_val("latitude", 0.0), 
-                    get_val("longitude", 0.0),
-                    get_val("rating", 0.0), 
-                    get_val("working_hour"), 
-                    get_val("photo_url"), 
-                    get_val("street_view"), 
-                    get_val("phone"), 
-                    get_val("site"),
-                    category_orig, 
-                    get_val("review_tags"), 
-                    get_val("subtypes"),
-                    desc_vi, 
-                    desc_en, 
-                    range_score,
-                    food_type, bev_food, cuisine, flavor_json, course_type, district, min_p, max_p
-                )
-                batch_data.append(data_tuple)
-                count += 1
-
-                if len(batch_data) >= BATCH_SIZE:
-                    tgt_cur.executemany(insert_sql, batch_data)
-                    tgt_conn.commit()
-                    batch_data = []
-                    logger.info(f"Progress: {count}/{total_rows}")
-
-            except Exception as e:
-                # logger.warning(f"Error row {count}: {e}") # Uncomment để debug
-                continue
-
-        if batch_data:
-            tgt_cur.executemany(insert_sql, batch_data)
-            tgt_conn.commit()
-
-        # Tạo Index
-        try:
-            tgt_cur.execute("CREATE INDEX idx_min_price ON restaurants(minPrice)")
-            tgt_cur.execute("CREATE INDEX idx_range ON restaurants(range)")
-        except: pass
 
-        logger.info(f"✅ XONG! Tổng cộng {count} nhà hàng.")
+        scanned = 0
+        stats = {"new": 0, "updated": 0, "unchanged": 0}
+        translator = Translator(target="en")
+        workers = config.TRANSFORM_WORKERS
+        pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        mode = "full" if full else "incremental"
+        print(f"🚀 Đang xử lý và dịch dữ liệu ({mode}, {workers} process)...")
+
+        try:
+            for rows in iter_source_chunks(src_cur):
+                scanned += len(rows)
+                # Quán đã bị gộp ở bước dedup -> không đưa lại vào catalog
+                rows = [r for r in rows if r.get("place_id") not in merged_ids]
+                place_ids = [r["place_id"] for r in rows if r.get("place_id")]
+                tgt_cur.executemany("INSERT OR IGNORE INTO seen_ids VALUES (?)", [(p,) for p in place_ids])
+
+                # So hash với DB đích, chỉ giữ dòng mới / thay đổi
+                existing = get_existing_hashes(tgt_cur, place_ids)
+                changed, hashes = [], []
+                for row in rows:
+                    content_hash = row_content_hash(row)
+                    if existing.get(row.get("place_id")) == content_hash:
+                        stats["unchanged"] += 1
+                        continue
+                    stats["updated" if row.get("place_id") in existing else "new"] += 1
+                    changed.append(row)
+                    hashes.append(content_hash)
+
+                if changed:
+                    results = transform_rows(pool, changed, workers)
+                    pairs = [(t, h) for t, h in zip(results, hashes) if t is not None]
+
+                    # Dịch thuật cả lô (cache + bỏ trùng + song song), chạy ở process chính
+                    descs_en, translated_ok = translator.translate_many_with_status([t[DESC_INDEX] for t, _ in pairs])
+                    # Dịch lỗi -> content_hash = NULL để lần chạy sau coi là "đã đổi" và dịch lại
+                    data_rows = [
+                        t[:DESC_EN_INDEX] + (desc_en,) + t[DESC_EN_INDEX + 1:] + (content_hash if ok else None,)
+                        for (t, content_hash), desc_en, ok in zip(pairs, descs_en, translated_ok)
+                    ]
+                    tgt_cur.executemany(UPSERT_SQL, data_rows)
+                tgt_conn.commit()
+                logger.info(f"Progress: {scanned}/{total_rows}")
+        finally:
+            if pool: pool.shutdown()
+
+        # Dòng đích không còn ở nguồn -> xóa
+        tgt_cur.execute("DELETE FROM restaurants WHERE place_id NOT IN (SELECT place_id FROM seen_ids)")
+        deleted = tgt_cur.rowcount
+        tgt_conn.commit()
+
+        logger.info(
+            f"✅ XONG! Đã quét {scanned} nhà hàng: {stats['new']} mới, {stats['updated']} cập nhật, "
+            f"{stats['unchanged']} không đổi, {deleted} đã xóa."
+        )
+        logger.info(
+            f"🌐 Dịch: {translator.stats['cache_hits']} lấy từ cache, "
+            f"{translator.stats['translated']} dịch mới, {translator.stats['failed']} lỗi."
+        )
+        translator.close()
+        return {
+            "rows": scanned,
+            "api_calls": translator.stats["translated"] + translator.stats["failed"],
+        }
 
     except Exception as e:
         logger.error(f"FATAL ERROR: {e}")
@@ -318,7 +459,7 @@ def create_processed_db():
         if "src_conn" in locals(): src_conn.close()
         if "tgt_conn" in locals(): tgt_conn.close()
 
-# --- 5. TEST FUNCTION ---
+# --- 6. TEST FUNCTION ---
 def test_results():
     if not os.path.exists(TARGET_DB):
         return
@@ -340,5 +481,9 @@ def test_results():
     conn.close()
 
 if __name__ == "__main__":
-    create_processed_db()
+    parser = argparse.ArgumentParser(description="Làm sạch, gán nhãn và dịch dữ liệu")
+    parser.add_argument("--full", action="store_true",
+                        help="Xóa DB đích và xử lý lại toàn bộ (mặc định: incremental)")
+    args = parser.parse_args()
+    create_processed_db(full=args.full)
     test_results()
\ No newline at end of file
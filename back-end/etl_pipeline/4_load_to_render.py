@@ -1,10 +1,16 @@
 import sys
 import os
+import io
+import json
+import argparse
 import sqlite3
 import hashlib
 import time
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from psycopg2.extras import execute_values
+from sqlalchemy import create_engine, inspect
 
 # --- PATH CONFIGURATION ---
 current_file_path = os.path.abspath(__file__)
@@ -22,20 +28,23 @@ except ImportError as e:
     print(f"❌ Error importing config: {e}")
     sys.exit(1)
 
-try:
-    # Import Restaurant để đẩy dữ liệu
-    # Import Base (nếu có) hoặc dùng Restaurant.metadata để tạo bảng
-    from models import Restaurant
-except ImportError as e:
-    print(f"❌ Error importing models: {e}")
-    sys.exit(1)
-
 # ==============================================================================
 # CONFIGURATION
 # ==============================================================================
-START_ID = 1      
-END_ID = 3000     # Tăng range lên để chắc chắn cover hết
-BATCH_SIZE = 50   
+# Cột trên server (tên cột thật, VD foodType -> foodtype) theo thứ tự COPY
+LOAD_COLUMNS = [
+    "place_id", "name", "full_address", "latitude", "longitude", "rating",
+    "working_hour", "photo_url", "phone", "site", "description", "description_en",
+    "street_view", "category", "subtypes", "range",
+    "foodtype", "bevfood", "cuisine", "flavor", "coursetype", "district",
+    "minprice", "maxprice",
+]
+STAGING_TABLE = "restaurants_staging"
+# Hash 1 dòng restaurants tính bằng SQL trên server (alias r)
+SERVER_HASH_SQL = "md5(ROW(" + ", ".join(f"r.{c}" for c in LOAD_COLUMNS) + ")::text)"
+
+# Bảng restaurant_sync_state / catalog_versions (kể cả cột server_hash) do migrations tạo:
+# migrations/versions/0003_sync_state.py, 0004_sync_server_hash.py
 
 # Hàm tạo ID duy nhất (Deterministic ID)
 def generate_deterministic_id(name, address):
@@ -46,22 +55,189 @@ def generate_deterministic_id(name, address):
     return f"imp_{hashlib.md5(raw_str.encode('utf-8')).hexdigest()[:10]}"
 
 # ==============================================================================
+# CHUẨN HÓA 1 DÒNG SQLITE -> BẢN GHI SERVER
+# ==============================================================================
+def row_to_record(row):
+    """Trả về tuple theo LOAD_COLUMNS"""
+    # 1. Tên & Địa chỉ
+    r_name = row['name']
+    r_district = row['district']
+    r_full_address = row['full_address'] if 'full_address' in row.keys() else r_district
 
-def transfer_data_final():
-    source_db = config.DB_FINAL_PATH
-    
-    if not os.path.exists(source_db):
-        print(f"❌ SQLite file not found at: {source_db}")
+    # 2. Xử lý ID
+    if row['place_id']:
+        place_id = row['place_id']
+    else:
+        place_id = generate_deterministic_id(r_name, r_full_address)
+
+    # 3. Xử lý Range (Quan trọng: SQLite giờ đã là số)
+    # Nếu trong SQLite range là NULL, ta gán mặc định là 1
+    val_range = row['range']
+    if val_range is None:
+        val_range = 1
+    else:
+        # Đảm bảo ép kiểu về int
+        try:
+            val_range = int(val_range)
+        except:
+            val_range = 1
+
+    return (
+        place_id,
+        r_name,
+        r_full_address,
+        row['latitude'] or 0.0,
+        row['longitude'] or 0.0,
+        row['rating'] or 0.0,
+        row['working_hour'],
+        row['photo_url'],
+        row['phone'],
+        row['site'],
+        row['description'],
+        row['description_en'],
+        row['street_view'],
+        row['category'],
+        row['subtypes'],
+        # Cột range trên server là chuỗi
+        str(val_range),
+        # Các cột phân loại AI
+        row['foodType'],
+        row['bevFood'],
+        row['cuisine'],
+        row['flavor'],
+        row['courseType'],
+        r_district,
+        # Giá tiền
+        row['minPrice'] or 0,
+        row['maxPrice'] or 0,
+    )
+
+def _csv_field(value):
+    """
+    Định dạng 1 ô cho COPY ... (FORMAT csv):
+    None -> ô trống không ngoặc (= NULL), chuỗi luôn trong ngoặc kép ("" = chuỗi rỗng)
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+class CsvStream(io.TextIOBase):
+    """File "ảo" cho COPY: sinh CSV dần dần từ iterator bản ghi, không giữ cả bảng trong RAM"""
+
+    def __init__(self, records):
+        self._records = iter(records)
+        self._pending = ""
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        lines = []
+        length = len(self._pending)
+        while size < 0 or length < size:
+            record = next(self._records, None)
+            if record is None:
+                break
+            line = ",".join(_csv_field(v) for v in record) + "\n"
+            lines.append(line)
+            length += len(line)
+            self.count += 1
+        data = self._pending + "".join(lines)
+        if size < 0:
+            size = len(data)
+        out, self._pending = data[:size], data[size:]
+        return out
+
+# ==============================================================================
+# COPY VÀO BẢNG TẠM + MERGE 1 CÂU LỆNH
+# ==============================================================================
+def copy_to_staging(cur, records):
+    """Tạo bảng tạm (cùng kiểu cột với restaurants) và COPY dữ liệu vào. Trả về số dòng."""
+    cols = ", ".join(LOAD_COLUMNS)
+    cur.execute(
+        f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS "
+        f"SELECT {cols} FROM restaurants WITH NO DATA"
+    )
+    # Thứ tự trong file nguồn -> khi trùng place_id thì giữ dòng đầu tiên
+    cur.execute(f"ALTER TABLE {STAGING_TABLE} ADD COLUMN src_order BIGSERIAL")
+    stream = CsvStream(records)
+    cur.copy_expert(f"COPY {STAGING_TABLE} ({cols}) FROM STDIN WITH (FORMAT csv)", stream)
+    return stream.count
+
+def merge_staging(cur):
+    """
+    INSERT ... ON CONFLICT (place_id) DO UPDATE: thêm dòng mới, cập nhật dòng
+    đã có. Trả về (số dòng thêm mới, số dòng cập nhật).
+    """
+    cols = ", ".join(LOAD_COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in LOAD_COLUMNS[1:])
+    cur.execute(f"""
+        WITH merged AS (
+            INSERT INTO restaurants ({cols})
+            SELECT DISTINCT ON (place_id) {cols}
+            FROM {STAGING_TABLE}
+            ORDER BY place_id, src_order
+            ON CONFLICT (place_id) DO UPDATE SET {updates}
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+        FROM merged
+    """)
+    return cur.fetchone()
+
+def iter_records(cursor):
+    for row in cursor:
+        try:
+            yield row_to_record(row)
+        except Exception as e:
+            # In lỗi chi tiết nhưng không dừng chương trình
+            print(f"⚠️ Error on row ID {row['id']}: {e}")
+
+# ==============================================================================
+
+class SchemaNotReadyError(RuntimeError):
+    """DB đích chưa ở revision Alembic mới nhất -> người vận hành phải migrate trước khi nạp"""
+    pass
+
+def check_schema(pg_engine):
+    """
+    Migrate là bước riêng, chạy tay (README - Step 5), ETL KHÔNG tự chạy alembic trên production.
+    Ném SchemaNotReadyError kèm lệnh cần chạy nếu DB chưa ở head.
+    """
+    head = ScriptDirectory.from_config(AlembicConfig(os.path.join(backend_dir, "alembic.ini"))).get_current_head()
+    with pg_engine.connect() as conn:
+        current = MigrationContext.configure(conn).get_current_revision()
+        tables = set(inspect(conn).get_table_names())
+    if current == head:
         return
+    migrate_cmd = "cd back-end && alembic -x db_url=<DATABASE_URL_RENDER> upgrade head"
+    if current is None and "restaurants" in tables:
+        # Bảng tạo bằng db.create_all() trước đây, chưa có alembic_version -> upgrade sẽ lỗi "already exists"
+        raise SchemaNotReadyError(
+            "Server DB has tables but no alembic_version (created by db.create_all()). "
+            "Stamp it with the revision it matches (alembic stamp 0001_initial or 0002_lookup_indexes, "
+            f"see README - Step 5), then run: {migrate_cmd}"
+        )
+    raise SchemaNotReadyError(
+        f"Server DB schema is at revision {current or '(empty)'}, expected {head}. Run: {migrate_cmd}"
+    )
 
-    # ---------------------------------------------------------
-    # 1. Connect to Render (PostgreSQL)
-    # ---------------------------------------------------------
+def connect_render():
+    """
+    Kết nối Render (PostgreSQL). Lỗi kết nối -> None.
+    Schema chưa migrate -> ném SchemaNotReadyError (không nuốt lỗi, người vận hành phải xử lý).
+    """
     print("☁️  Connecting to Render Server...")
     db_url = config.RENDER_DB_URL
     
     if db_url and db_url.startswith("postgres://"):
         db_url = db_url.replace("postgres://", "postgresql://", 1)
+    # COPY dùng cursor.copy_expert của psycopg2 -> chỉ định rõ driver
+    if db_url and db_url.startswith("postgresql://"):
+        db_url = db_url.replace("postgresql://", "postgresql+psycopg2://", 1)
     
     # Force UTF-8 encoding
     if "?" not in db_url:
@@ -71,163 +247,227 @@ def transfer_data_final():
         
     try:
         pg_engine = create_engine(db_url)
-        Session = sessionmaker(bind=pg_engine)
-        session = Session()
+        with pg_engine.connect():
+            pass
         print("✅ Connected to Server successfully!")
-        
-        # --- FIX QUAN TRỌNG: TẠO BẢNG NẾU CHƯA CÓ ---
-        # Lệnh này sẽ kiểm tra model Restaurant và tạo bảng 'restaurants' trên server
-        # nếu nó chưa tồn tại. Khắc phục lỗi "relation does not exist".
-        print("🛠  Checking/Creating table schema on Server...")
-        Restaurant.metadata.create_all(pg_engine)
-        print("✅ Schema checked/created.")
-        
     except Exception as e:
-        print(f"❌ Render Connection/Schema Error: {e}")
+        print(f"❌ Render Connection Error: {e}")
+        return None
+
+    # --- KIỂM TRA SCHEMA (ALEMBIC) ---
+    # Bảng do migrations tạo (như API), ETL chỉ kiểm tra revision -> không tự migrate production
+    print("🛠  Checking table schema on Server...")
+    check_schema(pg_engine)
+    print("✅ Schema is up to date.")
+    return pg_engine
+
+def open_sqlite(source_db, start_id=None, end_id=None):
+    """Cursor đọc dần các dòng SQLite (start_id / end_id tùy chọn)"""
+    sqlite_conn = sqlite3.connect(source_db)
+    sqlite_conn.row_factory = sqlite3.Row
+    cursor = sqlite_conn.cursor()
+    cursor.execute(
+        "SELECT * FROM restaurants "
+        "WHERE (? IS NULL OR id >= ?) AND (? IS NULL OR id <= ?) ORDER BY id",
+        (start_id, start_id, end_id, end_id)
+    )
+    return sqlite_conn, cursor
+
+def transfer_data_final(start_id=None, end_id=None):
+    """Đẩy TOÀN BỘ (hoặc 1 khoảng ID) lên server: COPY + merge"""
+    source_db = config.DB_FINAL_PATH
+    
+    if not os.path.exists(source_db):
+        print(f"❌ SQLite file not found at: {source_db}")
         return
 
     # ---------------------------------------------------------
-    # 2. Get existing IDs from Server
+    # 1. Connect to Render (PostgreSQL)
     # ---------------------------------------------------------
-    print("🔍 Checking existing data on Server...")
-    existing_ids = set()
-    try:
-        result = session.execute(text("SELECT place_id FROM restaurants"))
-        for row in result:
-            existing_ids.add(row[0])
-        print(f"   -> Found {len(existing_ids)} restaurants already on Server.")
-    except Exception as e:
-        print(f"⚠️  Could not fetch existing IDs (Table empty or error): {e}")
+    pg_engine = connect_render()
+    if pg_engine is None:
+        return
 
     # ---------------------------------------------------------
-    # 3. Read data from SQLite
+    # 2. Stream SQLite -> COPY vào bảng tạm -> merge
     # ---------------------------------------------------------
-    print(f"🔌 Reading SQLite data (ID {START_ID} -> {END_ID})...")
-    sqlite_conn = sqlite3.connect(source_db)
-    sqlite_conn.row_factory = sqlite3.Row
-    cursor = sqlite_conn.cursor()
-    
+    print(f"🔌 Reading SQLite data (ID {start_id or 'first'} -> {end_id or 'last'})...")
     try:
-        cursor.execute(
-            "SELECT * FROM restaurants WHERE id BETWEEN ? AND ?", 
-            (START_ID, END_ID)
-        )
-        rows = cursor.fetchall()
+        sqlite_conn, cursor = open_sqlite(source_db, start_id, end_id)
     except Exception as e:
         print(f"❌ SQLite Read Error: {e}")
         return
 
-    # ---------------------------------------------------------
-    # 4. Filter and Load Data
-    # ---------------------------------------------------------
-    print(f"🚀 Processing {len(rows)} rows...")
-    count_success = 0
-    count_skipped = 0
-    current_batch = []
+    # COPY chỉ có ở driver psycopg2 -> dùng raw connection của engine
+    started = time.perf_counter()
+    pg_conn = pg_engine.raw_connection()
+    try:
+        with pg_conn.cursor() as pg_cur:
+            print("🚀 Streaming rows to Server with COPY...")
+            hashes = {}
+            scanned = copy_to_staging(pg_cur, iter_hashed_records(iter_records(cursor), hashes))
+            print(f"   ---> Staged: {scanned} rows")
+            inserted, updated = merge_staging(pg_cur)
+            # Ghi lại trạng thái sync -> lần sync sau chỉ đẩy phần thay đổi
+            save_sync_state(pg_cur, hashes)
+        pg_conn.commit()
+    except Exception as e:
+        pg_conn.rollback()
+        print(f"❌ Load Error (rolled back): {e}")
+        return
+    finally:
+        pg_conn.close()
+        sqlite_conn.close()
+    elapsed = time.perf_counter() - started
+    
+    print("================================================")
+    print(f"🎉 FINISHED in {elapsed:.1f}s!")
+    print(f"   - Total Scanned: {scanned}")
+    print(f"   - Newly Loaded: {inserted}")
+    print(f"   - Updated: {updated}")
+    print("================================================")
+    return {"rows": scanned, "api_calls": 0}
 
-    for i, row in enumerate(rows):
-        try:
-            # --- XỬ LÝ DỮ LIỆU ---
-            
-            # 1. Tên & Địa chỉ
-            r_name = row['name']
-            r_district = row['district']
-            r_full_address = row['full_address'] if 'full_address' in row.keys() else r_district
-
-            # 2. Xử lý ID
-            if row['place_id']:
-                place_id = row['place_id']
-            else:
-                place_id = generate_deterministic_id(r_name, r_full_address)
-            
-            # SKIP nếu đã tồn tại
-            if place_id in existing_ids:
-                count_skipped += 1
-                continue
-
-            # 3. Xử lý Range (Quan trọng: SQLite giờ đã là số)
-            # Nếu trong SQLite range là NULL, ta gán mặc định là 1
-            val_range = row['range']
-            if val_range is None: 
-                val_range = 1
-            else:
-                # Đảm bảo ép kiểu về int
-                try:
-                    val_range = int(val_range)
-                except:
-                    val_range = 1
-
-            # 4. Tạo Object Restaurant
-            new_res = Restaurant(
-                place_id=place_id,
-                name=r_name,
-                full_address=r_full_address,
-                
-                latitude=row['latitude'] or 0.0,
-                longitude=row['longitude'] or 0.0,
-                rating=row['rating'] or 0.0,
-                working_hour=row['working_hour'],
-                photo_url=row['photo_url'],
-                phone=row['phone'],
-                site=row['site'],
-                description=row['description'],
-                description_en=row['description_en'],
-
-                street_view=row['street_view'],
-                category=row['category'],
-                subtypes=row['subtypes'],
-                
-                # Cột range giờ là số nguyên (Integer)
-                range=val_range,
-                
-                # Các cột phân loại AI
-                foodType=row['foodType'],
-                bevFood=row['bevFood'],
-                cuisine=row['cuisine'],
-                flavor=row['flavor'],
-                courseType=row['courseType'],
-                district=r_district,
-                
-                # Giá tiền
-                minPrice=row['minPrice'] or 0,
-                maxPrice=row['maxPrice'] or 0
-            )
-            
-            current_batch.append(new_res)
-            existing_ids.add(place_id) 
-
-            # Gửi Batch
-            if len(current_batch) >= BATCH_SIZE:
-                session.bulk_save_objects(current_batch)
-                session.commit()
-                count_success += len(current_batch)
-                print(f"   ---> Loaded: {count_success} (Skipped so far: {count_skipped})")
-                current_batch = [] 
+# ==============================================================================
+# SYNC THEO DIFF (chỉ đẩy dòng thêm / sửa / xóa)
+# ==============================================================================
+def record_hash(record):
+    raw = json.dumps(record, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
-        except Exception as e:
-            session.rollback()
-            # In lỗi chi tiết nhưng không dừng chương trình
-            print(f"⚠️ Error on row ID {row['id']}: {e}")
-            current_batch = []
+def iter_hashed_records(records, hashes):
+    """Cho record đi qua, đồng thời ghi {place_id: hash} của dòng đầu tiên mỗi place_id"""
+    for record in records:
+        hashes.setdefault(record[0], record_hash(record))
+        yield record
 
-    # Load nốt batch cuối cùng
-    if current_batch:
-        try:
-            session.bulk_save_objects(current_batch)
-            session.commit()
-            count_success += len(current_batch)
-        except Exception as e:
-            print(f"⚠️ Error saving final batch: {e}")
+def fetch_server_hashes(cur):
+    """
+    {place_id: row_hash} của các dòng đã sync. Dòng trên server đã bị sửa/xóa
+    kể từ lần sync trước (hash server tính lại khác server_hash) -> None để đẩy lại.
+    """
+    cur.execute(f"""
+        SELECT s.place_id,
+               CASE WHEN {SERVER_HASH_SQL} = s.server_hash THEN s.row_hash END
+        FROM restaurant_sync_state s
+        LEFT JOIN restaurants r ON r.place_id = s.place_id
+    """)
+    return dict(cur.fetchall())
+
+def save_sync_state(cur, hashes):
+    """Upsert row_hash (local) và server_hash (tính bằng SQL trên dòng vừa ghi) cho các place_id"""
+    if not hashes:
+        return
+    execute_values(
+        cur,
+        "INSERT INTO restaurant_sync_state (place_id, row_hash, synced_at) VALUES %s "
+        "ON CONFLICT (place_id) DO UPDATE SET "
+        "row_hash = EXCLUDED.row_hash, synced_at = EXCLUDED.synced_at",
+        list(hashes.items()),
+        template="(%s, %s, now())",
+    )
+    cur.execute(
+        f"UPDATE restaurant_sync_state s SET server_hash = {SERVER_HASH_SQL} "
+        f"FROM restaurants r WHERE r.place_id = s.place_id AND s.place_id = ANY(%s)",
+        (list(hashes),),
+    )
+
+def diff_catalog(cursor, server_hashes):
+    """
+    So hash từng dòng local với hash đã đồng bộ lần trước trên server
+    (None = dòng trên server đã bị sửa/xóa -> luôn đẩy lại).
+    Trả về (records cần đẩy, {place_id: hash} của chúng, place_id cần xóa, tổng số dòng local)
+    """
+    changed, changed_hashes, local_ids = [], {}, set()
+    for record in iter_records(cursor):
+        place_id = record[0]
+        # Trùng place_id -> giữ dòng đầu tiên (giống DISTINCT ON ở merge)
+        if place_id in local_ids:
+            continue
+        local_ids.add(place_id)
+        row_hash = record_hash(record)
+        if server_hashes.get(place_id) != row_hash:
+            changed.append(record)
+            changed_hashes[place_id] = row_hash
+    # Chỉ xóa dòng do sync tạo ra trước đó (có trong restaurant_sync_state)
+    deleted = [pid for pid in server_hashes if pid not in local_ids]
+    return changed, changed_hashes, deleted, len(local_ids)
+
+def sync_catalog():
+    """
+    Đồng bộ theo diff: chỉ COPY các dòng mới/thay đổi, xóa dòng không còn ở
+    local, rồi ghi 1 dòng phiên bản vào catalog_versions. Tất cả trong 1 transaction.
+    """
+    source_db = config.DB_FINAL_PATH
+
+    if not os.path.exists(source_db):
+        print(f"❌ SQLite file not found at: {source_db}")
+        return
+
+    pg_engine = connect_render()
+    if pg_engine is None:
+        return
+
+    started = time.perf_counter()
+    sqlite_conn = None
+    pg_conn = pg_engine.raw_connection()
+    try:
+        with pg_conn.cursor() as pg_cur:
+            print("🔍 Fetching row hashes from Server...")
+            server_hashes = fetch_server_hashes(pg_cur)
+            print(f"   -> {len(server_hashes)} restaurants synced previously.")
+
+            print("🔌 Diffing local SQLite data...")
+            sqlite_conn, cursor = open_sqlite(source_db)
+            changed, changed_hashes, deleted, total = diff_catalog(cursor, server_hashes)
+            print(f"   -> {len(changed)} new/changed, {len(deleted)} deleted, {total} total.")
+
+            inserted = updated = 0
+            if changed:
+                copy_to_staging(pg_cur, changed)
+                inserted, updated = merge_staging(pg_cur)
+                save_sync_state(pg_cur, changed_hashes)
+            if deleted:
+                pg_cur.execute("DELETE FROM restaurants WHERE place_id = ANY(%s)", (deleted,))
+                pg_cur.execute("DELETE FROM restaurant_sync_state WHERE place_id = ANY(%s)", (deleted,))
+
+            pg_cur.execute(
+                "INSERT INTO catalog_versions (inserted, updated, deleted, total) "
+                "VALUES (%s, %s, %s, %s) RETURNING id",
+                (inserted, updated, len(deleted), total),
+            )
+            version = pg_cur.fetchone()[0]
+        pg_conn.commit()
+    except Exception as e:
+        pg_conn.rollback()
+        print(f"❌ Sync Error (rolled back): {e}")
+        return
+    finally:
+        pg_conn.close()
+        if sqlite_conn: sqlite_conn.close()
+    elapsed = time.perf_counter() - started
 
-    session.close()
-    sqlite_conn.close()
-    
     print("================================================")
-    print(f"🎉 FINISHED!")
-    print(f"   - Total Scanned: {len(rows)}")
-    print(f"   - Newly Loaded: {count_success}")
-    print(f"   - Skipped (Duplicate): {count_skipped}")
+    print(f"🎉 SYNCED catalog version {version} in {elapsed:.1f}s!")
+    print(f"   - Inserted: {inserted}")
+    print(f"   - Updated: {updated}")
+    print(f"   - Deleted: {len(deleted)}")
+    print(f"   - Unchanged: {total - len(changed)}")
     print("================================================")
+    return {"rows": total, "api_calls": 0}
 
 if __name__ == "__main__":
-    transfer_data_final()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Nạp dữ liệu đã xử lý lên Render (PostgreSQL)")
+    parser.add_argument("--mode", choices=["sync", "full"], default="sync",
+                        help="sync: chỉ đẩy phần thay đổi (mặc định); full: COPY + merge toàn bộ")
+    parser.add_argument("--start-id", type=int, default=None, help="Chỉ dùng với --mode full")
+    parser.add_argument("--end-id", type=int, default=None, help="Chỉ dùng với --mode full")
+    args = parser.parse_args()
+    try:
+        if args.mode == "sync":
+            sync_catalog()
+        else:
+            transfer_data_final(args.start_id, args.end_id)
+    except SchemaNotReadyError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import config
+
+# pyarrow là thư viện tùy chọn: chỉ bước export cần tới (pip install pyarrow)
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# ==============================================================================
+# XUẤT CATALOG DẠNG CỘT (PARQUET + ARROW)
+# ==============================================================================
+# - Đọc 4_processed_data.db theo lô, ép kiểu sẵn các cột số
+# - Cột phân loại (cuisine, district...) mã hóa dictionary -> file nhỏ, lọc nhanh
+# - flavor (JSON) parse sẵn thành list<string>
+# - Ghi 2 file cạnh file SQLite:
+#     .parquet : nén, dùng cho phân tích / lưu trữ
+#     .arrow   : Arrow IPC không nén, memory-map được (pa.memory_map)
+# - Kiểm tra lại kết quả với SQLite sau khi ghi
+
+SOURCE_DB = config.DB_FINAL_PATH
+CHUNK_SIZE = 5000
+
+CATEGORICAL_COLUMNS = ["foodType", "bevFood", "cuisine", "courseType", "district"]
+STRING_COLUMNS = [
+    "place_id", "name", "full_address", "working_hour", "photo_url", "street_view",
+    "phone", "site", "category", "review_tags", "subtypes", "description", "description_en",
+]
+
+
+def build_schema():
+    dict_string = pa.dictionary(pa.int32(), pa.string())
+    fields = [pa.field("id", pa.int64())]
+    fields += [pa.field(c, pa.string()) for c in STRING_COLUMNS]
+    fields += [
+        pa.field("latitude", pa.float64()),
+        pa.field("longitude", pa.float64()),
+        pa.field("rating", pa.float32()),
+        pa.field("range", pa.int8()),
+        pa.field("minPrice", pa.int64()),
+        pa.field("maxPrice", pa.int64()),
+        pa.field("flavor", pa.list_(pa.string())),
+    ]
+    fields += [pa.field(c, dict_string) for c in CATEGORICAL_COLUMNS]
+    return pa.schema(fields)
+
+
+def _to_float(value):
+    try: return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError): return None
+
+
+def _to_int(value):
+    try: return int(float(value)) if value not in (None, "") else None
+    except (TypeError, ValueError): return None
+
+
+def _parse_flavor(value):
+    if not value: return []
+    try:
+        parsed = json.loads(value)
+        return [str(v) for v in parsed] if isinstance(parsed, list) else []
+    except (TypeError, ValueError):
+        return []
+
+
+def rows_to_batch(rows, schema):
+    columns = {
+        "id": [r["id"] for r in rows],
+        "latitude": [_to_float(r["latitude"]) for r in rows],
+        "longitude": [_to_float(r["longitude"]) for r in rows],
+        "rating": [_to_float(r["rating"]) for r in rows],
+        "range": [_to_int(r["range"]) for r in rows],
+        "minPrice": [_to_int(r["minPrice"]) for r in rows],
+        "maxPrice": [_to_int(r["maxPrice"]) for r in rows],
+        "flavor": [_parse_flavor(r["flavor"]) for r in rows],
+    }
+    for c in STRING_COLUMNS + CATEGORICAL_COLUMNS:
+        columns[c] = [r[c] for r in rows]
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+def read_catalog(source_db):
+    """Đọc SQLite theo lô -> pa.Table (dictionary đã hợp nhất giữa các lô)"""
+    schema = build_schema()
+    conn = sqlite3.connect(source_db)
+    conn.row_factory = sqlite3.Row
+    try:
+        cur = conn.execute("SELECT * FROM restaurants ORDER BY id")
+        batches = []
+        while True:
+            rows = cur.fetchmany(CHUNK_SIZE)
+            if not rows:
+                break
+            batches.append(rows_to_batch(rows, schema))
+    finally:
+        conn.close()
+    table = pa.Table.from_batches(batches, schema=schema)
+    # 1 dictionary chung cho cả cột (file Arrow IPC yêu cầu)
+    return table.unify_dictionaries().combine_chunks()
+
+
+def validate_export(parquet_path, source_db):
+    """So file Parquet vừa ghi với SQLite. Trả về danh sách lỗi (rỗng = khớp)."""
+    table = pq.read_table(parquet_path)
+    conn = sqlite3.connect(source_db)
+    try:
+        count, min_sum, max_sum = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(minPrice), 0), COALESCE(SUM(maxPrice), 0) FROM restaurants"
+        ).fetchone()
+        sqlite_ids = [r[0] for r in conn.execute("SELECT place_id FROM restaurants ORDER BY id")]
+        sqlite_cuisines = dict(conn.execute("SELECT cuisine, COUNT(*) FROM restaurants GROUP BY cuisine"))
+    finally:
+        conn.close()
+
+    problems = []
+    if table.num_rows != count:
+        problems.append(f"Số dòng: parquet={table.num_rows}, sqlite={count}")
+    if table.column("place_id").to_pylist() != sqlite_ids:
+        problems.append("place_id / thứ tự dòng không khớp")
+    for col, expected in (("minPrice", min_sum), ("maxPrice", max_sum)):
+        actual = sum(v for v in table.column(col).to_pylist() if v is not None)
+        if actual != expected:
+            problems.append(f"Tổng {col}: parquet={actual}, sqlite={expected}")
+    cuisines = {}
+    for v in table.column("cuisine").to_pylist():
+        cuisines[v] = cuisines.get(v, 0) + 1
+    if cuisines != sqlite_cuisines:
+        problems.append("Phân bố cuisine không khớp")
+    return problems
+
+
+def export_catalog(source_db=None, parquet_path=None, arrow_path=None):
+    """Trả về thống kê {"rows", "api_calls"} (None nếu lỗi)"""
+    source_db = source_db or SOURCE_DB
+    parquet_path = parquet_path or config.DB_PARQUET_PATH
+    arrow_path = arrow_path or config.DB_ARROW_PATH
+
+    if pa is None:
+        print("❌ Chưa cài pyarrow. Chạy: pip install pyarrow")
+        return None
+    if not os.path.exists(source_db):
+        print(f"❌ Không tìm thấy DB nguồn: {source_db}")
+        return None
+
+    print(f"📦 Đang đọc catalog từ {source_db}...")
+    table = read_catalog(source_db)
+
+    # Ghi ra file tạm rồi đổi tên -> không để lại file hỏng nếu lỗi giữa chừng
+    pq.write_table(table, parquet_path + ".tmp", compression="zstd")
+    os.replace(parquet_path + ".tmp", parquet_path)
+    feather.write_feather(table, arrow_path + ".tmp", compression="uncompressed")
+    os.replace(arrow_path + ".tmp", arrow_path)
+
+    problems = validate_export(parquet_path, source_db)
+    if problems:
+        for p in problems:
+            print(f"❌ Kiểm tra thất bại: {p}")
+        return None
+
+    size_kb = os.path.getsize(parquet_path) / 1024
+    print(f"✅ Đã xuất {table.num_rows} nhà hàng -> {parquet_path} ({size_kb:.0f} KB) và {arrow_path}")
+    return {"rows": table.num_rows, "api_calls": 0}
+
+
+if __name__ == "__main__":
+    export_catalog()
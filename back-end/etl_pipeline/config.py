@@ -9,10 +9,57 @@ load_dotenv(os.path.join(BASE_DIR, '.env'))
 GOONG_API_KEY = os.getenv("GOONG_API_KEY")
 OUTSCRAPER_API_KEY = os.getenv("OUTSCRAPER_API_KEY")
 RENDER_DB_URL = os.getenv("DATABASE_URL_RENDER") or os.getenv("DATABASE_URL")
+# Base URL Outscraper: để trống = dùng SDK chính thức; đặt giá trị (VD mock server
+# scripts/mock_upstream.py) = gọi thẳng HTTP tới URL đó. Goong đọc GOONG_BASE_URL.
+OUTSCRAPER_BASE_URL = os.getenv("OUTSCRAPER_BASE_URL")
 
 # --- CẤU HÌNH KHÁC ---
 REQUEST_SLEEP_TIME = 0.2
 
+# --- SCANNER GOONG ---
+# Tốc độ gọi API tối đa (token bucket) và số worker chạy song song.
+# Chỉnh theo quota của key Goong đang dùng.
+SCAN_RATE_PER_SEC = float(os.getenv("SCAN_RATE_PER_SEC", 1 / REQUEST_SLEEP_TIME))
+SCAN_MAX_WORKERS = int(os.getenv("SCAN_MAX_WORKERS", 4))
+# Lưới quét thích ứng: số ô gốc mỗi chiều, độ sâu chia tối đa, limit AutoComplete
+SCAN_CITY = os.getenv("SCAN_CITY", "hcmc")
+SCAN_ROOT_DIVISIONS = int(os.getenv("SCAN_ROOT_DIVISIONS", 4))
+SCAN_MAX_DEPTH = int(os.getenv("SCAN_MAX_DEPTH", 4))
+SCAN_RESULT_LIMIT = 50
+# Query đã quét quá số ngày này được quét lại (tìm quán mới mở)
+SCAN_REFRESH_DAYS = int(os.getenv("SCAN_REFRESH_DAYS", 30))
+# Ghi DB raw theo lô
+SCAN_WRITE_BATCH_SIZE = int(os.getenv("SCAN_WRITE_BATCH_SIZE", 500))
+SCAN_FLUSH_INTERVAL = float(os.getenv("SCAN_FLUSH_INTERVAL", 5.0))
+
+# --- ENRICH OUTSCRAPER ---
+# Số query gửi chung trong 1 request, số request song song, tốc độ request/giây
+ENRICH_QUERY_BATCH_SIZE = int(os.getenv("ENRICH_QUERY_BATCH_SIZE", 20))
+ENRICH_MAX_WORKERS = int(os.getenv("ENRICH_MAX_WORKERS", 4))
+ENRICH_RATE_PER_SEC = float(os.getenv("ENRICH_RATE_PER_SEC", 2))
+ENRICH_WRITE_BATCH_SIZE = 200
+ENRICH_FLUSH_INTERVAL = 5.0
+# Dòng đã enrich quá số ngày này sẽ được lấy lại từ Outscraper
+ENRICH_REFRESH_DAYS = int(os.getenv("ENRICH_REFRESH_DAYS", 90))
+
+# --- CLEAN & TRANSFORM ---
+# Số dòng đọc mỗi lần từ DB nguồn (bộ nhớ giữ ổn định) và số process gán nhãn
+TRANSFORM_CHUNK_SIZE = int(os.getenv("TRANSFORM_CHUNK_SIZE", 1000))
+TRANSFORM_WORKERS = int(os.getenv("TRANSFORM_WORKERS", os.cpu_count() or 1))
+
+# --- DỊCH MÔ TẢ ---
+# Backend: "google" (deep_translator) hoặc "noop" (giữ nguyên văn, không gọi mạng)
+TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "google")
+TRANSLATE_BATCH_SIZE = int(os.getenv("TRANSLATE_BATCH_SIZE", 20))
+TRANSLATE_MAX_WORKERS = int(os.getenv("TRANSLATE_MAX_WORKERS", 4))
+TRANSLATE_RATE_PER_SEC = float(os.getenv("TRANSLATE_RATE_PER_SEC", 2))
+
+# --- GỘP QUÁN TRÙNG ---
+# Ô geohash độ chính xác 7 ~ 150m x 150m; chỉ so quán trong ô + 8 ô lân cận
+DEDUP_GEOHASH_PRECISION = int(os.getenv("DEDUP_GEOHASH_PRECISION", 7))
+DEDUP_DISTANCE_M = float(os.getenv("DEDUP_DISTANCE_M", 40))
+DEDUP_NAME_SIMILARITY = float(os.getenv("DEDUP_NAME_SIMILARITY", 0.85))
+
 # --- ĐƯỜNG DẪN DATABASE (QUAN TRỌNG: ĐỊNH NGHĨA 1 CHỖ) ---
 DB_FOLDER = os.path.join(BASE_DIR, "db")
 if not os.path.exists(DB_FOLDER):
@@ -25,4 +72,9 @@ DB_ENRICHED_PATH = os.path.join(DB_FOLDER, "2_enriched_data.db")
 # Bước 3: Chạy AI để làm giàu và gán nhãn data
 DB_AI_TAGGED = os.path.join(DB_FOLDER, "3_ai_tagged.db")
 # Bước 4: Process ra file này (để nạp lên Render)
-DB_FINAL_PATH = os.path.join(DB_FOLDER, "4_processed_data.db")
\ No newline at end of file
+DB_FINAL_PATH = os.path.join(DB_FOLDER, "4_processed_data.db")
+# Bước 5: Bản dạng cột của catalog (Parquet để phân tích, Arrow IPC để memory-map)
+DB_PARQUET_PATH = os.path.join(DB_FOLDER, "4_processed_data.parquet")
+DB_ARROW_PATH = os.path.join(DB_FOLDER, "4_processed_data.arrow")
+# Cache bản dịch (dùng lại giữa các lần chạy)
+DB_TRANSLATION_CACHE_PATH = os.path.join(DB_FOLDER, "translation_cache.db")
\ No newline at end of file
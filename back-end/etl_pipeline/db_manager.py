@@ -1,13 +1,26 @@
 import sqlite3
+import time
 from sqlite3 import Error
 import config  # Import config cùng thư mục
 
+INSERT_RESTAURANT_SQL = """ INSERT OR IGNORE INTO restaurants(
+                goong_place_id, name, address, latitude, longitude,
+                province, district, commune
+              )
+              VALUES(?,?,?,?,?,?,?,?) """
+
+def enable_wal(conn):
+    """WAL + synchronous=NORMAL: commit không phải fsync file DB chính mỗi lần"""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
 def create_connection():
     """Tạo kết nối đến tệp database SQLite (Raw Data)"""
     conn = None
     try:
         # Sử dụng đường dẫn từ config
         conn = sqlite3.connect(config.DB_RAW_PATH)
+        enable_wal(conn)
         print(f"✅ Đã kết nối SQLite: {config.DB_RAW_PATH}")
         return conn
     except Error as e:
@@ -34,26 +47,165 @@ def create_table(conn):
     except Error as e:
         print(e)
 
+def restaurant_to_row(restaurant_data):
+    return (
+        restaurant_data["goong_place_id"],
+        restaurant_data["name"],
+        restaurant_data["address"],
+        restaurant_data["latitude"],
+        restaurant_data["longitude"],
+        restaurant_data.get("province"),
+        restaurant_data.get("district"),
+        restaurant_data.get("commune"),
+    )
+
 def insert_restaurant(conn, restaurant_data):
-    sql = """ INSERT OR IGNORE INTO restaurants(
-                goong_place_id, name, address, latitude, longitude,
-                province, district, commune
-              )
-              VALUES(?,?,?,?,?,?,?,?) """
+    """Chèn 1 dòng và commit ngay (dùng cho thao tác lẻ; quét hàng loạt dùng RestaurantWriter)"""
     try:
         cur = conn.cursor()
-        cur.execute(sql, (
-            restaurant_data["goong_place_id"],
-            restaurant_data["name"],
-            restaurant_data["address"],
-            restaurant_data["latitude"],
-            restaurant_data["longitude"],
-            restaurant_data.get("province"),
-            restaurant_data.get("district"),
-            restaurant_data.get("commune"),
-        ))
+        cur.execute(INSERT_RESTAURANT_SQL, restaurant_to_row(restaurant_data))
         conn.commit()
         return cur.lastrowid
     except Error as e:
         print(f"Lỗi khi chèn dữ liệu: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+# ==============================================================================
+# GHI THEO LÔ (BATCH) - 1 transaction / 1 lần fsync cho cả lô
+# ==============================================================================
+class BatchWriter:
+    """
+    Gom các dòng lại rồi ghi bằng executemany trong 1 transaction.
+    Flush khi đủ batch_size dòng hoặc đã quá flush_interval giây từ lần flush trước.
+    Với câu lệnh INSERT OR IGNORE, đếm được số dòng thêm mới / bị bỏ qua.
+    """
+
+    def __init__(self, conn, sql, batch_size=500, flush_interval=5.0):
+        self.conn = conn
+        self.sql = sql
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.inserted = 0
+        self.ignored = 0
+        self._rows = []
+        self._last_flush = time.monotonic()
+
+    def add(self, row):
+        self._rows.append(row)
+        if (len(self._rows) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        with self.conn:  # commit 1 lần cho cả lô, rollback nếu lỗi
+            written, ignored = self._write(rows)
+        self.inserted += written
+        self.ignored += ignored
+
+    def _write(self, rows):
+        """Ghi 1 lô (đang trong transaction). Trả về (số dòng ghi, số dòng bỏ qua)"""
+        cur = self.conn.executemany(self.sql, rows)
+        # rowcount của executemany = tổng số dòng thực sự được ghi
+        written = max(cur.rowcount, 0)
+        return written, len(rows) - written
+
+    def stats(self):
+        return {"inserted": self.inserted, "ignored": self.ignored}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+
+class RestaurantWriter(BatchWriter):
+    """BatchWriter cho bảng restaurants của DB raw (INSERT OR IGNORE theo goong_place_id)"""
+
+    def __init__(self, conn, batch_size=500, flush_interval=5.0):
+        super().__init__(conn, INSERT_RESTAURANT_SQL, batch_size, flush_interval)
+
+    def add_restaurant(self, restaurant_data):
+        self.add(restaurant_to_row(restaurant_data))
+
+# ==============================================================================
+# CHECKPOINT CHO SCANNER (RESUME KHI BỊ 429 / CRASH)
+# ==============================================================================
+def create_checkpoint_tables(conn):
+    """
+    scan_queries: các cặp (area, term) đã quét xong ở Giai đoạn 1
+    scan_pending_places: place_id đã tìm thấy nhưng chưa lấy chi tiết (Giai đoạn 2)
+    """
+    try:
+        c = conn.cursor()
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS scan_queries (
+                area TEXT NOT NULL,
+                term TEXT NOT NULL,
+                result_count INTEGER,
+                completed_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (area, term)
+            );
+        """)
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS scan_pending_places (
+                place_id TEXT PRIMARY KEY,
+                discovered_at TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+        conn.commit()
+    except Error as e:
+        print(e)
+
+
+def get_completed_queries(conn, max_age_days=None):
+    """{(area, term): result_count} của các query đã quét xong (trong max_age_days ngày gần nhất)"""
+    cur = conn.cursor()
+    if max_age_days is None:
+        cur.execute("SELECT area, term, result_count FROM scan_queries")
+    else:
+        cur.execute(
+            "SELECT area, term, result_count FROM scan_queries WHERE completed_at >= datetime('now', ?)",
+            (f"-{int(max_age_days)} days",),
+        )
+    return {(area, term): count for area, term, count in cur.fetchall()}
+
+
+def mark_query_done(conn, area, term, place_ids, result_count):
+    """Lưu place_id tìm được và đánh dấu query xong trong CÙNG 1 transaction"""
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO scan_pending_places(place_id) VALUES (?)",
+            [(pid,) for pid in place_ids],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO scan_queries(area, term, result_count) VALUES (?, ?, ?)",
+            (area, term, result_count),
+        )
+
+
+def get_pending_place_ids(conn):
+    """place_id chờ lấy chi tiết, bỏ qua những cái đã có trong bảng restaurants"""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT p.place_id FROM scan_pending_places p
+        LEFT JOIN restaurants r ON r.goong_place_id = p.place_id
+        WHERE r.id IS NULL
+        ORDER BY p.discovered_at, p.place_id
+    """)
+    return [row[0] for row in cur.fetchall()]
+
+
+def clear_pending_places(conn, place_ids):
+    """Xóa khỏi hàng chờ các place_id đã xử lý xong (1 transaction)"""
+    with conn:
+        conn.executemany(
+            "DELETE FROM scan_pending_places WHERE place_id = ?",
+            [(pid,) for pid in place_ids],
+        )
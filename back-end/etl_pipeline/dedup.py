@@ -0,0 +1,233 @@
+import math
+import os
+import re
+import sqlite3
+from datetime import datetime
+from difflib import SequenceMatcher
+from unidecode import unidecode
+import config
+
+# ==============================================================================
+# PHÁT HIỆN QUÁN TRÙNG (GẦN NHƯ TRÙNG) TRONG CATALOG ĐÃ XỬ LÝ
+# ==============================================================================
+# Quét nhiều từ khóa / nhiều ô chồng nhau -> cùng 1 quán xuất hiện nhiều lần
+# với tên hơi khác ("Quán Phở Hòa" vs "Phở Hoà") hoặc place_id khác.
+# - Chia quán vào các ô geohash; chỉ so quán trong cùng ô + 8 ô lân cận
+#   (không bao giờ so từng cặp trên toàn thành phố)
+# - Cặp trùng = cách nhau <= DEDUP_DISTANCE_M mét VÀ tên chuẩn hóa giống nhau
+# - Mỗi nhóm trùng giữ lại 1 quán "đầy đủ" nhất
+# - Ghi quyết định vào bảng merge_decisions, xóa các quán trùng khỏi catalog
+
+TARGET_DB = config.DB_FINAL_PATH
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_M = 6371000
+
+# Tiền tố chung không mang thông tin (so sau khi đã bỏ dấu)
+NAME_PREFIXES = ("nha hang", "quan an", "quan", "tiem", "restaurant")
+
+
+# ------------------------------------------------------------------------------
+# GEOHASH
+# ------------------------------------------------------------------------------
+def geohash_encode(lat, lon, precision):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(chars)
+
+
+def geohash_bbox(code):
+    """(min_lat, min_lon, max_lat, max_lon) của 1 ô geohash"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for c in code:
+        idx = BASE32.index(c)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (idx >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lon_range[0], lat_range[1], lon_range[1]
+
+
+def geohash_neighbors(code):
+    """Ô hiện tại + 8 ô xung quanh (cùng độ chính xác)"""
+    min_lat, min_lon, max_lat, max_lon = geohash_bbox(code)
+    lat, lon = (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
+    dlat, dlon = max_lat - min_lat, max_lon - min_lon
+    return {
+        geohash_encode(lat + i * dlat, lon + j * dlon, len(code))
+        for i in (-1, 0, 1) for j in (-1, 0, 1)
+    }
+
+
+# ------------------------------------------------------------------------------
+# SO KHỚP
+# ------------------------------------------------------------------------------
+def distance_m(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def normalize_name(name):
+    text = unidecode(name or "").lower()
+    text = re.sub(r"[^a-z0-9]+", " ", text).strip()
+    for prefix in NAME_PREFIXES:
+        if text.startswith(prefix + " "):
+            text = text[len(prefix) + 1:]
+            break
+    return text
+
+
+def name_similarity(a, b):
+    """a, b đã chuẩn hóa. Tên này chứa trọn tên kia (đủ dài) cũng coi là giống"""
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    # Số khác nhau thường là chi nhánh khác nhau ("Cơm Tấm 1" vs "Cơm Tấm 2")
+    if set(re.findall(r"\d+", a)) != set(re.findall(r"\d+", b)):
+        return 0.0
+    shorter, longer = sorted((a, b), key=len)
+    if len(shorter) >= 4 and f" {shorter} " in f" {longer} ":
+        return 0.95
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def completeness(row):
+    """Quán nào nhiều thông tin hơn thì được giữ lại"""
+    return (
+        bool(row["description"]), bool(row["photo_url"]), bool(row["working_hour"]),
+        bool(row["phone"]), row["rating"] or 0, -row["id"],
+    )
+
+
+def find_duplicates(rows, precision=None, max_distance_m=None, min_similarity=None):
+    """
+    rows: list dict (id, place_id, name, latitude, longitude, ...).
+    Trả về list quyết định (dup_row, kept_row, khoảng cách, độ giống tên) và số cặp đã so.
+
+    Duyệt quán từ "đầy đủ" nhất trở xuống: quán nào khớp 1 quán đã giữ ở gần
+    thì là bản trùng của quán đó, không thì được giữ. Luôn so với quán được giữ
+    (không bắc cầu A~B~C) nên tên khác hẳn nhau không bị gom chung 1 cụm.
+    """
+    precision = precision or config.DEDUP_GEOHASH_PRECISION
+    max_distance_m = max_distance_m or config.DEDUP_DISTANCE_M
+    min_similarity = min_similarity or config.DEDUP_NAME_SIMILARITY
+
+    kept_by_cell = {}   # ô geohash -> list (quán được giữ, tên chuẩn hóa)
+    neighbor_cache = {}
+    decisions = []
+    compared = 0
+    for row in sorted(rows, key=completeness, reverse=True):
+        if row["latitude"] is None or row["longitude"] is None or not (row["latitude"] or row["longitude"]):
+            continue  # thiếu tọa độ -> không so được
+        code = geohash_encode(row["latitude"], row["longitude"], precision)
+        if code not in neighbor_cache:
+            neighbor_cache[code] = geohash_neighbors(code)
+        norm = normalize_name(row["name"])
+
+        best = None
+        for cell in neighbor_cache[code]:
+            for kept, kept_norm in kept_by_cell.get(cell, ()):
+                compared += 1
+                dist = distance_m(row["latitude"], row["longitude"], kept["latitude"], kept["longitude"])
+                if dist > max_distance_m:
+                    continue
+                sim = name_similarity(norm, kept_norm)
+                if sim >= min_similarity and (best is None or (sim, -dist) > (best[3], -best[2])):
+                    best = (row, kept, dist, sim)
+        if best:
+            decisions.append(best)
+        else:
+            kept_by_cell.setdefault(code, []).append((row, norm))
+    return decisions, compared
+
+
+# ------------------------------------------------------------------------------
+# CHẠY TRÊN DB ĐÃ XỬ LÝ
+# ------------------------------------------------------------------------------
+def init_merge_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS merge_decisions (
+            duplicate_place_id TEXT PRIMARY KEY,
+            kept_place_id TEXT,
+            duplicate_name TEXT,
+            kept_name TEXT,
+            distance_m REAL,
+            name_similarity REAL,
+            decided_at TEXT
+        )
+    """)
+
+
+def dedup_catalog(target_db=None):
+    """Trả về thống kê {"rows", "api_calls"} (None nếu lỗi)"""
+    target_db = target_db or TARGET_DB
+    if not os.path.exists(target_db):
+        print(f"❌ Không tìm thấy DB: {target_db}")
+        return None
+
+    conn = sqlite3.connect(target_db)
+    conn.row_factory = sqlite3.Row
+    try:
+        init_merge_table(conn)
+        # Quyết định cũ mà quán được giữ lại không còn trong catalog -> bỏ
+        # (bước transform đã đưa quán trùng trở lại, lần này xét lại từ đầu)
+        with conn:
+            pruned = conn.execute(
+                "DELETE FROM merge_decisions WHERE kept_place_id NOT IN "
+                "(SELECT place_id FROM restaurants WHERE place_id IS NOT NULL)"
+            ).rowcount
+        if pruned:
+            print(f"🧹 Bỏ {pruned} quyết định gộp cũ (quán được giữ lại đã biến mất).")
+        rows = [dict(r) for r in conn.execute(
+            "SELECT id, place_id, name, latitude, longitude, rating, "
+            "description, photo_url, working_hour, phone FROM restaurants"
+        )]
+        print(f"🔎 Đang tìm quán trùng trong {len(rows)} nhà hàng...")
+        decisions, compared = find_duplicates(rows)
+
+        now = datetime.now().isoformat(timespec="seconds")
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO merge_decisions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (dup["place_id"], kept["place_id"], dup["name"], kept["name"], round(dist, 1), round(sim, 3), now)
+                    for dup, kept, dist, sim in decisions
+                ],
+            )
+            conn.executemany("DELETE FROM restaurants WHERE id = ?", [(dup["id"],) for dup, _, _, _ in decisions])
+    finally:
+        conn.close()
+
+    for dup, kept, dist, sim in decisions[:20]:
+        print(f"   🔗 '{dup['name']}' -> '{kept['name']}' ({dist:.0f}m, giống {sim:.0%})")
+    print(
+        f"✅ Đã so {compared} cặp lân cận (thay vì {len(rows) * (len(rows) - 1) // 2} cặp), "
+        f"gộp {len(decisions)} quán trùng -> còn {len(rows) - len(decisions)} nhà hàng."
+    )
+    return {"rows": len(rows), "api_calls": 0}
+
+
+if __name__ == "__main__":
+    dedup_catalog()
@@ -0,0 +1,83 @@
+import math
+
+# ==============================================================================
+# LƯỚI QUÉT THÍCH ỨNG (QUADTREE)
+# ==============================================================================
+# Chia bounding box của thành phố thành vài ô gốc. Ô nào trả về đủ "limit"
+# kết quả (bị bão hòa -> có thể còn sót quán) thì chia tiếp làm 4 ô con.
+# Ô thưa thì dừng luôn -> tiết kiệm API call ở vùng ngoại thành.
+
+KM_PER_DEG_LAT = 111.0
+
+# Bounding box theo thành phố (dùng lại được cho thành phố khác)
+CITY_BBOXES = {
+    "hcmc": {"min_lat": 10.35, "max_lat": 11.17, "min_lon": 106.35, "max_lon": 107.03},
+}
+
+
+class GridCell:
+    """
+    Một ô chữ nhật trên bản đồ.
+    key: "r{hàng}c{cột}" cho ô gốc, mỗi cấp chia thêm 1 chữ số góc phần tư
+         (0=Tây Nam, 1=Đông Nam, 2=Tây Bắc, 3=Đông Bắc). VD: "r1c2/031"
+    """
+
+    def __init__(self, key, min_lat, min_lon, max_lat, max_lon):
+        self.key = key
+        self.min_lat = min_lat
+        self.min_lon = min_lon
+        self.max_lat = max_lat
+        self.max_lon = max_lon
+
+    def __repr__(self):
+        return f"GridCell({self.key!r})"
+
+    @property
+    def depth(self):
+        return len(self.key.split("/", 1)[1]) if "/" in self.key else 0
+
+    @property
+    def center(self):
+        return (self.min_lat + self.max_lat) / 2, (self.min_lon + self.max_lon) / 2
+
+    @property
+    def radius_km(self):
+        """Bán kính đường tròn ngoại tiếp ô (đủ phủ cả 4 góc)"""
+        lat, _ = self.center
+        height = (self.max_lat - self.min_lat) * KM_PER_DEG_LAT
+        width = (self.max_lon - self.min_lon) * KM_PER_DEG_LAT * math.cos(math.radians(lat))
+        return math.hypot(height, width) / 2
+
+    def children(self):
+        mid_lat, mid_lon = self.center
+        prefix = self.key if "/" in self.key else self.key + "/"
+        return [
+            GridCell(prefix + "0", self.min_lat, self.min_lon, mid_lat, mid_lon),
+            GridCell(prefix + "1", self.min_lat, mid_lon, mid_lat, self.max_lon),
+            GridCell(prefix + "2", mid_lat, self.min_lon, self.max_lat, mid_lon),
+            GridCell(prefix + "3", mid_lat, mid_lon, self.max_lat, self.max_lon),
+        ]
+
+
+def root_cells(bbox, divisions=4):
+    """Chia bbox thành divisions x divisions ô gốc"""
+    lat_step = (bbox["max_lat"] - bbox["min_lat"]) / divisions
+    lon_step = (bbox["max_lon"] - bbox["min_lon"]) / divisions
+    cells = []
+    for row in range(divisions):
+        for col in range(divisions):
+            min_lat = bbox["min_lat"] + row * lat_step
+            min_lon = bbox["min_lon"] + col * lon_step
+            cells.append(GridCell(f"r{row}c{col}", min_lat, min_lon, min_lat + lat_step, min_lon + lon_step))
+    return cells
+
+
+def next_cells(cell, result_count, limit, max_depth):
+    """
+    Quyết định có chia nhỏ ô hay không sau khi đã quét:
+    - Trả về đủ limit kết quả -> bão hòa -> chia 4 (nếu chưa quá max_depth)
+    - Ít kết quả -> dừng
+    """
+    if result_count is not None and result_count >= limit and cell.depth < max_depth:
+        return cell.children()
+    return []
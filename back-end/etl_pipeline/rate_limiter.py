@@ -0,0 +1,33 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket dùng chung cho nhiều thread.
+    - rate: số token nạp lại mỗi giây (= số request/giây cho phép)
+    - capacity: số request tối đa được "bắn" dồn một lúc
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """Chờ (block) tới khi đủ token"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
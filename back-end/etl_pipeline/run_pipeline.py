@@ -0,0 +1,291 @@
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from graphlib import TopologicalSorter
+import config
+
+# ==============================================================================
+# CHẠY CẢ PIPELINE ETL BẰNG 1 LỆNH
+# ==============================================================================
+# VD:  python etl_pipeline/run_pipeline.py                       (chạy phần cần chạy)
+#      python etl_pipeline/run_pipeline.py --from transform      (từ bước transform)
+#      python etl_pipeline/run_pipeline.py --stages enrich --start-id 1 --end-id 500
+#      python etl_pipeline/run_pipeline.py --force               (bỏ qua checkpoint)
+#
+# - Các bước chạy theo đồ thị phụ thuộc (deps).
+# - Mỗi bước có "dấu vân tay" = file đầu vào (kích thước + mtime) + tham số.
+#   Dấu vân tay không đổi so với lần chạy thành công trước -> bỏ qua.
+# - Bước lấy dữ liệu từ bên ngoài (scan, enrich) còn có hạn dùng max_age_days:
+#   quá hạn thì chạy lại dù đầu vào không đổi (scan không có file đầu vào).
+# - Trạng thái lưu ở db/pipeline_state.json -> chạy lại sau khi lỗi sẽ tiếp
+#   tục từ bước chưa hoàn tất.
+# - Ghi lại thời gian, số dòng/giây, số lần gọi API của từng bước.
+#
+# Lưu ý: 3_ai_tagged.db (đầu vào của transform) được tạo bên ngoài pipeline
+# (bước gán nhãn AI), nên transform chỉ phụ thuộc vào file đó.
+
+STATE_PATH = os.path.join(config.DB_FOLDER, "pipeline_state.json")
+
+
+def _run_scan(args):
+    return importlib.import_module("1_scan_goong").main()
+
+
+def _run_enrich(args):
+    return importlib.import_module("2_enrich_outscraper").main(
+        args.start_id, args.end_id, args.refresh_days
+    )
+
+
+def _run_transform(args):
+    return importlib.import_module("3_clean_transform").create_processed_db(full=args.full_transform)
+
+
+def _run_dedup(args):
+    return importlib.import_module("dedup").dedup_catalog()
+
+
+def _run_export(args):
+    return importlib.import_module("5_export_parquet").export_catalog()
+
+
+def _run_load(args):
+    loader = importlib.import_module("4_load_to_render")
+    if args.load_mode == "sync":
+        return loader.sync_catalog()
+    return loader.transfer_data_final(args.start_id, args.end_id)
+
+
+# inputs / outputs: file DB; params: tham số CLI ảnh hưởng tới kết quả;
+# max_age_days (tùy chọn): số ngày kể từ lần chạy thành công trước thì coi là cũ
+STAGES = {
+    "scan": {
+        "deps": [],
+        "inputs": [],
+        "outputs": [config.DB_RAW_PATH],
+        "params": lambda a: {"city": config.SCAN_CITY, "max_depth": config.SCAN_MAX_DEPTH},
+        "max_age_days": lambda a: config.SCAN_REFRESH_DAYS,
+        "run": _run_scan,
+    },
+    "enrich": {
+        "deps": ["scan"],
+        "inputs": [config.DB_RAW_PATH],
+        "outputs": [config.DB_ENRICHED_PATH],
+        "params": lambda a: {"start_id": a.start_id, "end_id": a.end_id, "refresh_days": a.refresh_days},
+        # Chạy lại theo chu kỳ refresh để dòng cũ được enrich lại dù DB raw không đổi
+        "max_age_days": lambda a: a.refresh_days or config.ENRICH_REFRESH_DAYS,
+        "run": _run_enrich,
+    },
+    "transform": {
+        "deps": ["enrich"],
+        "inputs": [config.DB_AI_TAGGED],
+        "outputs": [config.DB_FINAL_PATH],
+        "params": lambda a: {"full": a.full_transform},
+        "run": _run_transform,
+    },
+    # dedup sửa trực tiếp DB đã xử lý (vừa là input vừa là output)
+    "dedup": {
+        "deps": ["transform"],
+        "inputs": [config.DB_FINAL_PATH],
+        "outputs": [config.DB_FINAL_PATH],
+        "params": lambda a: {
+            "precision": config.DEDUP_GEOHASH_PRECISION,
+            "distance_m": config.DEDUP_DISTANCE_M,
+            "similarity": config.DEDUP_NAME_SIMILARITY,
+        },
+        "run": _run_dedup,
+    },
+    "export": {
+        "deps": ["dedup"],
+        "inputs": [config.DB_FINAL_PATH],
+        "outputs": [config.DB_PARQUET_PATH, config.DB_ARROW_PATH],
+        "params": lambda a: {},
+        "run": _run_export,
+    },
+    "load": {
+        "deps": ["dedup"],
+        "inputs": [config.DB_FINAL_PATH],
+        "outputs": [],
+        "params": lambda a: {"mode": a.load_mode, "start_id": a.start_id, "end_id": a.end_id},
+        "run": _run_load,
+    },
+}
+STAGE_ORDER = list(TopologicalSorter({name: s["deps"] for name, s in STAGES.items()}).static_order())
+
+
+# ------------------------------------------------------------------------------
+# CHECKPOINT
+# ------------------------------------------------------------------------------
+def load_state():
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state):
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, STATE_PATH)  # ghi nguyên tử, crash không làm hỏng file
+
+
+def file_signature(path):
+    """Kích thước + mtime của file DB và file -wal đi kèm (chế độ WAL)"""
+    sig = []
+    for p in (path, path + "-wal"):
+        if os.path.exists(p):
+            st = os.stat(p)
+            sig.append([os.path.basename(p), st.st_size, st.st_mtime_ns])
+    return sig
+
+
+def fingerprint(stage, args):
+    payload = {
+        "inputs": {p: file_signature(p) for p in stage["inputs"]},
+        "params": stage["params"](args),
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def is_expired(stage, done, args, now=None):
+    """Lần chạy thành công trước đã quá max_age_days của bước chưa"""
+    if "max_age_days" not in stage:
+        return False
+    completed_at = done.get("completed_at")
+    if not completed_at:
+        return True
+    age = (now or datetime.now()) - datetime.fromisoformat(completed_at)
+    return age >= timedelta(days=stage["max_age_days"](args))
+
+
+def is_up_to_date(name, stage, state, args):
+    done = state.get(name)
+    if not done or done.get("fingerprint") != fingerprint(stage, args):
+        return False
+    if is_expired(stage, done, args):
+        return False
+    return all(os.path.exists(p) for p in stage["outputs"])
+
+
+# ------------------------------------------------------------------------------
+# CHẠY
+# ------------------------------------------------------------------------------
+def select_stages(args):
+    if args.stages:
+        names = [n.strip() for n in args.stages.split(",")]
+        unknown = [n for n in names if n not in STAGES]
+        if unknown:
+            raise SystemExit(f"❌ Bước không tồn tại: {', '.join(unknown)} (có: {', '.join(STAGE_ORDER)})")
+        return [n for n in STAGE_ORDER if n in names]
+    start = STAGE_ORDER.index(args.from_stage) if args.from_stage else 0
+    end = STAGE_ORDER.index(args.to_stage) if args.to_stage else len(STAGE_ORDER) - 1
+    return STAGE_ORDER[start:end + 1]
+
+
+def run_stage(name, stage, args):
+    started = time.perf_counter()
+    result = stage["run"](args)
+    elapsed = time.perf_counter() - started
+    if result is None:
+        return None, elapsed
+    rows = result.get("rows", 0)
+    metrics = {
+        "elapsed_s": round(elapsed, 2),
+        "rows": rows,
+        "rows_per_s": round(rows / elapsed, 1) if elapsed > 0 else None,
+        "api_calls": result.get("api_calls", 0),
+    }
+    return {"metrics": metrics, "complete": result.get("complete", True)}, elapsed
+
+
+def print_summary(report):
+    print("\n" + "=" * 72)
+    print(f"{'Bước':<12}{'Trạng thái':<14}{'Thời gian':>12}{'Dòng':>10}{'Dòng/giây':>12}{'API':>10}")
+    print("-" * 72)
+    for name, status, m in report:
+        m = m or {}
+        elapsed = f"{m['elapsed_s']:.1f}s" if "elapsed_s" in m else "-"
+        print(
+            f"{name:<12}{status:<14}{elapsed:>12}{m.get('rows', '-'):>10}"
+            f"{m.get('rows_per_s') or '-':>12}{m.get('api_calls', '-'):>10}"
+        )
+    print("=" * 72)
+
+
+def run_pipeline(args):
+    """Trả về True nếu mọi bước được chọn đều hoàn tất (hoặc đã mới)"""
+    state = load_state()
+    stages = select_stages(args)
+    print(f"🧭 Pipeline: {' -> '.join(stages)}")
+    report = []
+    ok = True
+
+    for name in stages:
+        stage = STAGES[name]
+        missing = [p for p in stage["inputs"] if not os.path.exists(p)]
+        if missing:
+            print(f"❌ [{name}] Thiếu file đầu vào: {', '.join(missing)}")
+            report.append((name, "thiếu input", None))
+            ok = False
+            break
+
+        if not args.force and is_up_to_date(name, stage, state, args):
+            print(f"⏭  [{name}] Đầu vào không đổi và chưa quá hạn từ lần chạy trước -> bỏ qua")
+            report.append((name, "bỏ qua", state[name].get("metrics")))
+            continue
+
+        # Dấu vân tay tính TRƯỚC khi chạy (file đầu vào có thể đổi trong lúc chạy)
+        fp = fingerprint(stage, args)
+        print(f"\n▶️  [{name}] Bắt đầu...")
+        outcome, elapsed = run_stage(name, stage, args)
+        if outcome is None:
+            print(f"❌ [{name}] Thất bại sau {elapsed:.1f}s -> dừng pipeline")
+            report.append((name, "lỗi", {"elapsed_s": round(elapsed, 2)}))
+            ok = False
+            break
+        if not outcome["complete"]:
+            # VD scan bị 429: đã lưu checkpoint, lần sau chạy tiếp bước này
+            print(f"⏸  [{name}] Chưa xong (sẽ tiếp tục ở lần chạy sau) -> dừng pipeline")
+            report.append((name, "dở dang", outcome["metrics"]))
+            ok = False
+            break
+
+        if set(stage["inputs"]) & set(stage["outputs"]):
+            # Bước sửa chính file đầu vào (dedup) -> lấy dấu vân tay SAU khi chạy,
+            # nếu không lần sau sẽ luôn thấy "đầu vào đã đổi"
+            fp = fingerprint(stage, args)
+        state[name] = {
+            "fingerprint": fp,
+            "completed_at": datetime.now().isoformat(timespec="seconds"),
+            "metrics": outcome["metrics"],
+        }
+        save_state(state)
+        report.append((name, "xong", outcome["metrics"]))
+
+    print_summary(report)
+    return ok
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Chạy pipeline ETL (scan -> enrich -> transform -> export/load)")
+    parser.add_argument("--stages", help="Danh sách bước, phân cách bởi dấu phẩy (VD: enrich,transform)")
+    parser.add_argument("--from", dest="from_stage", choices=STAGE_ORDER, help="Chạy từ bước này")
+    parser.add_argument("--to", dest="to_stage", choices=STAGE_ORDER, help="Chạy tới bước này")
+    parser.add_argument("--start-id", type=int, default=None, help="ID nguồn nhỏ nhất (enrich, load full)")
+    parser.add_argument("--end-id", type=int, default=None, help="ID nguồn lớn nhất (enrich, load full)")
+    parser.add_argument("--refresh-days", type=int, default=None, help="Enrich lại dữ liệu cũ hơn N ngày")
+    parser.add_argument("--full-transform", action="store_true", help="Transform lại toàn bộ (không incremental)")
+    parser.add_argument("--load-mode", choices=["sync", "full"], default="sync")
+    parser.add_argument("--force", action="store_true", help="Chạy cả các bước có đầu vào không đổi")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run_pipeline(parse_args()) else 1)
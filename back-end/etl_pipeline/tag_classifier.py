@@ -0,0 +1,84 @@
+import re
+
+# ==============================================================================
+# BỘ GÁN NHÃN 1 LƯỢT (THAY CHO ~30 LẦN re.search MỖI DÒNG)
+# ==============================================================================
+# Mọi pattern trong KEYWORDS_CONFIG đều có dạng r"\b(cụm 1|cụm 2|...)\b".
+# Ta tách các cụm từ, nạp vào 1 cây trie theo TỪ (token), rồi quét text đúng
+# 1 lần: tại mỗi token, đi xuống trie để lấy mọi cụm bắt đầu ở đó.
+#
+# Tương đương chính xác với regex trên text đã qua clean_text():
+# - Token = chuỗi ký tự \w liên tiếp (cùng định nghĩa "word" với \b của re)
+# - Cụm nhiều từ chỉ khớp khi các token cách nhau ĐÚNG 1 dấu cách
+#   (VD "bbq hàn" khớp "bbq hàn" nhưng không khớp "bbq-hàn")
+
+WORD_RE = re.compile(r"\w+")
+ALTERNATION_RE = re.compile(r"^\\b\((.*)\)\\b$")
+
+
+def parse_alternation(pattern):
+    """r"\\b(a|b c)\\b" -> ["a", "b c"]. Pattern dạng khác thì báo lỗi."""
+    match = ALTERNATION_RE.match(pattern)
+    if not match:
+        raise ValueError(f"Pattern không đúng dạng \\b(...)\\b: {pattern}")
+    phrases = match.group(1).split("|")
+    for phrase in phrases:
+        if not all(WORD_RE.fullmatch(token) for token in phrase.split(" ")):
+            raise ValueError(f"Cụm từ chỉ được gồm các từ cách nhau 1 dấu cách: {phrase!r}")
+    return phrases
+
+
+class _Node:
+    __slots__ = ("children", "labels")
+
+    def __init__(self):
+        self.children = {}
+        self.labels = []
+
+
+class PhraseMatcher:
+    def __init__(self):
+        self._root = _Node()
+
+    def add(self, phrase, label):
+        node = self._root
+        for token in phrase.split(" "):
+            node = node.children.setdefault(token, _Node())
+        if label not in node.labels:
+            node.labels.append(label)
+
+    def add_pattern(self, pattern, label):
+        for phrase in parse_alternation(pattern):
+            self.add(phrase, label)
+
+    def match(self, text):
+        """Trả về set nhãn của mọi cụm từ xuất hiện trong text"""
+        tokens = [(m.group(), m.start(), m.end()) for m in WORD_RE.finditer(text)]
+        found = set()
+        for i, (token, _, end) in enumerate(tokens):
+            node = self._root.children.get(token)
+            j = i
+            while node is not None:
+                found.update(node.labels)
+                j += 1
+                # Token kế tiếp phải cách đúng 1 dấu cách
+                if j >= len(tokens) or tokens[j][1] != end + 1 or text[end] != " ":
+                    break
+                next_token, _, end = tokens[j]
+                node = node.children.get(next_token)
+        return found
+
+
+def build_tag_matcher(keywords_config):
+    """
+    Nhãn = (nhóm, tên tag), VD ("cuisine", "Nhật Bản").
+    Nhóm chỉ có 1 pattern (VD "beverage") thì nhãn là (nhóm, None).
+    """
+    matcher = PhraseMatcher()
+    for group, value in keywords_config.items():
+        if isinstance(value, dict):
+            for tag, pattern in value.items():
+                matcher.add_pattern(pattern, (group, tag))
+        else:
+            matcher.add_pattern(value, (group, None))
+    return matcher
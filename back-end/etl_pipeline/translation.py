@@ -0,0 +1,185 @@
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import config
+from db_manager import enable_wal
+from rate_limiter import TokenBucket
+
+# ==============================================================================
+# DỊCH MÔ TẢ: CACHE + GOM LÔ + SONG SONG
+# ==============================================================================
+# - Cache bền vững (SQLite) theo hash(ngôn ngữ đích + nội dung): chuỗi nhà hàng
+#   dùng chung mô tả chỉ phải dịch 1 lần, chạy lại ETL không dịch lại.
+# - Trong 1 lần chạy: bỏ trùng, chỉ gửi những câu chưa có trong cache.
+# - Gửi theo lô qua ThreadPool giới hạn số luồng + token bucket.
+# - Backend thay được (GoogleBackend / NoopBackend / backend tự viết cho test).
+#   Backend có cacheable = False (Noop) không được ghi cache: nếu không, lần chạy
+#   noop sẽ lưu nguyên văn tiếng Việt làm bản "en" và lần chạy Google sau không dịch nữa.
+
+MIN_TEXT_LENGTH = 5  # Câu ngắn hơn -> bỏ qua (giống translate_to_english cũ)
+
+
+def cache_key(text, target):
+    return hashlib.sha256(f"{target}\0{text}".encode("utf-8")).hexdigest()
+
+
+class GoogleBackend:
+    """
+    Dịch qua deep_translator (Google). Câu nào lỗi trả về None.
+    Google (bản miễn phí) không có API dịch theo lô: mỗi câu vẫn là 1 request,
+    "lô" chỉ để chia việc cho ThreadPool và token bucket (1 token / lô).
+    """
+
+    cacheable = True
+
+    def __init__(self, target="en"):
+        self.target = target
+
+    def translate_batch(self, texts):
+        from deep_translator import GoogleTranslator  # Chỉ cần khi thực sự dịch
+        translator = GoogleTranslator(source="auto", target=self.target)
+        out = []
+        for text in texts:
+            try:
+                out.append(translator.translate(text))
+            except Exception:
+                out.append(None)
+        return out
+
+
+class NoopBackend:
+    """Không gọi mạng, trả lại nguyên văn (chạy offline / test). Kết quả không được cache."""
+
+    rate_limited = False
+    cacheable = False
+
+    def __init__(self, target="en"):
+        self.target = target
+
+    def translate_batch(self, texts):
+        return list(texts)
+
+
+BACKENDS = {"google": GoogleBackend, "noop": NoopBackend}
+
+
+class TranslationCache:
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        enable_wal(self.conn)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                target TEXT,
+                translated TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            # Giới hạn số tham số mỗi câu SQL (SQLite mặc định 999)
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" for _ in part)
+                rows = self.conn.execute(
+                    f"SELECT key, translated FROM translations WHERE key IN ({placeholders})", part
+                )
+                found.update(rows)
+        return found
+
+    def put_many(self, items):
+        """items: list (key, target, translated)"""
+        if not items: return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO translations (key, target, translated) VALUES (?, ?, ?)", items
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+class Translator:
+    def __init__(self, backend=None, target="en", cache_path=None,
+                 batch_size=None, max_workers=None, rate_per_sec=None):
+        self.target = target
+        self.backend = backend or BACKENDS[config.TRANSLATION_BACKEND](target=target)
+        self.cache = TranslationCache(cache_path or config.DB_TRANSLATION_CACHE_PATH)
+        self.batch_size = batch_size or config.TRANSLATE_BATCH_SIZE
+        self.max_workers = max_workers or config.TRANSLATE_MAX_WORKERS
+        self.limiter = TokenBucket(rate_per_sec or config.TRANSLATE_RATE_PER_SEC)
+        self.stats = {"cache_hits": 0, "translated": 0, "failed": 0}
+
+    def _run_batch(self, texts):
+        if getattr(self.backend, "rate_limited", True):
+            self.limiter.acquire()
+        try:
+            return self.backend.translate_batch(texts)
+        except Exception:
+            return [None] * len(texts)
+
+    def translate_many(self, texts):
+        """
+        Dịch danh sách câu, trả về list cùng thứ tự.
+        - Rỗng / quá ngắn -> ""
+        - Dịch lỗi -> giữ nguyên câu gốc (không lưu cache, lần sau dịch lại)
+        """
+        return self.translate_many_with_status(texts)[0]
+
+    def translate_many_with_status(self, texts):
+        """
+        Như translate_many nhưng trả thêm list ok cùng thứ tự:
+        ok = False khi câu chưa được dịch thật (lỗi, hoặc backend không cache được như Noop)
+        -> nơi gọi không nên coi dòng đó là "đã xử lý xong" (VD để trống content_hash).
+        """
+        wanted = {}
+        for text in texts:
+            if text and len(str(text).strip()) >= MIN_TEXT_LENGTH:
+                wanted.setdefault(str(text), cache_key(str(text), self.target))
+
+        results = self.cache.get_many(set(wanted.values()))
+        self.stats["cache_hits"] += sum(1 for k in wanted.values() if k in results)
+        done = set(results)
+        cacheable = getattr(self.backend, "cacheable", True)
+
+        # Bỏ trùng: mỗi nội dung chưa có trong cache chỉ gửi đi 1 lần
+        pending = [text for text, key in wanted.items() if key not in results]
+        if pending:
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                translated = executor.map(self._run_batch, batches)
+                new_items = []
+                for batch, out in zip(batches, translated):
+                    for text, result in zip(batch, out):
+                        if result is None:
+                            self.stats["failed"] += 1
+                            continue
+                        key = wanted[text]
+                        results[key] = result
+                        new_items.append((key, self.target, result))
+            if cacheable:
+                self.cache.put_many(new_items)
+                done.update(key for key, _, _ in new_items)
+            self.stats["translated"] += len(new_items)
+
+        out, ok = [], []
+        for text in texts:
+            key = wanted.get(str(text)) if text else None
+            if key is None:
+                out.append("")
+                ok.append(True)
+            else:
+                out.append(results.get(key, text))
+                ok.append(key in done)
+        return out, ok
+
+    def translate(self, text):
+        return self.translate_many([text])[0]
+
+    def close(self):
+        self.cache.close()
@@ -0,0 +1,70 @@
+# migrations/env.py
+import os
+import sys
+from logging.config import fileConfig
+from alembic import context
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, pool
+
+# ==============================================================================
+# ALEMBIC ENV
+# ==============================================================================
+# - URL: `-x db_url=...` > DATABASE_URL > DATABASE_URL_LOCAL (giống api/app.py)
+# - Metadata: cả 2 bind của Flask-SQLAlchemy (user data + restaurants_db)
+# - Bảng sync của ETL không có model -> include_object bỏ qua khi autogenerate
+# - render_as_batch: SQLite không ALTER được cột/constraint -> alembic tự copy bảng
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(backend_dir, "api"))
+load_dotenv(os.path.join(backend_dir, ".env"))
+
+from models import db  # noqa: E402  (chỉ import models, KHÔNG import app -> không chạy create_all)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = [db.metadatas[None], db.metadatas["restaurants_db"]]
+
+# Bảng chỉ ETL dùng (4_load_to_render): tạo bằng migrations nhưng không có model
+# -> autogenerate/check bỏ qua, không đề xuất drop
+NON_MODEL_TABLES = {"restaurant_sync_state", "catalog_versions"}
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    return not (type_ == "table" and name in NON_MODEL_TABLES)
+
+
+def get_url():
+    url = context.get_x_argument(as_dictionary=True).get("db_url")
+    url = url or os.environ.get("DATABASE_URL") or os.environ.get("DATABASE_URL_LOCAL") or "sqlite:///fallback.db"
+    if url.startswith("postgres://"): url = url.replace("postgres://", "postgresql://", 1)
+    return url
+
+
+def run_migrations_offline():
+    """Sinh file SQL (alembic upgrade head --sql) thay vì chạy trực tiếp"""
+    url = get_url()
+    context.configure(
+        url=url, target_metadata=target_metadata, literal_binds=True, include_object=include_object,
+        render_as_batch=url.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = create_engine(get_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection, target_metadata=target_metadata, include_object=include_object,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
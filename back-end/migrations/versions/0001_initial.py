@@ -0,0 +1,104 @@
+"""initial schema (giống db.create_all() trước khi có migrations)
+
+Revision ID: 0001_initial
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_initial"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(length=80), nullable=False),
+        sa.Column("email", sa.String(length=120), nullable=True),
+        sa.Column("password_hash", sa.String(length=128), nullable=False),
+        sa.Column("avatar", sa.String(length=255), nullable=True),
+        sa.Column("bio", sa.String(length=500), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+        sa.UniqueConstraint("username"),
+    )
+    op.create_table(
+        "restaurants",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("place_id", sa.String(), nullable=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("full_address", sa.String(), nullable=True),
+        sa.Column("latitude", sa.Float(), nullable=True),
+        sa.Column("longitude", sa.Float(), nullable=True),
+        sa.Column("rating", sa.Float(), nullable=True),
+        sa.Column("working_hour", sa.String(), nullable=True),
+        sa.Column("photo_url", sa.String(), nullable=True),
+        sa.Column("street_view", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("site", sa.String(), nullable=True),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("review_tags", sa.String(), nullable=True),
+        sa.Column("subtypes", sa.String(), nullable=True),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("description_en", sa.String(), nullable=True),
+        sa.Column("range", sa.String(), nullable=True),
+        sa.Column("foodtype", sa.String(), nullable=True),
+        sa.Column("bevfood", sa.String(), nullable=True),
+        sa.Column("cuisine", sa.String(), nullable=True),
+        sa.Column("flavor", sa.String(), nullable=True),
+        sa.Column("coursetype", sa.String(), nullable=True),
+        sa.Column("district", sa.String(), nullable=True),
+        sa.Column("minprice", sa.Integer(), nullable=True),
+        sa.Column("maxprice", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("place_id"),
+    )
+    op.create_table(
+        "favorite",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("place_id", sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "place_id", name="_user_place_uc"),
+    )
+    op.create_table(
+        "route_history",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("start_point", sa.String(length=200), nullable=False),
+        sa.Column("places_json", sa.Text(), nullable=False),
+        sa.Column("polyline_outbound", sa.Text(), nullable=True),
+        sa.Column("polyline_return", sa.Text(), nullable=True),
+        sa.Column("total_distance", sa.Float(), nullable=True),
+        sa.Column("total_duration", sa.Float(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "review",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("place_id", sa.String(length=255), nullable=False),
+        sa.Column("rating", sa.Integer(), nullable=False),
+        sa.Column("comment", sa.Text(), nullable=True),
+        sa.Column("images", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    op.drop_table("review")
+    op.drop_table("route_history")
+    op.drop_table("favorite")
+    op.drop_table("restaurants")
+    op.drop_table("user")
@@ -0,0 +1,41 @@
+"""index cho các cột tra cứu (review, route_history, restaurants)
+
+Revision ID: 0002_lookup_indexes
+Revises: 0001_initial
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_lookup_indexes"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+# Favorite.user_id đã có index nhờ unique (user_id, place_id) -> không tạo thêm
+INDEXES = [
+    # GET /api/reviews/<place_id>, GET /api/user/<username>/reviews: WHERE ... ORDER BY created_at DESC
+    ("ix_review_place_created", "review", ["place_id", "created_at"]),
+    ("ix_review_user_created", "review", ["user_id", "created_at"]),
+    # GET /api/routes/<username>: WHERE user_id ORDER BY created_at DESC
+    ("ix_route_history_user_created", "route_history", ["user_id", "created_at"]),
+    # Cache /api/optimize: WHERE lower(start_point) = lower(:start)
+    ("ix_route_history_start_point_lower", "route_history", [sa.text("lower(start_point)")]),
+    # /api/search: bounding box, quận, rating, ngân sách
+    ("ix_restaurants_lat_lon", "restaurants", ["latitude", "longitude"]),
+    ("ix_restaurants_district", "restaurants", ["district"]),
+    ("ix_restaurants_rating", "restaurants", ["rating"]),
+    ("ix_restaurants_minprice", "restaurants", ["minprice"]),
+    ("ix_restaurants_maxprice", "restaurants", ["maxprice"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,46 @@
+"""bảng sync theo diff của ETL (restaurant_sync_state, catalog_versions)
+
+Revision ID: 0003_sync_state
+Revises: 0002_lookup_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_sync_state"
+down_revision = "0002_lookup_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bản ETL trước đây tự CREATE TABLE IF NOT EXISTS 2 bảng này -> DB đã có thì bỏ qua
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    # Hash từng dòng đã đẩy lên ở lần sync trước (etl_pipeline/4_load_to_render.py)
+    if "restaurant_sync_state" not in existing:
+        op.create_table(
+            "restaurant_sync_state",
+            sa.Column("place_id", sa.Text(), nullable=False),
+            sa.Column("row_hash", sa.Text(), nullable=False),
+            sa.Column("synced_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.PrimaryKeyConstraint("place_id"),
+        )
+    # Mỗi lần sync thành công = 1 phiên bản catalog
+    if "catalog_versions" not in existing:
+        op.create_table(
+            "catalog_versions",
+            sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column("synced_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.Column("inserted", sa.Integer(), nullable=False),
+            sa.Column("updated", sa.Integer(), nullable=False),
+            sa.Column("deleted", sa.Integer(), nullable=False),
+            sa.Column("total", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+
+def downgrade():
+    op.drop_table("catalog_versions")
+    op.drop_table("restaurant_sync_state")
@@ -0,0 +1,28 @@
+"""restaurant_sync_state.server_hash (phát hiện dòng bị sửa trực tiếp trên server)
+
+Revision ID: 0004_sync_server_hash
+Revises: 0003_sync_state
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_sync_server_hash"
+down_revision = "0003_sync_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # md5 do server tính trên dòng restaurants ngay sau khi sync (4_load_to_render.SERVER_HASH_SQL).
+    # Dòng cũ để NULL -> lần sync sau coi như đã đổi và đẩy lại 1 lần.
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("restaurant_sync_state")}
+    if "server_hash" not in columns:  # ETL bản trước tự ALTER TABLE thêm cột này
+        with op.batch_alter_table("restaurant_sync_state") as batch_op:
+            batch_op.add_column(sa.Column("server_hash", sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("restaurant_sync_state") as batch_op:
+        batch_op.drop_column("server_hash")
@@ -0,0 +1,381 @@
+# scripts/mock_upstream.py
+import argparse
+import hashlib
+import math
+import random
+import threading
+import time
+import polyline
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+# ==============================================================================
+# SERVER GIẢ LẬP GOONG / OPENWEATHER / OUTSCRAPER (CHẠY OFFLINE)
+# ==============================================================================
+# VD:  python scripts/mock_upstream.py --port 8099 --latency-dist lognormal --latency-ms 80 \
+#          --error-rate 0.02 --rate-limit-rate 0.01
+#
+# Rồi trỏ app / ETL vào server này (.env hoặc biến môi trường):
+#      GOONG_BASE_URL=http://127.0.0.1:8099
+#      OPEN_WEATHER_BASE_URL=http://127.0.0.1:8099
+#      OUTSCRAPER_BASE_URL=http://127.0.0.1:8099
+# (API key nào cũng được chấp nhận.)
+#
+# - Kết quả TẤT ĐỊNH: cùng tham số -> cùng response (hash tham số làm seed)
+# - Độ trễ theo phân phối: none | fixed | uniform | normal | lognormal
+# - Tiêm lỗi: error_rate -> HTTP 500, rate_limit_rate -> HTTP 429 + Retry-After
+# - Cấu hình riêng từng dịch vụ (goong / weather / outscraper), đổi được lúc
+#   đang chạy qua POST /__mock/config, xem số request ở GET /__mock/stats
+
+HCMC_CENTER = (10.7769, 106.7009)
+HCMC_PROVINCE = "Hồ Chí Minh"
+DISTRICTS = ["Quận 1", "Quận 3", "Quận 5", "Quận 7", "Quận 10", "Bình Thạnh", "Phú Nhuận", "Gò Vấp", "Tân Bình", "Thủ Đức"]
+COMMUNES = ["Phường Bến Nghé", "Phường Bến Thành", "Phường 5", "Phường 7", "Phường 12", "Phường Tân Định"]
+STREETS = ["Lê Lợi", "Nguyễn Trãi", "Hai Bà Trưng", "Pasteur", "Võ Văn Tần", "Phan Xích Long"]
+DISHES = ["Phở Bò", "Bún Bò Huế", "Cơm Tấm", "Bánh Mì", "Hủ Tiếu", "Lẩu Thái", "Sushi", "Trà Sữa", "Cà Phê", "Ốc"]
+OWNERS = ["Cô Ba", "Hòa", "Thìn", "Minh Ký", "Sài Gòn", "Út Hưng", "Ba Ghiền"]
+WEATHER = ["trời quang", "mây rải rác", "mây cụm", "mưa nhẹ", "mưa rào", "giông bão"]
+VEHICLE_SPEED_MS = {"car": 8.0, "taxi": 8.0, "bike": 6.0, "truck": 6.0, "hd": 6.0}
+
+DEFAULT_FAULTS = {
+    "latency_dist": "none",   # none | fixed | uniform | normal | lognormal
+    "latency_ms": 0.0,        # fixed: giá trị; uniform/normal: trung bình; lognormal: trung vị
+    "latency_spread": 0.0,    # uniform: ± ms; normal: độ lệch chuẩn ms; lognormal: sigma
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "retry_after": 1,
+}
+SERVICES = ("goong", "weather", "outscraper")
+
+
+def stable_rng(*parts):
+    """Random seed theo nội dung tham số -> response tất định"""
+    digest = hashlib.sha256("\0".join(str(p) for p in parts).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def short_id(*parts):
+    return hashlib.sha1("\0".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+
+
+def distance_m(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+
+def parse_latlng(value):
+    try:
+        lat, lng = (float(x) for x in value.split(","))
+        return lat, lng
+    except (AttributeError, ValueError):
+        return None
+
+
+# ------------------------------------------------------------------------------
+# TIÊM ĐỘ TRỄ & LỖI
+# ------------------------------------------------------------------------------
+class FaultInjector:
+    def __init__(self, faults=None, seed=0):
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.defaults = {**DEFAULT_FAULTS, **(faults or {})}
+        self.overrides = {name: {} for name in SERVICES}
+        self.stats = {}
+
+    def config_for(self, service):
+        with self._lock:
+            return {**self.defaults, **self.overrides.get(service, {})}
+
+    def update(self, payload):
+        """payload: {"latency_ms": 50, ..., "services": {"goong": {"error_rate": 0.1}}}"""
+        with self._lock:
+            for key, value in payload.items():
+                if key == "services":
+                    for service, values in value.items():
+                        if service not in self.overrides:
+                            raise ValueError(f"Dịch vụ không tồn tại: {service}")
+                        self.overrides[service].update(self._validate(values))
+                else:
+                    self.defaults.update(self._validate({key: value}))
+
+    @staticmethod
+    def _validate(values):
+        unknown = set(values) - set(DEFAULT_FAULTS)
+        if unknown:
+            raise ValueError(f"Tham số không hợp lệ: {', '.join(sorted(unknown))}")
+        return values
+
+    def sample_latency(self, cfg):
+        dist, base, spread = cfg["latency_dist"], float(cfg["latency_ms"]), float(cfg["latency_spread"])
+        with self._lock:
+            if dist == "fixed":
+                ms = base
+            elif dist == "uniform":
+                ms = self._rng.uniform(base - spread, base + spread)
+            elif dist == "normal":
+                ms = self._rng.gauss(base, spread)
+            elif dist == "lognormal":
+                ms = base * math.exp(self._rng.gauss(0, spread))
+            else:
+                ms = 0.0
+        return max(0.0, ms) / 1000
+
+    def decide(self, service, endpoint):
+        """Trả về (độ trễ giây, status lỗi hoặc None, cấu hình) cho 1 request"""
+        cfg = self.config_for(service)
+        delay = self.sample_latency(cfg)
+        with self._lock:
+            roll = self._rng.random()
+            if roll < cfg["rate_limit_rate"]:
+                status = 429
+            elif roll < cfg["rate_limit_rate"] + cfg["error_rate"]:
+                status = 500
+            else:
+                status = None
+            counter = self.stats.setdefault(f"{service}:{endpoint}", {"requests": 0, "429": 0, "500": 0})
+            counter["requests"] += 1
+            if status: counter[str(status)] += 1
+        return delay, status, cfg
+
+
+# ------------------------------------------------------------------------------
+# DỮ LIỆU GIẢ
+# ------------------------------------------------------------------------------
+def fake_location(rng, spread=0.05):
+    return round(HCMC_CENTER[0] + rng.uniform(-spread, spread), 6), round(HCMC_CENTER[1] + rng.uniform(-spread, spread), 6)
+
+
+def fake_compound(rng, in_hcmc=True):
+    return {
+        "district": rng.choice(DISTRICTS),
+        "commune": rng.choice(COMMUNES),
+        "province": HCMC_PROVINCE if in_hcmc else "Bình Dương",
+    }
+
+
+def fake_address(rng, compound):
+    return f"{rng.randint(1, 300)} {rng.choice(STREETS)}, {compound['commune']}, {compound['district']}, {compound['province']}"
+
+
+def fake_name(rng):
+    return f"{rng.choice(['Quán ', 'Nhà hàng ', ''])}{rng.choice(DISHES)} {rng.choice(OWNERS)}"
+
+
+def goong_place(place_id):
+    """Chi tiết 1 địa điểm suy ra hoàn toàn từ place_id (AutoComplete & Detail khớp nhau)"""
+    rng = stable_rng("place", place_id)
+    in_hcmc = rng.random() > 0.1
+    compound = fake_compound(rng, in_hcmc)
+    lat, lng = fake_location(rng)
+    return {
+        "place_id": place_id,
+        "name": fake_name(rng),
+        "formatted_address": fake_address(rng, compound),
+        "geometry": {"location": {"lat": lat, "lng": lng}},
+        "compound": compound,
+    }
+
+
+def outscraper_place(query):
+    rng = stable_rng("outscraper", query)
+    if rng.random() < 0.05:
+        return None  # Không tìm thấy
+    compound = fake_compound(rng)
+    lat, lng = fake_location(rng)
+    dish = rng.choice(DISHES)
+    opening = rng.choice(["7AM-10PM", "10AM-2PM", "4PM-11PM", "Open 24 hours"])
+    return {
+        "place_id": "ChIJ" + short_id("outscraper", query),
+        "name": fake_name(rng),
+        "full_address": fake_address(rng, compound),
+        "street": rng.choice(STREETS),
+        "borough": compound["district"],
+        "city": "Thành phố Hồ Chí Minh",
+        "country": "Vietnam",
+        "latitude": lat,
+        "longitude": lng,
+        "rating": round(rng.uniform(3.0, 5.0), 1),
+        "range": rng.choice(["$", "$$", "$$$", None]),
+        "working_hours": {day: opening for day in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")},
+        "photo": f"https://example.com/photos/{short_id(query)}.jpg",
+        "street_view": "",
+        "site": "",
+        "phone": f"+84 9{rng.randint(10000000, 99999999)}",
+        "category": dish,
+        "subtypes": [dish, "Nhà hàng"],
+        "description": f"{dish} ngon tại {compound['district']}",
+        "reviews_tags": rng.sample(["ngon", "rẻ", "sạch sẽ", "phục vụ nhanh", "đông khách"], 2),
+    }
+
+
+# ------------------------------------------------------------------------------
+# APP
+# ------------------------------------------------------------------------------
+def create_app(faults=None, seed=0):
+    app = Flask(__name__)
+    app.config["JSON_AS_ASCII"] = False
+    injector = FaultInjector(faults, seed)
+    app.extensions["fault_injector"] = injector
+
+    def inject(service, endpoint):
+        """None nếu request được xử lý bình thường, ngược lại response lỗi"""
+        delay, status, cfg = injector.decide(service, endpoint)
+        if delay: time.sleep(delay)
+        if status == 429:
+            resp = jsonify({"error": "Too Many Requests"})
+            resp.status_code = 429
+            resp.headers["Retry-After"] = str(cfg["retry_after"])
+            return resp
+        if status == 500:
+            return jsonify({"error": "Internal Server Error"}), 500
+        return None
+
+    # --- GOONG ---
+    @app.get("/Geocode")
+    def geocode():
+        if (err := inject("goong", "Geocode")): return err
+        latlng = parse_latlng(request.args.get("latlng"))
+        address = request.args.get("address")
+        if latlng:
+            rng = stable_rng("reverse", f"{latlng[0]:.5f},{latlng[1]:.5f}")
+            lat, lng = latlng
+        elif address:
+            rng = stable_rng("geocode", address.strip().lower())
+            lat, lng = fake_location(rng)
+        else:
+            return jsonify({"results": [], "status": "INVALID_REQUEST"})
+        compound = fake_compound(rng)
+        return jsonify({"status": "OK", "results": [{
+            "place_id": short_id("geocode", lat, lng),
+            "formatted_address": fake_address(rng, compound),
+            "geometry": {"location": {"lat": lat, "lng": lng}},
+            "compound": compound,
+        }]})
+
+    @app.get("/Direction")
+    def direction():
+        if (err := inject("goong", "Direction")): return err
+        points = [parse_latlng(request.args.get("origin"))]
+        points += [parse_latlng(p) for p in request.args.get("waypoints", "").split("|") if p]
+        points.append(parse_latlng(request.args.get("destination")))
+        if any(p is None for p in points):
+            return jsonify({"routes": [], "status": "INVALID_REQUEST"})
+        speed = VEHICLE_SPEED_MS.get(request.args.get("vehicle", "car"), 8.0)
+        legs = []
+        for a, b in zip(points, points[1:]):
+            meters = int(distance_m(*a, *b) * 1.3)  # Đường thật dài hơn đường chim bay
+            legs.append({
+                "distance": {"value": meters, "text": f"{meters / 1000:.1f} km"},
+                "duration": {"value": int(meters / speed), "text": f"{meters / speed / 60:.0f} phút"},
+            })
+        return jsonify({"status": "OK", "routes": [{"legs": legs, "overview_polyline": {"points": polyline.encode(points)}}]})
+
+    @app.get("/Place/AutoComplete")
+    def autocomplete():
+        if (err := inject("goong", "Place/AutoComplete")): return err
+        text = request.args.get("input", "")
+        location = request.args.get("location", "")
+        limit = request.args.get("limit", 10, type=int)
+        rng = stable_rng("autocomplete", text.lower(), location, request.args.get("radius", ""))
+        predictions = []
+        for i in range(rng.randint(0, limit)):
+            place = goong_place("mock_" + short_id(text.lower(), location, i))
+            predictions.append({
+                "place_id": place["place_id"],
+                "description": f"{place['name']}, {place['formatted_address']}",
+                "structured_formatting": {"main_text": place["name"], "secondary_text": place["formatted_address"]},
+                "compound": place["compound"],
+            })
+        return jsonify({"status": "OK", "predictions": predictions})
+
+    @app.get("/Place/Detail")
+    def place_detail():
+        if (err := inject("goong", "Place/Detail")): return err
+        place_id = request.args.get("place_id")
+        if not place_id:
+            return jsonify({"status": "INVALID_REQUEST"})
+        return jsonify({"status": "OK", "result": goong_place(place_id)})
+
+    # --- OPENWEATHER ---
+    @app.get("/data/2.5/weather")
+    def weather():
+        if (err := inject("weather", "weather")): return err
+        city = request.args.get("q", "Ho Chi Minh City")
+        rng = stable_rng("weather", city.lower())
+        return jsonify({
+            "name": city,
+            "main": {"temp": round(rng.uniform(24, 36), 1), "humidity": rng.randint(55, 95)},
+            "weather": [{"description": rng.choice(WEATHER)}],
+        })
+
+    # --- OUTSCRAPER ---
+    @app.post("/google-maps-search")
+    def maps_search():
+        if (err := inject("outscraper", "google-maps-search")): return err
+        payload = request.get_json(silent=True) or {}
+        queries = payload.get("query") or []
+        if isinstance(queries, str): queries = [queries]
+        data = []
+        for query in queries:
+            place = outscraper_place(query)
+            data.append([place] if place else [])
+        return jsonify({"id": short_id("request", *queries), "status": "Success", "data": data})
+
+    # --- ĐIỀU KHIỂN ---
+    @app.route("/__mock/config", methods=["GET", "POST"])
+    def mock_config():
+        if request.method == "POST":
+            try:
+                injector.update(request.get_json(silent=True) or {})
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+        return jsonify({"defaults": injector.defaults, "services": injector.overrides})
+
+    @app.get("/__mock/stats")
+    def mock_stats():
+        return jsonify(injector.stats)
+
+    @app.post("/__mock/reset")
+    def mock_reset():
+        injector.stats.clear()
+        return jsonify({"ok": True})
+
+    return app
+
+
+def serve(app, host="127.0.0.1", port=0):
+    """Chạy server ở thread nền (dùng trong test/benchmark). port=0 -> cổng ngẫu nhiên."""
+    server = make_server(host, port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name="mock-upstream", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Server giả lập Goong / OpenWeather / Outscraper")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--seed", type=int, default=0, help="Seed cho độ trễ & tiêm lỗi")
+    parser.add_argument("--latency-dist", choices=["none", "fixed", "uniform", "normal", "lognormal"], default="none")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency-spread", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Tỉ lệ trả HTTP 500 (0-1)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Tỉ lệ trả HTTP 429 (0-1)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Header Retry-After (giây) khi trả 429")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    faults = {
+        "latency_dist": args.latency_dist, "latency_ms": args.latency_ms, "latency_spread": args.latency_spread,
+        "error_rate": args.error_rate, "rate_limit_rate": args.rate_limit_rate, "retry_after": args.retry_after,
+    }
+    server = make_server(args.host, args.port, create_app(faults, args.seed), threaded=True)
+    print(f"🧪 Mock upstream đang chạy tại http://{args.host}:{args.port} (Ctrl+C để dừng)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -64,4 +64,166 @@ def test_login_success(client):
 def test_search_api(client):
     response = client.get('/api/search?keyword=pho')
     # Depending on your mock data or logic, this might return 200 OK
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_geocode_async_view(client):
+    import httpx
+    from async_runtime import runtime
+
+    def handler(req):
+        assert req.url.path == "/Geocode"
+        return httpx.Response(200, json={"results": [{"geometry": {"location": {"lat": 10.77, "lng": 106.7}}}]})
+
+    runtime.run(_swap_client(runtime, httpx.AsyncClient(transport=httpx.MockTransport(handler))))
+    response = client.post('/api/geocode', json={"query": "Bitexco"})
+    assert response.status_code == 200
+    assert json.loads(response.data) == {"lat": 10.77, "lon": 106.7}
+    runtime.run(_swap_client(runtime, None))
+
+
+async def _swap_client(runtime, new_client):
+    # Client phải được tạo/đóng trên loop của runtime
+    if runtime._client is not None:
+        await runtime._client.aclose()
+    runtime._client = new_client
+
+
+def test_optimize_cache_lookup_runs_off_event_loop(client, monkeypatch):
+    import threading
+    import polyline
+    import map_routes
+    from models import RouteHistory
+
+    user = User.query.filter_by(username="testuser").first()
+    db.session.add(RouteHistory(
+        user_id=user.id, name="Lộ trình", start_point="Chợ Bến Thành",
+        places_json=json.dumps([{"name": "Quán A", "address": "Quận 1", "lat": 10.7, "lng": 106.6}]),
+        polyline_outbound=polyline.encode([(10.77, 106.7), (10.7, 106.6)]), total_distance=1.5, total_duration=5,
+    ))
+    db.session.commit()
+
+    threads = []
+    original = map_routes.find_cached_route
+
+    def spy(*args):
+        threads.append(threading.current_thread().name)
+        return original(*args)
+
+    monkeypatch.setattr(map_routes, "find_cached_route", spy)
+    response = client.post('/api/optimize', json={"starting_point": "chợ bến thành", "places": [{"name": "quán a"}]})
+    data = json.loads(response.data)
+    assert data["from_cache"] is True
+    assert data["start_point_coords"] == {"lat": 10.77, "lon": 106.7}
+    assert threads and threads[0] != "async-runtime"
+
+
+def test_places_coords_uses_catalog_first(client, monkeypatch):
+    import threading
+    import httpx
+    import map_routes
+    from async_runtime import runtime
+    from models import Restaurant
+
+    threads = []
+    original = map_routes.lookup_catalog_coords
+
+    def spy(place_ids):
+        threads.append(threading.current_thread().name)
+        return original(place_ids)
+
+    monkeypatch.setattr(map_routes, "lookup_catalog_coords", spy)
+
+    db.session.add(Restaurant(place_id="known_1", name="Quán A", latitude=10.1, longitude=106.1))
+    db.session.commit()
+
+    geocoded = []
+
+    def handler(req):
+        geocoded.append(req.url.params["address"])
+        if req.url.params["address"] == "missing":
+            return httpx.Response(200, json={"results": []})
+        return httpx.Response(200, json={"results": [{"geometry": {"location": {"lat": 1.0, "lng": 2.0}}}]})
+
+    runtime.run(_swap_client(runtime, httpx.AsyncClient(transport=httpx.MockTransport(handler))))
+    response = client.post('/api/places/coords', json={"places": ["known_1", "other", "missing", "other"]})
+    runtime.run(_swap_client(runtime, None))
+
+    data = json.loads(response.data)
+    assert sorted(geocoded) == ["missing", "other"]
+    assert [r["status"] for r in data["results"]] == ["catalog", "geocoded", "not_found"]
+    assert [c["id"] for c in data["coords"]] == ["known_1", "other"]
+    assert threads and threads[0] != "async-runtime"  # Query catalog không chạy trên event loop
+
+
+def test_run_blocking_queries_count_towards_request(client, monkeypatch):
+    from models import Restaurant
+    from metrics import REQUEST_SQL_QUERIES
+    from query_profiler import slow_query_log
+
+    db.session.add(Restaurant(place_id="known_2", name="Quán B", latitude=10.2, longitude=106.2))
+    db.session.commit()
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+    slow_query_log.reset()
+
+    response = client.post('/api/places/coords', json={"places": ["known_2"]})
+    assert response.status_code == 200
+
+    # Query catalog chạy trong run_blocking nhưng vẫn tính cho request đã gọi
+    labels = 'blueprint="map_bp",method="POST",route="/api/places/coords"'
+    sums = [line for line in REQUEST_SQL_QUERIES.render() if line.startswith(f"http_request_sql_queries_sum{{{labels}}}")]
+    assert sums and float(sums[0].split()[-1]) >= 1
+    assert any("POST /api/places/coords" in s["routes"] for s in slow_query_log.snapshot()["fingerprints"])
+
+def test_optimize_bounds_concurrent_goong_calls(client, monkeypatch):
+    import asyncio
+    import httpx
+    import polyline
+    import map_routes
+    from async_runtime import runtime
+
+    monkeypatch.setattr(map_routes, "PLACES_COORDS_CONCURRENCY", 2)
+    in_flight, peak, calls = [0], [0], []
+
+    async def handler(req):
+        calls.append(req.url.path)
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        if req.url.path == "/Geocode":
+            n = len(req.url.params["address"])
+            return httpx.Response(200, json={"results": [{"geometry": {"location": {"lat": 10 + n / 100, "lng": 106.0}}}]})
+        leg = {"legs": [{"distance": {"value": 1000}, "duration": {"value": 60}}], "overview_polyline": {"points": polyline.encode([(10.7, 106.6)])}}
+        return httpx.Response(200, json={"routes": [leg]})
+
+    places = [{"name": f"Quán {i}", "address": "x" * (i + 1)} for i in range(6)]
+    runtime.run(_swap_client(runtime, httpx.AsyncClient(transport=httpx.MockTransport(handler))))
+    response = client.post('/api/optimize', json={"starting_point": "Chợ Bến Thành", "places": places, "vehicle": "bike"})
+    runtime.run(_swap_client(runtime, None))
+
+    data = json.loads(response.data)
+    assert data["distance_km"] == 7  # 6 địa điểm + chặng về = 7 chặng
+    assert calls.count("/Geocode") == 7 and calls.count("/Direction") == 7
+    assert peak[0] == 2
+
+def test_metrics_endpoint(client, monkeypatch):
+    from goong_client import goong
+    monkeypatch.setitem(app.config, 'ADMIN_TOKEN', "secret")
+    client.get('/api/search?keyword=pho')
+    goong._record("Geocode", 0.02, True)
+    assert client.get('/api/metrics').status_code == 403
+    response = client.get('/api/metrics', headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    body = response.data.decode("utf-8")
+    assert 'http_requests_total{blueprint="restaurant_bp",method="GET",route="/api/search",status="200"}' in body
+    assert 'search_phase_duration_seconds_count{phase="scoring"}' in body
+    assert "http_request_sql_queries_bucket" in body
+    assert 'goong_client_calls_total{endpoint="Geocode"}' in body
+    assert 'goong_client_latency_max_seconds{endpoint="Geocode"}' in body
+    assert 'goong_circuit_state{state="closed"}' in body
+
+
+def test_metrics_closed_without_admin_token(client, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMIN_TOKEN', "")
+    assert client.get('/api/metrics').status_code == 403
+    assert client.get('/api/metrics', headers={"X-Admin-Token": ""}).status_code == 403
@@ -0,0 +1,137 @@
+# tests/test_clean_transform.py
+import importlib
+import sqlite3
+import pytest
+import config
+import dedup
+from translation import Translator
+
+transform = importlib.import_module("3_clean_transform")
+
+SOURCE_COLUMNS = [
+    "id", "place_id", "name", "full_address", "latitude", "longitude", "rating", "working_hour",
+    "photo_url", "street_view", "phone", "site", "category", "review_tags", "subtypes", "description", "range",
+]
+
+
+class FakeBackend:
+    """Dịch giả: ghi lại câu đã gửi; fail=True -> mọi câu lỗi"""
+
+    def __init__(self):
+        self.sent = []
+        self.fail = False
+
+    def translate_batch(self, texts):
+        self.sent.extend(texts)
+        return [None if self.fail else f"EN({t})" for t in texts]
+
+
+def source_row(n, description=None):
+    return {
+        "id": n, "place_id": f"p{n}", "name": f"Quán Phở {n}", "full_address": "1 Lê Lợi, Quận 1, Hồ Chí Minh",
+        "latitude": 10.77, "longitude": 106.70, "rating": 4.0, "working_hour": "", "photo_url": "",
+        "street_view": "", "phone": "", "site": "", "category": "Phở", "review_tags": "[]", "subtypes": "[]",
+        "description": description or f"Phở bò gia truyền số {n}", "range": "₫₫",
+    }
+
+
+@pytest.fixture
+def etl(tmp_path, monkeypatch):
+    src_path, tgt_path = tmp_path / "src.db", tmp_path / "final.db"
+    backend = FakeBackend()
+    monkeypatch.setattr(transform, "SOURCE_DB", str(src_path))
+    monkeypatch.setattr(transform, "TARGET_DB", str(tgt_path))
+    monkeypatch.setattr(config, "TRANSFORM_WORKERS", 1)
+    monkeypatch.setattr(transform, "Translator", lambda target: Translator(
+        backend=backend, target=target, cache_path=str(tmp_path / "cache.db"), rate_per_sec=1000))
+
+    src = sqlite3.connect(src_path)
+    src.execute(f"CREATE TABLE restaurants ({', '.join(SOURCE_COLUMNS)})")
+    src.commit()
+
+    def put(*rows):
+        src.executemany(
+            f"INSERT OR REPLACE INTO restaurants VALUES ({', '.join('?' for _ in SOURCE_COLUMNS)})",
+            [[r[c] for c in SOURCE_COLUMNS] for r in rows],
+        )
+        src.commit()
+
+    def delete(place_id):
+        src.execute("DELETE FROM restaurants WHERE place_id = ?", (place_id,))
+        src.commit()
+
+    def target_rows():
+        conn = sqlite3.connect(tgt_path)
+        rows = {r[0]: r[1:] for r in conn.execute("SELECT place_id, description_en, content_hash FROM restaurants")}
+        conn.close()
+        return rows
+
+    yield backend, put, delete, target_rows
+    src.close()
+
+
+def test_incremental_new_unchanged_updated_deleted(etl):
+    backend, put, delete, target_rows = etl
+    put(source_row(1), source_row(2), source_row(3))
+    assert transform.create_processed_db()["rows"] == 3
+    assert set(target_rows()) == {"p1", "p2", "p3"}
+    assert len(backend.sent) == 3
+
+    # Không đổi gì -> không dịch lại
+    backend.sent.clear()
+    transform.create_processed_db()
+    assert backend.sent == []
+
+    # Sửa p2, xóa p3, thêm p4
+    put(source_row(2, description="Phở gà mới mở"), source_row(4))
+    delete("p3")
+    transform.create_processed_db()
+    rows = target_rows()
+    assert set(rows) == {"p1", "p2", "p4"}
+    assert rows["p2"][0] == "EN(Phở gà mới mở)"
+    assert sorted(backend.sent) == ["Phở bò gia truyền số 4", "Phở gà mới mở"]
+
+
+def test_failed_translation_is_retried_next_run(etl):
+    backend, put, _, target_rows = etl
+    put(source_row(1))
+    backend.fail = True
+    transform.create_processed_db()
+    description_en, content_hash = target_rows()["p1"]
+    assert content_hash is None and description_en == "Phở bò gia truyền số 1"
+
+    backend.fail = False
+    backend.sent.clear()
+    transform.create_processed_db()
+    description_en, content_hash = target_rows()["p1"]
+    assert backend.sent == ["Phở bò gia truyền số 1"]
+    assert description_en == "EN(Phở bò gia truyền số 1)" and content_hash is not None
+
+
+def test_merged_duplicates_are_not_reloaded(etl, tmp_path):
+    _, put, delete, target_rows = etl
+    put(source_row(1), source_row(2))
+    transform.create_processed_db()
+
+    conn = sqlite3.connect(tmp_path / "final.db")
+    dedup.init_merge_table(conn)
+    conn.execute("INSERT INTO merge_decisions (duplicate_place_id, kept_place_id) VALUES ('p2', 'p1')")
+    conn.execute("DELETE FROM restaurants WHERE place_id = 'p2'")
+    conn.commit()
+    conn.close()
+
+    transform.create_processed_db()
+    assert set(target_rows()) == {"p1"}
+
+    # Quán được giữ lại biến mất khỏi nguồn -> quán trùng quay lại catalog
+    delete("p1")
+    transform.create_processed_db()
+    assert set(target_rows()) == {"p2"}
+
+
+def test_existing_hashes_lookup_is_chunked():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE restaurants (place_id TEXT, content_hash TEXT)")
+    conn.executemany("INSERT INTO restaurants VALUES (?, ?)", [(f"p{i}", f"h{i}") for i in range(1200)])
+    found = transform.get_existing_hashes(conn.cursor(), [f"p{i}" for i in range(1200)])
+    assert len(found) == 1200 and found["p1199"] == "h1199"
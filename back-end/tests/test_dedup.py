@@ -0,0 +1,95 @@
+# tests/test_dedup.py
+import sqlite3
+import dedup
+from dedup import find_duplicates, geohash_encode, geohash_neighbors, normalize_name
+
+BASE = {"description": None, "photo_url": None, "working_hour": None, "phone": None, "rating": None}
+
+
+def make_row(row_id, name, lat, lon, **extra):
+    return {**BASE, "id": row_id, "place_id": f"p{row_id}", "name": name, "latitude": lat, "longitude": lon, **extra}
+
+
+def test_normalize_name_strips_accents_and_prefix():
+    assert normalize_name("Quán Phở Hòa") == "pho hoa"
+    assert normalize_name("Nhà hàng Phở Hoà!") == "pho hoa"
+
+
+def test_near_duplicates_are_merged_keeping_most_complete():
+    rows = [
+        make_row(1, "Quán Phở Hòa", 10.78000, 106.70000),
+        make_row(2, "Phở Hoà", 10.78010, 106.70010, description="Phở bò", rating=4.5),
+    ]
+    decisions, _ = find_duplicates(rows, precision=7, max_distance_m=40, min_similarity=0.85)
+    assert [(dup["id"], kept["id"]) for dup, kept, _, _ in decisions] == [(1, 2)]
+
+
+def test_same_name_far_apart_is_not_merged():
+    rows = [
+        make_row(1, "Highlands Coffee", 10.78000, 106.70000),
+        make_row(2, "Highlands Coffee", 10.78200, 106.70000),  # ~220m
+    ]
+    decisions, _ = find_duplicates(rows, precision=7, max_distance_m=40, min_similarity=0.85)
+    assert decisions == []
+
+
+def test_different_names_nearby_are_not_merged():
+    rows = [
+        make_row(1, "Phở Hòa", 10.78000, 106.70000),
+        make_row(2, "Bún Chả Hà Nội", 10.78001, 106.70001),
+        make_row(3, "Cơm Tấm 1", 10.78002, 106.70002),
+        make_row(4, "Cơm Tấm 2", 10.78002, 106.70002),
+    ]
+    decisions, _ = find_duplicates(rows, precision=7, max_distance_m=40, min_similarity=0.85)
+    assert decisions == []
+
+
+def test_pair_across_cell_boundary_is_found():
+    # 2 điểm sát nhau nhưng nằm ở 2 ô geohash khác nhau
+    lat, lon = 10.78000, 106.70000
+    code = geohash_encode(lat, lon, 7)
+    min_lat, min_lon, max_lat, max_lon = dedup.geohash_bbox(code)
+    a = make_row(1, "Cơm Tấm Ba Ghiền", max_lat - 0.00005, lon)
+    b = make_row(2, "Cơm Tấm Ba Ghiền", max_lat + 0.00005, lon)
+    code_b = geohash_encode(b["latitude"], b["longitude"], 7)
+    assert code_b != code and code_b in geohash_neighbors(code)
+
+    decisions, compared = find_duplicates([a, b], precision=7, max_distance_m=40, min_similarity=0.85)
+    assert compared == 1
+    assert len(decisions) == 1
+
+
+def test_dedup_catalog_records_decisions(tmp_path):
+    db = tmp_path / "catalog.db"
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE restaurants (id INTEGER PRIMARY KEY, place_id TEXT, name TEXT, latitude REAL, longitude REAL, "
+        "rating REAL, description TEXT, photo_url TEXT, working_hour TEXT, phone TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO restaurants VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            (1, "p1", "Quán Phở Hòa", 10.78, 106.70, None, None, None, None, None),
+            (2, "p2", "Phở Hoà", 10.7801, 106.7001, 4.5, "Phở bò", None, None, None),
+            (3, "p3", "Bún Chả Hà Nội", 10.80, 106.72, None, None, None, None, None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    assert dedup.dedup_catalog(str(db)) == {"rows": 3, "api_calls": 0}
+
+    conn = sqlite3.connect(db)
+    assert [r[0] for r in conn.execute("SELECT place_id FROM restaurants ORDER BY id")] == ["p2", "p3"]
+    assert conn.execute("SELECT duplicate_place_id, kept_place_id FROM merge_decisions").fetchall() == [("p1", "p2")]
+    conn.close()
+
+    # Quán được giữ lại (p2) biến mất khỏi catalog -> quyết định gộp cũ bị bỏ
+    conn = sqlite3.connect(db)
+    conn.execute("DELETE FROM restaurants WHERE place_id = 'p2'")
+    conn.commit()
+    conn.close()
+    dedup.dedup_catalog(str(db))
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM merge_decisions").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,44 @@
+# tests/test_enrich_outscraper.py
+import importlib
+import sqlite3
+import config
+
+enrich = importlib.import_module("2_enrich_outscraper")
+
+
+def test_existing_enriched_rows_are_backfilled(tmp_path, monkeypatch):
+    raw_path, enriched_path = tmp_path / "raw.db", tmp_path / "enriched.db"
+    monkeypatch.setattr(config, "DB_RAW_PATH", str(raw_path))
+    monkeypatch.setattr(config, "DB_ENRICHED_PATH", str(enriched_path))
+
+    raw = sqlite3.connect(raw_path)
+    raw.execute("CREATE TABLE restaurants (id INTEGER PRIMARY KEY, name TEXT, address TEXT, latitude REAL, longitude REAL)")
+    raw.executemany("INSERT INTO restaurants VALUES (?, ?, ?, ?, ?)", [
+        (1, "Phở Hòa", "260C Pasteur", 10.78950, 106.68900),
+        (2, "Cơm Tấm Ba Ghiền", "84 Đặng Văn Ngữ", 10.79800, 106.67200),
+        (3, "Bún Chả Mới Mở", "1 Lê Lợi", 10.77400, 106.70300),  # Chưa từng enrich
+    ])
+    raw.commit()
+    raw.close()
+
+    # DB enriched tạo trước khi có bảng enrichment_state (tên/tọa độ Google lệch chút so với Goong)
+    old = sqlite3.connect(enriched_path)
+    old.execute("CREATE TABLE restaurants (id INTEGER PRIMARY KEY, place_id TEXT UNIQUE, name TEXT, latitude REAL, longitude REAL)")
+    old.executemany("INSERT INTO restaurants (place_id, name, latitude, longitude) VALUES (?, ?, ?, ?)", [
+        ("g1", "Phở Hoà Pasteur", 10.78960, 106.68910),
+        ("g2", "Cơm Tấm Ba Ghiền", 10.79805, 106.67195),
+    ])
+    old.commit()
+    old.close()
+
+    enrich.init_target_db()
+
+    conn = sqlite3.connect(enriched_path)
+    states = conn.execute("SELECT source_id, place_id, status FROM enrichment_state ORDER BY source_id").fetchall()
+    conn.close()
+    assert states == [(1, "g1", "ok"), (2, "g2", "ok")]
+    assert [row[0] for row in enrich.get_source_data()] == [3]
+
+    # Chạy lại không backfill lần nữa (bảng đã tồn tại)
+    enrich.init_target_db()
+    assert [row[0] for row in enrich.get_source_data()] == [3]
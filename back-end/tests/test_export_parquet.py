@@ -0,0 +1,35 @@
+# tests/test_export_parquet.py
+import importlib
+import sqlite3
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+export = importlib.import_module("5_export_parquet")
+transform = importlib.import_module("3_clean_transform")
+
+
+def test_export_matches_sqlite(tmp_path):
+    source = str(tmp_path / "processed.db")
+    conn = sqlite3.connect(source)
+    conn.execute(transform.TARGET_SCHEMA)
+    conn.executemany(
+        "INSERT INTO restaurants (place_id, name, latitude, longitude, rating, range, "
+        "cuisine, district, flavor, minPrice, maxPrice) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [
+            ("p1", "Phở A", 10.77, 106.70, 4.5, 1, "Việt Nam", "Quận 1", '["mặn"]', 1000, 100000),
+            ("p2", "Sushi B", 10.78, 106.69, 4.0, 3, "Nhật Bản", "Quận 3", "[]", 500000, 2000000),
+            ("p3", "Quán C", None, None, None, None, "Việt Nam", "Quận 1", None, None, None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    parquet_path = str(tmp_path / "catalog.parquet")
+    arrow_path = str(tmp_path / "catalog.arrow")
+    assert export.export_catalog(source, parquet_path, arrow_path) == {"rows": 3, "api_calls": 0}
+
+    table = pa.ipc.open_file(pa.memory_map(arrow_path)).read_all()
+    assert pa.types.is_dictionary(table.schema.field("cuisine").type)
+    assert table.column("flavor").to_pylist() == [["mặn"], [], []]
+    assert table.column("range").to_pylist() == [1, 3, None]
+    assert export.validate_export(parquet_path, source) == []
@@ -0,0 +1,45 @@
+# tests/test_generate_catalog.py
+import json
+import sqlite3
+import importlib
+from generate_catalog import BEV_FOOD_VALUES, COURSE_TYPE_VALUES, DISHES, DISTRICTS, generate_catalog
+
+transform = importlib.import_module("3_clean_transform")
+
+
+def read_rows(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(r) for r in conn.execute("SELECT * FROM restaurants ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_generated_catalog_is_deterministic_and_plausible(tmp_path):
+    first, second = tmp_path / "a.db", tmp_path / "b.db"
+    generate_catalog(str(first), 500, seed=1, chunk_size=128)
+    generate_catalog(str(second), 500, seed=1)
+
+    rows = read_rows(first)
+    assert rows == read_rows(second)
+    assert len(rows) == 500
+    assert len({r["place_id"] for r in rows}) == 500
+
+    districts = {d[0] for d in DISTRICTS}
+    for r in rows:
+        assert 10.6 < r["latitude"] < 10.95 and 106.5 < r["longitude"] < 106.9
+        assert r["district"] in districts
+        assert r["minprice"] < r["maxprice"]
+        assert isinstance(json.loads(r["flavor"]), list)
+        assert r["bevfood"] in BEV_FOOD_VALUES and r["coursetype"] in COURSE_TYPE_VALUES
+
+
+def test_dish_vocabulary_matches_etl():
+    for dish, _, course, bev_food, _ in DISHES:
+        # Cùng giá trị như bước ETL gán cho quán chỉ có tên món
+        assert bev_food == transform.map_beverage_or_food(dish.lower(), ""), dish
+        # Đồ uống luôn có courseType "đồ uống" (map_course_type)
+        assert (course == "đồ uống") == (bev_food == "nước"), dish
+    assert {d[3] for d in DISHES} == BEV_FOOD_VALUES
+    assert {d[2] for d in DISHES} == COURSE_TYPE_VALUES
@@ -0,0 +1,99 @@
+# tests/test_goong_client.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from goong_client import GoongClient, CircuitBreaker, GoongError, GoongRateLimitError, GoongUnavailableError
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.headers = {}
+        self._payload = payload or {}
+
+    def json(self):
+        return self._payload
+
+
+def make_client(responses, **kwargs):
+    client = GoongClient(api_key="test", backoff_base=0, **kwargs)
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append((url, params, timeout))
+        return responses.pop(0)
+
+    client.session.get = fake_get
+    return client, calls
+
+
+def test_retry_then_success():
+    client, calls = make_client([FakeResponse(503), FakeResponse(200, {"results": [1]})])
+    assert client.get("Geocode", {"address": "Q1"}) == {"results": [1]}
+    assert len(calls) == 2
+    assert calls[0][1]["api_key"] == "test"
+    assert calls[0][2] == 5  # timeout riêng của Geocode
+    assert client.stats()["endpoints"]["Geocode"]["calls"] == 2
+
+
+def test_rate_limit_after_retries():
+    client, calls = make_client([FakeResponse(429)] * 3, max_retries=2)
+    with pytest.raises(GoongRateLimitError):
+        client.get("Place/Detail", {"place_id": "x"})
+    assert len(calls) == 3
+
+
+def test_circuit_breaker_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client, calls = make_client([FakeResponse(500)] * 2, max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(GoongError):
+            client.get("Direction", {})
+    with pytest.raises(GoongUnavailableError):
+        client.get("Direction", {})
+    assert len(calls) == 2
+    assert client.stats()["circuit"] == "open"
+
+
+def test_half_open_admits_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+
+    # Nhiều request cùng lúc -> chỉ 1 request được đi thử
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        admitted = list(pool.map(lambda _: breaker.allow(), range(8)))
+    assert admitted.count(True) == 1
+
+    breaker.record_failure()  # Request thử lỗi -> mở lại
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_success()  # Request thử thành công -> đóng
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_lost_probe_is_replaced_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()      # Request thử không bao giờ báo kết quả (VD bị huỷ)
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_probe_with_client_error_releases_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    client, calls = make_client([FakeResponse(404), FakeResponse(200, {"ok": True})], max_retries=0, breaker=breaker)
+    with pytest.raises(GoongError):
+        client.get("Geocode", {"address": "x"})  # Request thử nhận 4xx -> không kẹt lượt thử
+    assert breaker.state == "half-open"
+    assert client.get("Geocode", {"address": "x"}) == {"ok": True}
+    assert breaker.state == "closed" and len(calls) == 2
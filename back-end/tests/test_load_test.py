@@ -0,0 +1,40 @@
+# tests/test_load_test.py
+from load_test import Stats, compare_reports, parse_mix
+import pytest
+
+
+def report(rps, p95, error_rate=0.0):
+    m = {"requests": 100, "rps": rps, "p95_ms": p95, "p99_ms": p95 * 1.5, "error_rate": error_rate}
+    return {"meta": {}, "total": m, "endpoints": {"GET /api/search": m}}
+
+
+def test_stats_summary_per_endpoint():
+    stats = Stats()
+    for ms in range(1, 101):
+        stats.record("GET /api/search", float(ms), 200)
+    stats.record("POST /api/reviews", 5.0, 500)
+    stats.record("POST /api/reviews", 7.0, "exception")
+
+    summary = stats.summary(elapsed_s=10)
+    search = summary["endpoints"]["GET /api/search"]
+    assert (search["p50_ms"], search["p95_ms"], search["p99_ms"]) == (50.0, 95.0, 99.0)
+    assert search["rps"] == 10.0 and search["error_rate"] == 0.0
+    assert summary["endpoints"]["POST /api/reviews"]["error_rate"] == 1.0
+    assert summary["endpoints"]["POST /api/reviews"]["statuses"] == {"500": 1, "exception": 1}
+    assert summary["total"]["requests"] == 102
+
+
+def test_compare_flags_only_regressions():
+    rows = compare_reports(report(100, 50), report(95, 54), threshold=0.10)
+    assert not any(worse for *_, worse in rows)
+
+    rows = compare_reports(report(100, 50), report(80, 70, error_rate=0.05), threshold=0.10)
+    worse = {(name, metric) for name, metric, *_, bad in rows if bad}
+    assert ("TỔNG", "rps") in worse and ("GET /api/search", "p95_ms") in worse
+    assert ("GET /api/search", "error_rate") in worse
+
+
+def test_parse_mix_rejects_unknown_session():
+    assert parse_mix("browse=3,review=1") == {"browse": 3.0, "review": 1.0}
+    with pytest.raises(SystemExit):
+        parse_mix("browse=1,checkout=1")
@@ -0,0 +1,135 @@
+# tests/test_load_to_render.py
+import argparse
+import importlib
+import os
+import sqlite3
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, text
+import config
+
+pgserver = pytest.importorskip("pgserver")
+loader = importlib.import_module("4_load_to_render")
+transform = importlib.import_module("3_clean_transform")
+
+
+@pytest.fixture(scope="module")
+def pg_url(tmp_path_factory):
+    server = pgserver.get_server(str(tmp_path_factory.mktemp("pgdata")), cleanup_mode="stop")
+    # connect_render dùng psycopg2 (COPY) -> bỏ phần driver của URI pgserver
+    yield "postgresql://" + server.get_uri().split("://", 1)[1]
+    server.cleanup()
+
+
+def psycopg2_url(pg_url):
+    return pg_url.replace("postgresql://", "postgresql+psycopg2://", 1)
+
+
+def migrate(pg_url, revision="head"):
+    cfg = Config(os.path.join(loader.backend_dir, "alembic.ini"))
+    cfg.cmd_opts = argparse.Namespace(x=[f"db_url={psycopg2_url(pg_url)}"])
+    command.upgrade(cfg, revision)
+
+
+@pytest.fixture
+def empty_pg(monkeypatch, pg_url):
+    monkeypatch.setattr(config, "RENDER_DB_URL", pg_url)
+    engine = create_engine(psycopg2_url(pg_url))
+    with engine.begin() as pg:
+        pg.execute(text("DROP SCHEMA public CASCADE; CREATE SCHEMA public"))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch, pg_url, empty_pg):
+    source = str(tmp_path / "processed.db")
+    conn = sqlite3.connect(source)
+    conn.execute(transform.TARGET_SCHEMA)
+    conn.close()
+    monkeypatch.setattr(config, "DB_FINAL_PATH", source)
+    monkeypatch.setattr(config, "RENDER_DB_URL", pg_url)
+
+    engine = empty_pg
+    migrate(pg_url)  # Bước migrate chạy tay trước khi nạp (README - Step 5)
+
+    def put(*rows):
+        with sqlite3.connect(source) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO restaurants (place_id, name, district, rating) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete(place_id):
+        with sqlite3.connect(source) as conn:
+            conn.execute("DELETE FROM restaurants WHERE place_id = ?", (place_id,))
+
+    def server(sql="SELECT place_id, name FROM restaurants ORDER BY place_id"):
+        with engine.begin() as pg:
+            return [tuple(r) for r in pg.execute(text(sql))]
+
+    yield put, delete, server
+
+
+def last_version(server):
+    return server("SELECT inserted, updated, deleted, total FROM catalog_versions ORDER BY id DESC LIMIT 1")[0]
+
+
+def test_sync_inserts_updates_deletes(catalog):
+    put, delete, server = catalog
+    put(("p1", "Phở A", "Quận 1", 4.5), ("p2", "Bún B", "Quận 3", 4.0))
+    assert loader.sync_catalog()["rows"] == 2
+    assert server() == [("p1", "Phở A"), ("p2", "Bún B")]
+    assert last_version(server) == (2, 0, 0, 2)
+
+    # Không đổi gì -> không đẩy dòng nào
+    loader.sync_catalog()
+    assert last_version(server) == (0, 0, 0, 2)
+
+    put(("p1", "Phở A mới", "Quận 1", 4.5), ("p3", "Cơm C", "Quận 5", 3.5))
+    delete("p2")
+    loader.sync_catalog()
+    assert server() == [("p1", "Phở A mới"), ("p3", "Cơm C")]
+    assert last_version(server) == (1, 1, 1, 2)
+
+
+def test_server_side_edits_are_repaired(catalog):
+    put, delete, server = catalog
+    put(("p1", "Phở A", "Quận 1", 4.5), ("p2", "Bún B", "Quận 3", 4.0))
+    loader.sync_catalog()
+
+    server("UPDATE restaurants SET name = 'sửa tay' WHERE place_id = 'p1' RETURNING 1")
+    server("DELETE FROM restaurants WHERE place_id = 'p2' RETURNING 1")
+    loader.sync_catalog()
+    assert server() == [("p1", "Phở A"), ("p2", "Bún B")]
+    assert last_version(server) == (1, 1, 0, 2)
+
+
+def test_full_load_then_sync_only_pushes_changes(catalog):
+    put, delete, server = catalog
+    put(("p1", "Phở A", "Quận 1", 4.5), ("p2", "Bún B", "Quận 3", 4.0))
+    assert loader.transfer_data_final()["rows"] == 2
+    assert server("SELECT place_id FROM restaurant_sync_state ORDER BY place_id") == [("p1",), ("p2",)]
+
+    put(("p2", "Bún B mới", "Quận 3", 4.0))
+    loader.sync_catalog()
+    assert last_version(server) == (0, 1, 0, 2)
+    assert server() == [("p1", "Phở A"), ("p2", "Bún B mới")]
+
+
+def test_loader_refuses_unmigrated_database(empty_pg, pg_url):
+    with pytest.raises(loader.SchemaNotReadyError, match="upgrade head"):
+        loader.connect_render()
+
+    migrate(pg_url, "0003_sync_state")  # Chưa ở head -> vẫn từ chối, không tự migrate
+    with pytest.raises(loader.SchemaNotReadyError, match="0003_sync_state"):
+        loader.connect_render()
+
+
+def test_loader_asks_to_stamp_create_all_database(empty_pg):
+    from models import db
+    for metadata in db.metadatas.values():
+        metadata.create_all(empty_pg)
+    with pytest.raises(loader.SchemaNotReadyError, match="alembic stamp"):
+        loader.connect_render()
@@ -0,0 +1,94 @@
+# back-end/tests/test_migrations.py
+import os
+import sqlite3
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+from models import db
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_config(monkeypatch, db_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db_path}")
+    return Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+
+
+# SQLite không reflect được index biểu thức lower(start_point) -> autogenerate bỏ qua index đó
+@pytest.mark.filterwarnings("ignore:.*expression-based index")
+def test_upgrade_matches_models_and_downgrades(tmp_path, monkeypatch):
+    db_path = tmp_path / "mig.db"
+    cfg = make_config(monkeypatch, db_path)
+
+    command.upgrade(cfg, "head")
+    command.check(cfg)  # Raise nếu models khác schema sau migrations (quên tạo revision)
+
+    conn = sqlite3.connect(db_path)
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"ix_review_place_created", "ix_route_history_start_point_lower", "ix_restaurants_lat_lon"} <= indexes
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM route_history WHERE lower(start_point) = lower(?)", ("Quận 1",)
+    ).fetchall()
+    assert "ix_route_history_start_point_lower" in plan[0][-1]
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"restaurant_sync_state", "catalog_versions"} <= tables  # Bảng sync của ETL
+    assert "server_hash" in {row[1] for row in conn.execute("PRAGMA table_info(restaurant_sync_state)")}
+    conn.close()
+
+    command.downgrade(cfg, "base")
+    conn = sqlite3.connect(db_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert tables == {"alembic_version"}
+
+
+def create_all(db_path):
+    """Schema như db.create_all() của phiên bản cũ (không có alembic_version)"""
+    engine = create_engine(f"sqlite:///{db_path}")
+    for metadata in db.metadatas.values():
+        metadata.create_all(engine)
+    engine.dispose()
+
+
+def current_revision(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT version_num FROM alembic_version").fetchall()
+    conn.close()
+    return [row[0] for row in rows]
+
+
+@pytest.mark.filterwarnings("ignore:.*expression-based index")
+def test_create_all_database_is_stamped_then_upgraded(tmp_path, monkeypatch):
+    # DB tạo bởi create_all khi models đã có index (upgrade từ 0001 lỗi) và ETL cũ đã tự tạo bảng sync
+    db_path = tmp_path / "legacy.db"
+    cfg = make_config(monkeypatch, db_path)
+    create_all(db_path)
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE restaurant_sync_state (place_id TEXT PRIMARY KEY, row_hash TEXT NOT NULL, synced_at TIMESTAMP)")
+    conn.close()
+
+    command.stamp(cfg, "0002_lookup_indexes")
+    command.upgrade(cfg, "head")
+    command.check(cfg)
+    assert current_revision(db_path) == [ScriptDirectory.from_config(cfg).get_current_head()]
+    conn = sqlite3.connect(db_path)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert {"restaurant_sync_state", "catalog_versions"} <= tables
+
+
+@pytest.mark.filterwarnings("ignore:.*expression-based index")
+def test_pre_index_database_is_stamped_initial_then_upgraded(tmp_path, monkeypatch):
+    db_path = tmp_path / "older.db"
+    cfg = make_config(monkeypatch, db_path)
+    create_all(db_path)
+    conn = sqlite3.connect(db_path)
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'").fetchall():
+        conn.execute(f"DROP INDEX {name}")
+    conn.close()
+
+    command.stamp(cfg, "0001_initial")
+    command.upgrade(cfg, "head")
+    command.check(cfg)
@@ -0,0 +1,58 @@
+# tests/test_mock_upstream.py
+import importlib
+import pytest
+from goong_client import GoongClient, GoongRateLimitError
+from mock_upstream import create_app, serve
+
+
+@pytest.fixture
+def upstream():
+    app = create_app(seed=1)
+    server, base_url = serve(app)
+    yield app, base_url
+    server.shutdown()
+
+
+def test_goong_responses_are_deterministic(upstream):
+    _, base_url = upstream
+    client = GoongClient(base_url=base_url, api_key="test")
+
+    first = client.get("Place/AutoComplete", {"input": "phở", "location": "10.77,106.70", "limit": 10})
+    assert first == client.get("Place/AutoComplete", {"input": "phở", "location": "10.77,106.70", "limit": 10})
+    assert first["status"] == "OK"
+
+    # Detail khớp với prediction của AutoComplete
+    for pred in first["predictions"]:
+        detail = client.get("Place/Detail", {"place_id": pred["place_id"]})["result"]
+        assert detail["compound"] == pred["compound"]
+
+    route = client.get("Direction", {
+        "origin": "10.77,106.70", "destination": "10.80,106.72", "waypoints": "10.78,106.71", "vehicle": "car",
+    })
+    legs = route["routes"][0]["legs"]
+    assert len(legs) == 2 and all(leg["distance"]["value"] > 0 for leg in legs)
+
+
+def test_rate_limit_injection_per_service(upstream):
+    app, base_url = upstream
+    app.extensions["fault_injector"].update({"services": {"goong": {"rate_limit_rate": 1.0, "retry_after": 0}}})
+    client = GoongClient(base_url=base_url, api_key="test", max_retries=1)
+
+    with pytest.raises(GoongRateLimitError):
+        client.get("Geocode", {"address": "Bitexco"})
+
+    weather = app.test_client().get("/data/2.5/weather", query_string={"q": "Ho Chi Minh City"})
+    assert weather.status_code == 200
+    assert app.extensions["fault_injector"].stats["goong:Geocode"] == {"requests": 2, "429": 2, "500": 0}
+
+
+def test_outscraper_http_client_against_mock(upstream):
+    _, base_url = upstream
+    enrich = importlib.import_module("2_enrich_outscraper")
+    client = enrich.OutscraperHttpClient(base_url, "test")
+
+    queries = [f"Quán {i} + Quận 1 near 10.77,106.70" for i in range(20)]
+    data = client.google_maps_search(queries, limit=1, language="vi", region="VN")
+    assert len(data) == len(queries)
+    places = [p[0] for p in data if p]
+    assert places and all(enrich.build_target_row(p)["place_id"] for p in places)
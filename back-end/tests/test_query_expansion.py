@@ -0,0 +1,56 @@
+# back-end/tests/test_query_expansion.py
+from query_expansion import QueryExpander, tokenize
+from restaurant_routes import MAX_SEARCH_TERMS, generate_search_terms
+
+PHRASES = {
+    "noodle": ["bún", "mì", "phở"],
+    "beef noodle": ["bún bò", "phở bò"],
+    "soup": ["canh", "phở"],
+    "coffee": ["cà phê"],
+}
+
+
+def test_tokenize_strips_accents_and_plurals():
+    assert tokenize("Bánh Mì Sandwiches") == ["banh", "mi", "sandwich"]
+
+
+def test_longest_match_wins():
+    expander = QueryExpander(PHRASES)
+    terms = expander.expand("spicy beef noodles")
+    assert terms[0] == "spicy beef noodles"
+    assert "bún bò" in terms and "phở bò" in terms
+    assert "mì" not in terms  # "noodle" đơn lẻ không khớp thêm khi đã khớp "beef noodle"
+
+
+def test_vietnamese_to_english_without_accents():
+    expander = QueryExpander(PHRASES)
+    assert expander.expand("ca phe sua") == ("ca phe sua", "cà phê", "coffee")
+    assert expander.expand("phở") == ("phở", "noodle", "soup")
+
+
+def test_single_syllable_value_only_expands_whole_query():
+    expander = QueryExpander(PHRASES)
+    assert expander.expand("bún chả") == ("bún chả",)
+    assert expander.expand("bún") == ("bún", "noodle")
+    assert expander.expand("bun bo hue") == ("bun bo hue", "bún bò", "beef noodle")  # Cụm nhiều âm tiết vẫn khớp từng phần
+    assert generate_search_terms("bún chả") == ["bún chả"]
+
+
+def test_terms_are_capped_and_interleaved():
+    expander = QueryExpander(PHRASES, max_terms=4)
+    assert expander.expand("noodle soup") == ("noodle soup", "noodle", "soup", "bún")
+
+
+def test_expansion_is_cached():
+    expander = QueryExpander(PHRASES)
+    expander.expand("coffee")
+    expander.expand("coffee")
+    assert expander.expand.cache_info().hits == 1
+
+
+def test_generate_search_terms_uses_search_map():
+    terms = generate_search_terms("spicy beef noodle soup")
+    assert terms[0] == "spicy beef noodle soup"
+    assert {"bún bò", "súp"} <= set(terms)
+    assert len(terms) <= MAX_SEARCH_TERMS
+    assert generate_search_terms("") == []
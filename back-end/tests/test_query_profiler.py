@@ -0,0 +1,116 @@
+# back-end/tests/test_query_profiler.py
+import os
+import sys
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + "/api")
+
+from query_profiler import SlowQueryLog, explain, fingerprint, normalize_statement, slow_query_log
+from app import app, db
+
+
+def test_normalize_statement_strips_literals_and_params():
+    a = "SELECT * FROM restaurants WHERE name ILIKE '%phở%' AND id IN (?, ?, ?) LIMIT 20"
+    b = "SELECT *  FROM restaurants WHERE name ILIKE 'bún' AND id IN (%(id_1)s, %(id_2)s) LIMIT 500"
+    assert normalize_statement(a) == "SELECT * FROM restaurants WHERE name ILIKE ? AND id IN (?...) LIMIT ?"
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint("SELECT * FROM users WHERE id = ?")
+
+
+def test_slow_queries_recorded_and_explained_once():
+    log = SlowQueryLog(threshold_ms=0, capacity=3)
+    engine = create_engine("sqlite:///:memory:")
+    log.attach(engine)
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)"))
+        for i in range(5):
+            conn.execute(text("SELECT name FROM t WHERE id = :id"), {"id": i})
+
+    snap = log.snapshot()
+    assert len(snap["recent"]) == 3  # Ring buffer giữ 3 câu gần nhất
+    select = next(s for s in snap["fingerprints"] if s["statement"].startswith("SELECT"))
+    assert select["count"] == 5
+    assert "SEARCH t USING INTEGER PRIMARY KEY" in select["plan"]
+
+    create = next(s for s in snap["fingerprints"] if s["statement"].startswith("CREATE"))
+    assert create["plan"] is None  # Không EXPLAIN câu ghi/DDL
+
+
+def test_fast_queries_ignored():
+    log = SlowQueryLog(threshold_ms=10_000)
+    engine = create_engine("sqlite:///:memory:")
+    log.attach(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert log.snapshot()["recent"] == []
+
+
+def test_failed_statement_does_not_leave_timer_behind():
+    log = SlowQueryLog(threshold_ms=0)
+    engine = create_engine("sqlite:///:memory:")
+    log.attach(engine)
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        assert conn.connection.info["profiler_query_start"] == []
+        conn.execute(text("SELECT 1"))
+        assert conn.connection.info["profiler_query_start"] == []
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.executed = []
+        self.connection = self
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement, parameters=None):
+        self.executed.append(statement)
+
+    def fetchall(self):
+        return [("Seq Scan on restaurants",)]
+
+    def close(self):
+        pass
+
+
+def test_postgres_plan_does_not_rerun_query():
+    cursor = RecordingCursor()
+    plan = explain(cursor, "postgresql", "SELECT * FROM restaurants WHERE rating > %s", (4,))
+    assert plan == "Seq Scan on restaurants"
+    explains = [s for s in cursor.executed if s.startswith("EXPLAIN")]
+    assert explains == ["EXPLAIN SELECT * FROM restaurants WHERE rating > %s"]  # Không ANALYZE
+
+
+def test_admin_endpoint_closed_without_configured_token():
+    client = app.test_client()
+    app.config['ADMIN_TOKEN'] = ""
+    assert client.get('/api/admin/slow-queries').status_code == 403
+    assert client.get('/api/admin/slow-queries', headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_admin_endpoint_requires_token():
+    client = app.test_client()
+    old_threshold = slow_query_log.threshold_ms
+    app.config['ADMIN_TOKEN'] = "secret"
+    slow_query_log.threshold_ms = 0
+    try:
+        with app.app_context():
+            db.create_all()
+        client.get('/api/search?keyword=pho')
+        assert client.get('/api/admin/slow-queries').status_code == 403
+        assert client.get('/api/admin/slow-queries', headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+        response = client.get('/api/admin/slow-queries', headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert any("GET /api/search" in s["routes"] for s in data["fingerprints"])
+
+        client.delete('/api/admin/slow-queries', headers={"X-Admin-Token": "secret"})
+        assert client.get('/api/admin/slow-queries', headers={"X-Admin-Token": "secret"}).get_json()["recent"] == []
+    finally:
+        slow_query_log.threshold_ms = old_threshold
+        app.config['ADMIN_TOKEN'] = ""
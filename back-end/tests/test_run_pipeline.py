@@ -0,0 +1,38 @@
+# tests/test_run_pipeline.py
+from datetime import datetime, timedelta
+import config
+import run_pipeline
+
+
+def make_state(name, args, days_ago):
+    stage = run_pipeline.STAGES[name]
+    completed_at = (datetime.now() - timedelta(days=days_ago)).isoformat(timespec="seconds")
+    return {name: {"fingerprint": run_pipeline.fingerprint(stage, args), "completed_at": completed_at}}
+
+
+def test_scan_and_enrich_expire_without_input_changes(tmp_path, monkeypatch):
+    raw = tmp_path / "raw.db"
+    enriched = tmp_path / "enriched.db"
+    raw.write_bytes(b"")
+    enriched.write_bytes(b"")
+    monkeypatch.setitem(run_pipeline.STAGES["scan"], "outputs", [str(raw)])
+    monkeypatch.setitem(run_pipeline.STAGES["enrich"], "inputs", [str(raw)])
+    monkeypatch.setitem(run_pipeline.STAGES["enrich"], "outputs", [str(enriched)])
+    monkeypatch.setattr(config, "SCAN_REFRESH_DAYS", 30)
+    monkeypatch.setattr(config, "ENRICH_REFRESH_DAYS", 90)
+    args = run_pipeline.parse_args([])
+
+    def up_to_date(name, days_ago):
+        return run_pipeline.is_up_to_date(name, run_pipeline.STAGES[name], make_state(name, args, days_ago), args)
+
+    assert up_to_date("scan", 1)
+    assert not up_to_date("scan", 31)
+    assert up_to_date("enrich", 31)
+    assert not up_to_date("enrich", 91)
+
+    # --refresh-days thay đổi cả hạn dùng của bước enrich
+    args = run_pipeline.parse_args(["--refresh-days", "7"])
+    assert not up_to_date("enrich", 8)
+
+    # Bước không có max_age_days không bao giờ hết hạn
+    assert not run_pipeline.is_expired(run_pipeline.STAGES["transform"], {}, args)
@@ -0,0 +1,124 @@
+# tests/test_scan_goong.py
+import importlib
+import sqlite3
+import time
+import pytest
+import config
+import grid
+from goong_client import GoongError, GoongRateLimitError
+from rate_limiter import TokenBucket
+
+scan = importlib.import_module("1_scan_goong")
+
+
+def test_token_bucket_burst_then_rate():
+    bucket = TokenBucket(rate=50, capacity=5)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.05  # 5 token đầu có sẵn
+
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.08  # Sau đó ~1 token / 20ms
+
+
+def test_run_pool_keeps_results_finished_after_rate_limit():
+    handled = []
+
+    def worker(task):
+        if task == 0:
+            time.sleep(0.02)
+            raise scan.RateLimitError("429")
+        time.sleep(0.1)  # Đang chạy khi task 0 gặp 429
+        return f"data{task}"
+
+    stopped = scan.run_pool([0, 1], worker, lambda t, d: handled.append((t, d)), max_workers=2)
+    assert stopped
+    assert handled == [(1, "data1")]
+
+
+class FakeGoong:
+    """AutoComplete: mỗi từ khóa 1 quán; ném 429 ở lần gọi thứ fail_at (đếm từ 1)"""
+
+    def __init__(self, fail_at=None, error_terms=()):
+        self.calls = []
+        self.fail_at = fail_at
+        self.error_terms = error_terms
+
+    def get(self, endpoint, params):
+        self.calls.append((endpoint, params.get("input") or params.get("place_id")))
+        if self.fail_at and len(self.calls) == self.fail_at:
+            raise GoongRateLimitError("429")
+        if params.get("input") in self.error_terms:
+            raise GoongError("502")
+        if endpoint == "Place/AutoComplete":
+            place_id = f"goong_{params['input']}"
+            return {"status": "OK", "predictions": [{"place_id": place_id, "compound": {"province": "Hồ Chí Minh"}}]}
+        return {"status": "OK", "result": {
+            "place_id": params["place_id"], "name": params["place_id"], "formatted_address": "Quận 1",
+            "geometry": {"location": {"lat": 10.77, "lng": 106.70}}, "compound": {"province": "Hồ Chí Minh"},
+        }}
+
+    def stats(self):
+        return {"endpoints": {"all": {"calls": len(self.calls)}}}
+
+
+@pytest.fixture
+def scan_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DB_RAW_PATH", str(tmp_path / "raw.db"))
+    monkeypatch.setattr(config, "SCAN_MAX_WORKERS", 1)
+    monkeypatch.setattr(config, "SCAN_RATE_PER_SEC", 1000)
+    monkeypatch.setattr(scan, "get_hcmc_grid", lambda: grid.root_cells(grid.CITY_BBOXES["hcmc"], 1))
+    monkeypatch.setattr(scan, "get_search_terms", lambda: ["phở", "bún", "cơm"])
+    return tmp_path
+
+
+def test_scan_resumes_from_checkpoint_after_rate_limit(scan_env, monkeypatch):
+    tmp_path = scan_env
+    # Lần 1: 429 ở query thứ 2 -> dừng, chưa xong
+    first = FakeGoong(fail_at=2)
+    monkeypatch.setattr(scan, "GoongClient", lambda api_key: first)
+    assert scan.start_scan()["complete"] is False
+
+    # Lần 2: không gọi lại query đã xong ("cơm" có thể đã chạy xong trước khi thấy 429)
+    second = FakeGoong()
+    monkeypatch.setattr(scan, "GoongClient", lambda api_key: second)
+    assert scan.start_scan()["complete"] is True
+    autocompleted = [term for endpoint, term in second.calls if endpoint == "Place/AutoComplete"]
+    assert "phở" not in autocompleted and "bún" in autocompleted
+
+    conn = sqlite3.connect(tmp_path / "raw.db")
+    names = sorted(r[0] for r in conn.execute("SELECT name FROM restaurants"))
+    conn.close()
+    assert names == ["goong_bún", "goong_cơm", "goong_phở"]
+
+
+def test_scan_with_network_errors_is_incomplete(scan_env, monkeypatch):
+    client = FakeGoong(error_terms=("bún",))
+    monkeypatch.setattr(scan, "GoongClient", lambda api_key: client)
+    assert scan.start_scan()["complete"] is False
+
+    # Lần sau chỉ quét lại query bị lỗi
+    retry = FakeGoong()
+    monkeypatch.setattr(scan, "GoongClient", lambda api_key: retry)
+    assert scan.start_scan()["complete"] is True
+    assert [term for endpoint, term in retry.calls if endpoint == "Place/AutoComplete"] == ["bún"]
+
+
+def test_stale_checkpoints_are_rescanned(scan_env, monkeypatch):
+    monkeypatch.setattr(scan, "GoongClient", lambda api_key: FakeGoong())
+    assert scan.start_scan()["complete"] is True
+
+    conn = sqlite3.connect(scan_env / "raw.db")
+    with conn:
+        conn.execute("UPDATE scan_queries SET completed_at = datetime('now', '-40 days') WHERE term = 'phở'")
+    conn.close()
+    monkeypatch.setattr(config, "SCAN_REFRESH_DAYS", 30)
+
+    again = FakeGoong()
+    monkeypatch.setattr(scan, "GoongClient", lambda api_key: again)
+    assert scan.start_scan()["complete"] is True
+    # Quán cũ đã có trong restaurants -> không lấy lại chi tiết
+    assert again.calls == [("Place/AutoComplete", "phở")]
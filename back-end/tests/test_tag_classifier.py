@@ -0,0 +1,57 @@
+# tests/test_tag_classifier.py
+import importlib
+import random
+import re
+from tag_classifier import build_tag_matcher, parse_alternation
+import pytest
+
+transform = importlib.import_module("3_clean_transform")
+KEYWORDS_CONFIG = transform.KEYWORDS_CONFIG
+
+
+def regex_tags(text):
+    """Cách cũ: 1 lần re.search cho mỗi pattern"""
+    found = set()
+    for group, value in KEYWORDS_CONFIG.items():
+        items = value.items() if isinstance(value, dict) else [(None, value)]
+        for tag, pattern in items:
+            if re.search(pattern, text): found.add((group, tag))
+    return found
+
+
+def random_texts(n=3000, seed=7):
+    rng = random.Random(seed)
+    vocab = set()
+    for value in KEYWORDS_CONFIG.values():
+        for pattern in (value.values() if isinstance(value, dict) else [value]):
+            for phrase in parse_alternation(pattern):
+                vocab.update(phrase.split(" "))
+    vocab = sorted(vocab) + ["ngon", "quán", "hanoi", "viet123", "_kem", "me2"]
+    seps = [" ", " ", " ", "-", "/", "(", ")", "&", " _"]
+    for _ in range(n):
+        words = [rng.choice(vocab) for _ in range(rng.randint(1, 12))]
+        text = words[0]
+        for w in words[1:]:
+            text += rng.choice(seps) + w
+        yield transform.clean_text(text)
+
+
+def test_matcher_equals_regex():
+    matcher = build_tag_matcher(KEYWORDS_CONFIG)
+    for text in random_texts():
+        assert matcher.match(text) == regex_tags(text), text
+
+
+def test_parse_rejects_non_word_phrases():
+    with pytest.raises(ValueError):
+        parse_alternation(r"\b(a.b|c)\b")
+    with pytest.raises(ValueError):
+        parse_alternation(r"(abc)")
+
+
+def test_mapping_priorities():
+    text = transform.clean_text("Sushi & phở, trà sữa")
+    assert transform.map_cuisine(text) == "Nhật Bản"  # Món nước ngoài ưu tiên hơn Việt Nam
+    assert transform.map_beverage_or_food(text, "") == "cả 2"
+    assert transform.map_course_type("kem khai vị", "khô") == "tráng miệng"
+    assert transform.map_flavor("lẩu thái", "Thái Lan", "", "khô") == ["cay", "chua"]
@@ -0,0 +1,53 @@
+# tests/test_translation.py
+from translation import NoopBackend, Translator
+
+
+class CountingBackend:
+    """Backend giả: ghi lại các lô đã gửi, câu chứa 'lỗi' thì dịch thất bại"""
+
+    def __init__(self):
+        self.batches = []
+
+    def translate_batch(self, texts):
+        self.batches.append(list(texts))
+        return [None if "lỗi" in t else f"EN({t})" for t in texts]
+
+
+def make_translator(tmp_path, backend):
+    return Translator(backend=backend, cache_path=str(tmp_path / "cache.db"),
+                      batch_size=2, max_workers=2, rate_per_sec=1000)
+
+
+def test_dedupes_and_keeps_order(tmp_path):
+    backend = CountingBackend()
+    tr = make_translator(tmp_path, backend)
+    texts = ["Quán phở ngon", "", "abc", "Quán phở ngon", "Cà phê sân vườn"]
+    assert tr.translate_many(texts) == [
+        "EN(Quán phở ngon)", "", "", "EN(Quán phở ngon)", "EN(Cà phê sân vườn)"
+    ]
+    sent = [t for batch in backend.batches for t in batch]
+    assert sorted(sent) == ["Cà phê sân vườn", "Quán phở ngon"]
+
+
+def test_cache_persists_between_runs(tmp_path):
+    tr = make_translator(tmp_path, CountingBackend())
+    tr.translate_many(["Quán phở ngon", "Mô tả bị lỗi"])
+    tr.close()
+
+    backend = CountingBackend()
+    tr = make_translator(tmp_path, backend)
+    # Câu đã dịch lấy từ cache, câu lỗi lần trước thì gửi lại (lỗi vẫn giữ nguyên văn)
+    assert tr.translate_many(["Quán phở ngon", "Mô tả bị lỗi"]) == ["EN(Quán phở ngon)", "Mô tả bị lỗi"]
+    assert backend.batches == [["Mô tả bị lỗi"]]
+    assert tr.stats["cache_hits"] == 1
+
+
+def test_noop_backend_does_not_poison_cache(tmp_path):
+    tr = make_translator(tmp_path, NoopBackend())
+    assert tr.translate_many(["Quán phở ngon"]) == ["Quán phở ngon"]
+    tr.close()
+
+    backend = CountingBackend()
+    tr = make_translator(tmp_path, backend)
+    assert tr.translate_many(["Quán phở ngon"]) == ["EN(Quán phở ngon)"]
+    assert backend.batches == [["Quán phở ngon"]]